@@ -3,11 +3,14 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import AsyncIterator
 from typing import Literal
 
+from arxiv2md.fetch import close_http_client
 from arxiv2md.ingestion import ingest_paper as _ingest_paper
 from arxiv2md.query_parser import parse_arxiv_input
 from arxiv2md.schemas import ArxivQuery, IngestionResult
+from arxiv2md.streaming import stream_paper as _stream_paper
 
 _VALID_FILTER_MODES = ("include", "exclude")
 
@@ -55,6 +58,10 @@ async def ingest_paper(
     Raises:
         ValueError: If ``arxiv_id`` is not a recognised arXiv ID or URL, or
             ``section_filter_mode`` is invalid.
+
+    Note:
+        Requests share a pooled HTTP client for the running event loop. Call
+        :func:`close_http_client` when you are done to release connections.
     """
     if section_filter_mode not in _VALID_FILTER_MODES:
         raise ValueError(
@@ -105,17 +112,57 @@ def ingest_paper_sync(
             "Use 'await ingest_paper(...)' instead."
         )
 
-    return asyncio.run(
-        ingest_paper(
-            arxiv_id,
-            remove_refs=remove_refs,
-            remove_toc=remove_toc,
-            remove_inline_citations=remove_inline_citations,
-            section_filter_mode=section_filter_mode,
-            sections=sections,
-            include_frontmatter=include_frontmatter,
-        )
-    )
+    async def _run() -> IngestionResult:
+        try:
+            return await ingest_paper(
+                arxiv_id,
+                remove_refs=remove_refs,
+                remove_toc=remove_toc,
+                remove_inline_citations=remove_inline_citations,
+                section_filter_mode=section_filter_mode,
+                sections=sections,
+                include_frontmatter=include_frontmatter,
+            )
+        finally:
+            # The pooled client is bound to this short-lived loop.
+            await close_http_client()
+
+    return asyncio.run(_run())
+
+
+async def stream_paper(
+    arxiv_id: str,
+    *,
+    remove_refs: bool = True,
+    remove_inline_citations: bool = True,
+    sections: list[str] | None = None,
+) -> AsyncIterator[str]:
+    """Yield a paper's Markdown block by block while it downloads.
+
+    Each section is converted as soon as it has arrived, so the first blocks
+    come before the download finishes. Joined with ``"\\n\\n"``, the blocks
+    equal ``.content`` from :func:`ingest_paper` with the same arguments.
+
+    Args:
+        arxiv_id: arXiv ID or URL.
+        remove_refs: Remove bibliography/references sections.
+        remove_inline_citations: Remove inline citation text.
+        sections: Section titles to exclude. ``None`` means all sections.
+
+    Raises:
+        ValueError: If ``arxiv_id`` is not a recognised arXiv ID or URL.
+    """
+    query = _parse_id(arxiv_id)
+    async for block in _stream_paper(
+        arxiv_id=query.arxiv_id,
+        version=query.version,
+        html_url=query.html_url,
+        ar5iv_url=query.ar5iv_url,
+        remove_refs=remove_refs,
+        remove_inline_citations=remove_inline_citations,
+        sections=sections,
+    ):
+        yield block
 
 
-__all__ = ["ingest_paper", "ingest_paper_sync"]
+__all__ = ["close_http_client", "ingest_paper", "ingest_paper_sync", "stream_paper"]
@@ -7,6 +7,7 @@ import asyncio
 import sys
 from pathlib import Path
 
+from arxiv2md.fetch import close_http_client
 from arxiv2md.ingestion import ingest_paper
 from arxiv2md.query_parser import parse_arxiv_input
 
@@ -34,18 +35,21 @@ async def _async_main(args: argparse.Namespace) -> None:
     query = parse_arxiv_input(args.input_text)
 
     sections = _collect_sections(args.sections, args.section)
-    result, _metadata = await ingest_paper(
-        arxiv_id=query.arxiv_id,
-        version=query.version,
-        html_url=query.html_url,
-        ar5iv_url=query.ar5iv_url,
-        remove_refs=args.remove_refs,
-        remove_toc=args.remove_toc,
-        remove_inline_citations=args.remove_inline_citations,
-        section_filter_mode=args.section_filter_mode,
-        sections=sections,
-        include_frontmatter=args.frontmatter,
-    )
+    try:
+        result, _metadata = await ingest_paper(
+            arxiv_id=query.arxiv_id,
+            version=query.version,
+            html_url=query.html_url,
+            ar5iv_url=query.ar5iv_url,
+            remove_refs=args.remove_refs,
+            remove_toc=args.remove_toc,
+            remove_inline_citations=args.remove_inline_citations,
+            section_filter_mode=args.section_filter_mode,
+            sections=sections,
+            include_frontmatter=args.frontmatter,
+        )
+    finally:
+        await close_http_client()
 
     output_text = _format_output(
         result.summary,
@@ -0,0 +1,140 @@
+"""Micro-benchmarks for the parsing pipeline.
+
+Compare the installed parser engines on a saved arXiv page, for example::
+
+    python -m arxiv2md.bench parsers paper.html --repeat 5
+
+Each engine parses the page and lowers every section, as ingestion does. The
+report gives the fastest run per engine and its speedup over ``html.parser``.
+
+Time building the section tree of synthetic papers of growing size, to check
+that it stays linear in the number of sections::
+
+    python -m arxiv2md.bench sections --sections 500
+
+Compare the time to the first Markdown block when the same synthetic papers
+are fed to :class:`arxiv2md.streaming.StreamingConverter` in network-sized
+chunks, against the total conversion time::
+
+    python -m arxiv2md.bench streaming --sections 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from arxiv2md.html_parser import parse_arxiv_html
+from arxiv2md.ir import lower_nodes
+from arxiv2md.soup import available_engines
+from arxiv2md.streaming import StreamingConverter
+
+
+def best_of(repeat: int, run: Callable[[], object]) -> float:
+    """Return the fastest of ``repeat`` timed calls to ``run``, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _parse_and_lower(html: bytes, engine: str) -> None:
+    pending = parse_arxiv_html(html, engine=engine).sections
+    while pending:
+        section = pending.pop()
+        if section.nodes:
+            lower_nodes(section.nodes)
+        pending.extend(section.children)
+
+
+def bench_parsers(html: bytes, *, repeat: int) -> dict[str, float]:
+    """Time :func:`_parse_and_lower` with each installed engine."""
+    return {engine: best_of(repeat, lambda: _parse_and_lower(html, engine)) for engine in available_engines()}
+
+
+def synthetic_paper(sections: int, *, subsections: int = 3, paragraphs: int = 2) -> str:
+    """Return LaTeXML-style HTML with ``sections`` sections, each with subsections."""
+    paragraph = '<div class="ltx_para"><p class="ltx_p">Body text with <em>emphasis</em> and a <a href="#S1">link</a>.</p></div>'
+    parts = ['<html><body><article class="ltx_document"><h1 class="ltx_title ltx_title_document">Synthetic</h1>']
+    for i in range(1, sections + 1):
+        parts.append(f'<section class="ltx_section" id="S{i}"><h2 class="ltx_title ltx_title_section">{i} Section</h2>')
+        parts.append(paragraph * paragraphs)
+        for j in range(1, subsections + 1):
+            parts.append(
+                f'<section class="ltx_subsection" id="S{i}.SS{j}">'
+                f'<h3 class="ltx_title ltx_title_subsection">{i}.{j} Subsection</h3>{paragraph * paragraphs}</section>'
+            )
+        parts.append("</section>")
+    parts.append("</article></body></html>")
+    return "".join(parts)
+
+
+def bench_sections(sizes: list[int], *, repeat: int) -> dict[int, tuple[float, float]]:
+    """Time parsing each synthetic paper size, and building its section tree alone."""
+    from arxiv2md.html_parser import _extract_sections, _find_document_root
+    from arxiv2md.soup import make_soup
+
+    timings = {}
+    for size in sizes:
+        html = synthetic_paper(size)
+        soup = make_soup(html)
+        root = _find_document_root(soup)
+        timings[size] = (best_of(repeat, lambda: parse_arxiv_html(html)), best_of(repeat, lambda: _extract_sections(root)))
+    return timings
+
+
+def bench_streaming(sizes: list[int], *, chunk_bytes: int = 16 * 1024) -> dict[int, tuple[float, float]]:
+    """Feed each synthetic paper size in chunks; time the first block and the whole paper."""
+    timings = {}
+    for size in sizes:
+        html = synthetic_paper(size).encode("utf-8")
+        converter = StreamingConverter()
+        first = None
+        started = time.perf_counter()
+        for start in range(0, len(html), chunk_bytes):
+            if converter.feed(html[start : start + chunk_bytes]) and first is None:
+                first = time.perf_counter() - started
+        converter.close()
+        total = time.perf_counter() - started
+        timings[size] = (total if first is None else first, total)
+    return timings
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run a benchmark and print its report."""
+    parser = argparse.ArgumentParser(prog="python -m arxiv2md.bench", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    parsers_parser = commands.add_parser("parsers", help="Compare parser engines on a saved HTML page.")
+    parsers_parser.add_argument("html", type=Path, help="A saved arXiv HTML page.")
+    parsers_parser.add_argument("--repeat", type=int, default=5, help="Runs per engine; the fastest is reported.")
+    sections_parser = commands.add_parser("sections", help="Time section tree building on synthetic papers.")
+    sections_parser.add_argument("--sections", type=int, default=500, help="Sections in the largest paper.")
+    sections_parser.add_argument("--repeat", type=int, default=5, help="Runs per size; the fastest is reported.")
+    streaming_parser = commands.add_parser("streaming", help="Time to first block when streaming synthetic papers.")
+    streaming_parser.add_argument("--sections", type=int, default=500, help="Sections in the largest paper.")
+    args = parser.parse_args(argv)
+
+    if args.command == "parsers":
+        timings = bench_parsers(args.html.read_bytes(), repeat=args.repeat)
+        baseline = timings["html.parser"]
+        print(f"{'engine':<12} {'seconds':>8} {'speedup':>8}")
+        for engine, seconds in timings.items():
+            print(f"{engine:<12} {seconds:>8.3f} {baseline / seconds:>7.1f}x")
+    elif args.command == "sections":
+        sizes = [max(1, args.sections // 4), max(1, args.sections // 2), args.sections]
+        print(f"{'sections':>8} {'parse s':>8} {'tree s':>8} {'tree us/section':>16}")
+        for size, (parse_s, tree_s) in bench_sections(sizes, repeat=args.repeat).items():
+            print(f"{size:>8} {parse_s:>8.3f} {tree_s:>8.3f} {tree_s / (size * 4) * 1e6:>16.1f}")
+    elif args.command == "streaming":
+        sizes = [max(1, args.sections // 4), max(1, args.sections // 2), args.sections]
+        print(f"{'sections':>8} {'first s':>8} {'total s':>8}")
+        for size, (first_s, total_s) in bench_streaming(sizes).items():
+            print(f"{size:>8} {first_s:>8.4f} {total_s:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,93 +1,334 @@
-"""Cache eviction and cleanup utilities."""
+"""Cache eviction and cleanup utilities.
+
+Run ``python -m arxiv2md.cache --help`` for maintenance commands.
+"""
 
 from __future__ import annotations
 
-import shutil
+import argparse
+import json
+import sqlite3
+import threading
+import time
 from pathlib import Path
 
+from arxiv2md.cache_backend import (
+    CACHE_BACKENDS,
+    SPOOL_DIRNAME,
+    CacheBackend,
+    FilesystemBackend,
+    RedisBackend,
+    SqliteBackend,
+    shard_for,
+)
+from arxiv2md.cache_index import EVICTION_POLICIES, INDEX_FILENAME, CacheIndex
+from arxiv2md.compression import HTML_BASENAME, active_codec, codec_of, find_blob, recompress
 from arxiv2md.config import (
+    ARXIV2MD_CACHE_ACCESS_LOG,
+    ARXIV2MD_CACHE_BACKEND,
+    ARXIV2MD_CACHE_COST_BYTES_PER_S,
+    ARXIV2MD_CACHE_EVICTION_POLICY,
+    ARXIV2MD_CACHE_HIGH_WATERMARK,
+    ARXIV2MD_CACHE_LOW_WATERMARK,
     ARXIV2MD_CACHE_MAX_SIZE_MB,
     ARXIV2MD_CACHE_PATH,
+    ARXIV2MD_CACHE_REDIS_PREFIX,
+    ARXIV2MD_CACHE_REDIS_URL,
+    ARXIV2MD_CACHE_SQLITE_PATH,
+    ARXIV2MD_CACHE_STALE_IF_ERROR_S,
+    ARXIV2MD_CACHE_STALE_WHILE_REVALIDATE_S,
     ARXIV2MD_CACHE_TTL_SECONDS,
 )
+from arxiv2md.memory_cache import memory_cache
+from arxiv2md.utils.file_lock import FileLock
 from arxiv2md.utils.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+_EVICTION_BATCH = 256
+LOCK_DIRNAME = ".locks"
+_LOCK_SUFFIX = ".lock"
+_MAINTENANCE_LOCK = "maintenance.lock"
+_SQLITE_FILENAME = "entries.sqlite3"
+# Far longer than any download takes, including its retries.
+_SPOOL_MAX_AGE_S = 60 * 60
+_indexes: dict[Path, CacheIndex] = {}
+_backends: dict[tuple[str, Path], CacheBackend] = {}
+# Reads not yet written to the index, as key -> (hits, last access time).
+_pending_accesses: dict[str, tuple[int, float]] = {}
+_pending_lock = threading.Lock()
 
-def _get_cache_subdirs() -> list[Path]:
-    """Return all immediate subdirectories in the cache directory."""
-    if not ARXIV2MD_CACHE_PATH.is_dir():
-        return []
-    return [p for p in ARXIV2MD_CACHE_PATH.iterdir() if p.is_dir()]
 
+def get_backend() -> CacheBackend:
+    """Return the entry storage selected by ``ARXIV2MD_CACHE_BACKEND``."""
+    name = ARXIV2MD_CACHE_BACKEND
+    if name not in CACHE_BACKENDS:
+        logger.warning("Unknown ARXIV2MD_CACHE_BACKEND %r; using fs", name)
+        name = "fs"
+    backend = _backends.get((name, ARXIV2MD_CACHE_PATH))
+    if backend is None:
+        backend = _open_backend(name)
+        _backends[(name, ARXIV2MD_CACHE_PATH)] = backend
+    return backend
 
-def _dir_size_bytes(path: Path) -> int:
-    """Return total size of all files in a directory tree."""
-    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
 
+def _open_backend(name: str) -> CacheBackend:
+    spool = ARXIV2MD_CACHE_PATH / SPOOL_DIRNAME
+    if name == "sqlite":
+        return SqliteBackend(ARXIV2MD_CACHE_SQLITE_PATH or ARXIV2MD_CACHE_PATH / _SQLITE_FILENAME, spool=spool)
+    if name == "redis":
+        return RedisBackend(ARXIV2MD_CACHE_REDIS_URL, prefix=ARXIV2MD_CACHE_REDIS_PREFIX, spool=spool)
+    return FilesystemBackend(ARXIV2MD_CACHE_PATH)
 
-def _dir_mtime(path: Path) -> float:
-    """Return the most recent mtime of any file in the directory."""
-    mtimes = [f.stat().st_mtime for f in path.rglob("*") if f.is_file()]
-    return max(mtimes) if mtimes else 0.0
 
+def get_index() -> CacheIndex:
+    """Return the index for the configured cache directory.
 
-def get_cache_size_bytes() -> int:
-    """Return the total size of the cache directory in bytes."""
-    return sum(_dir_size_bytes(d) for d in _get_cache_subdirs())
+    The index is local to this node even when entries live in a shared
+    backend. A missing index is rebuilt from the backend the first time it is
+    opened.
+    """
+    path = ARXIV2MD_CACHE_PATH / INDEX_FILENAME
+    index = _indexes.get(path)
+    if index is None:
+        index = CacheIndex(path, bytes_per_s=ARXIV2MD_CACHE_COST_BYTES_PER_S)
+        _indexes[path] = index
+        if index.created and get_backend().keys():
+            reconcile_index()
+    return index
 
 
-def purge_expired_entries() -> int:
-    """Remove cache entries older than the configured TTL.
+def record_entry(key: str, *, fetched_bytes: int = 0) -> None:
+    """Record that entry ``key`` was (re)written after downloading ``fetched_bytes``."""
+    size = get_backend().entry_size(key)
+    try:
+        get_index().record_write(key, size, fetched_bytes=fetched_bytes)
+    except sqlite3.Error as exc:
+        logger.warning("Failed to update cache index", extra={"cache_key": key, "error": str(exc)})
+    _log_access("write", key, size=size, fetched_bytes=fetched_bytes)
 
-    Returns the number of entries removed.
+
+def touch_entry(key: str) -> None:
+    """Record that entry ``key`` was served, whether it was cached or just fetched.
+
+    The read is only counted in memory; :func:`flush_accesses` writes the
+    counts to the index, so serving a hit never waits on SQLite.
     """
-    if ARXIV2MD_CACHE_TTL_SECONDS <= 0:
+    now = time.time()
+    with _pending_lock:
+        hits, _ = _pending_accesses.get(key, (0, now))
+        _pending_accesses[key] = (hits + 1, now)
+    _log_access("access", key)
+
+
+def flush_accesses() -> int:
+    """Write reads buffered by :func:`touch_entry` to the index.
+
+    Called by maintenance and before eviction. Returns the number of entries
+    updated; on failure the reads are dropped, as they only steer eviction.
+    """
+    global _pending_accesses
+    with _pending_lock:
+        pending, _pending_accesses = _pending_accesses, {}
+    try:
+        get_index().record_accesses((key, hits, last_access) for key, (hits, last_access) in pending.items())
+    except sqlite3.Error as exc:
+        logger.warning("Failed to update cache index", extra={"error": str(exc)})
         return 0
+    return len(pending)
 
-    import time
 
-    now = time.time()
-    removed = 0
+def record_parse_time(key: str, seconds: float) -> None:
+    """Record how long entry ``key``'s HTML took to parse, for cost-aware eviction."""
+    try:
+        get_index().record_parse_time(key, seconds)
+    except sqlite3.Error as exc:
+        logger.warning("Failed to update cache index", extra={"cache_key": key, "error": str(exc)})
+    _log_access("parse", key, seconds=round(seconds, 6))
+
+
+def record_derived_bytes(key: str, nbytes: int) -> None:
+    """Count blobs derived from entry ``key``'s HTML (e.g. rendered results) in its size."""
+    try:
+        get_index().record_size_change(key, nbytes)
+    except sqlite3.Error as exc:
+        logger.warning("Failed to update cache index", extra={"cache_key": key, "error": str(exc)})
 
-    for subdir in _get_cache_subdirs():
-        mtime = _dir_mtime(subdir)
-        if mtime > 0 and (now - mtime) > ARXIV2MD_CACHE_TTL_SECONDS:
-            shutil.rmtree(subdir, ignore_errors=True)
+
+def _log_access(op: str, key: str, **fields: float | int) -> None:
+    """Append an event to the access log used by ``python -m arxiv2md.cache_sim``."""
+    if ARXIV2MD_CACHE_ACCESS_LOG is None:
+        return
+    line = json.dumps({"t": round(time.time(), 3), "op": op, "key": key, **fields})
+    try:
+        with ARXIV2MD_CACHE_ACCESS_LOG.open("a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+    except OSError as exc:
+        logger.warning("Failed to write cache access log", extra={"error": str(exc)})
+
+
+def reconcile_index() -> int:
+    """Rebuild the cache index from what is in the backend.
+
+    Returns the number of entries indexed.
+    """
+    backend = get_backend()
+    scanned = [(key, backend.entry_size(key), backend.entry_mtime(key)) for key in backend.keys()]
+    get_index().reconcile(scanned)
+    return len(scanned)
+
+
+def get_cache_size_bytes() -> int:
+    """Return the total size of the cached entries in bytes."""
+    return get_index().total_size()
+
+
+def fetch_lock(key: str) -> FileLock:
+    """Return the node-local lock that serializes downloads of entry ``key``."""
+    return FileLock(ARXIV2MD_CACHE_PATH / LOCK_DIRNAME / shard_for(key) / f"{key}{_LOCK_SUFFIX}")
+
+
+def _remove_entries(keys: list[str]) -> None:
+    backend = get_backend()
+    for key in keys:
+        backend.delete_entry(key)
+        _remove_lock_file(fetch_lock(key))
+        # Stop arxiv2md.fetch serving the entry from memory without checking the backend.
+        memory_cache.discard(("validated", key))
+
+
+def _remove_lock_file(lock: FileLock) -> bool:
+    """Delete a lock file unless someone holds it, then its emptied shard directories."""
+    if not lock.path.exists() or not lock.acquire(blocking=False):
+        return False
+    try:
+        lock.path.unlink(missing_ok=True)
+    finally:
+        lock.release()
+    lock_root = ARXIV2MD_CACHE_PATH / LOCK_DIRNAME
+    for parent in lock.path.parents:
+        if parent == lock_root or lock_root not in parent.parents:
+            break
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+    return True
+
+
+def sweep_fetch_locks() -> int:
+    """Remove fetch lock files left behind by papers that are not cached.
+
+    Failed downloads leave a lock file without an entry; locks that are
+    currently held are skipped. Returns the number of lock files removed.
+    """
+    index = get_index()
+    removed = 0
+    for path in (ARXIV2MD_CACHE_PATH / LOCK_DIRNAME).glob(f"*/*/*{_LOCK_SUFFIX}"):
+        key = path.name[: -len(_LOCK_SUFFIX)]
+        if index.get(key) is None and _remove_lock_file(FileLock(path)):
             removed += 1
+    if removed:
+        logger.info("Removed %d stale fetch lock files", removed)
+    return removed
+
+
+def sweep_spool(max_age: float = _SPOOL_MAX_AGE_S) -> int:
+    """Remove spool files left behind by downloads a crashed worker never finished.
 
+    Returns the number of files removed.
+    """
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in (ARXIV2MD_CACHE_PATH / SPOOL_DIRNAME).glob("*"):
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            pass
     if removed:
-        logger.info("Purged %d expired cache entries", removed)
+        logger.info("Removed %d stale spool files", removed)
     return removed
 
 
-def evict_if_needed() -> int:
-    """Evict oldest cache entries until total size is under the configured max.
+def purge_expired_entries() -> int:
+    """Remove cache entries older than the configured TTL plus stale windows.
+
+    Expired entries are kept while they can still be served stale.
 
     Returns the number of entries removed.
     """
+    if ARXIV2MD_CACHE_TTL_SECONDS <= 0:
+        return 0
+
+    max_age = ARXIV2MD_CACHE_TTL_SECONDS + max(
+        ARXIV2MD_CACHE_STALE_WHILE_REVALIDATE_S, ARXIV2MD_CACHE_STALE_IF_ERROR_S, 0
+    )
+    index = get_index()
+    expired = index.written_before(time.time() - max_age)
+    _remove_entries(expired)
+    index.remove(expired)
+
+    if expired:
+        logger.info("Purged %d expired cache entries", len(expired))
+    return len(expired)
+
+
+def over_high_watermark() -> bool:
+    """Whether the cache has grown past ``ARXIV2MD_CACHE_HIGH_WATERMARK`` of its max size.
+
+    This is one indexed lookup, cheap enough to run after every write.
+    """
     max_bytes = ARXIV2MD_CACHE_MAX_SIZE_MB * 1024 * 1024
     if max_bytes <= 0:
-        return 0
+        return False
+    try:
+        return get_index().total_size() > max_bytes * ARXIV2MD_CACHE_HIGH_WATERMARK
+    except sqlite3.Error as exc:
+        logger.warning("Failed to read cache index", extra={"error": str(exc)})
+        return False
+
 
-    subdirs = _get_cache_subdirs()
-    total_size = sum(_dir_size_bytes(d) for d in subdirs)
+def evict_if_needed(*, high_watermark: float = 1.0) -> int:
+    """Evict entries once the cache is over ``high_watermark`` of its max size.
 
-    if total_size <= max_bytes:
+    Eviction then continues in one batch down to ``ARXIV2MD_CACHE_LOW_WATERMARK``
+    so the next writes do not each trigger another round. Entries are chosen
+    by ``ARXIV2MD_CACHE_EVICTION_POLICY``: by default the lowest GDSF priority
+    (rarely read, cheap to rebuild, large) goes first.
+
+    This does the eviction I/O itself, so request handlers should call
+    :func:`arxiv2md.cache_maintenance.request_eviction` instead.
+
+    Returns the number of entries removed.
+    """
+    max_bytes = ARXIV2MD_CACHE_MAX_SIZE_MB * 1024 * 1024
+    if max_bytes <= 0:
         return 0
 
-    # Sort by mtime ascending (oldest first)
-    subdirs.sort(key=_dir_mtime)
+    flush_accesses()
+    index = get_index()
+    total_size = index.total_size()
+    if total_size <= max_bytes * high_watermark:
+        return 0
 
+    policy = ARXIV2MD_CACHE_EVICTION_POLICY if ARXIV2MD_CACHE_EVICTION_POLICY in EVICTION_POLICIES else "gdsf"
+    target_bytes = max_bytes * min(ARXIV2MD_CACHE_LOW_WATERMARK, high_watermark)
     removed = 0
-    for subdir in subdirs:
-        if total_size <= max_bytes:
+    while total_size > target_bytes:
+        batch = index.eviction_candidates(_EVICTION_BATCH, policy)
+        if not batch:
             break
-        entry_size = _dir_size_bytes(subdir)
-        shutil.rmtree(subdir, ignore_errors=True)
-        total_size -= entry_size
-        removed += 1
+        victims: list[str] = []
+        for entry in batch:
+            if total_size <= target_bytes:
+                break
+            victims.append(entry.key)
+            total_size -= entry.size
+        _remove_entries(victims)
+        index.evict(victims)
+        removed += len(victims)
 
     if removed:
         logger.info(
@@ -102,3 +343,128 @@ def cleanup_cache() -> None:
     """Run a full cache cleanup: purge expired entries, then evict by size."""
     purge_expired_entries()
     evict_if_needed()
+
+
+def run_maintenance() -> tuple[int, int] | None:
+    """Purge expired entries, evict down from the high watermark and sweep stale fetch locks and spool files.
+
+    Only one process runs maintenance at a time; if another holds the
+    maintenance lock this only flushes the reads buffered by this process and
+    returns None. Otherwise it returns the number of entries purged and evicted.
+    """
+    # Reads are buffered per process, so flush them even when another worker does the rest.
+    flush_accesses()
+    lock = FileLock(ARXIV2MD_CACHE_PATH / LOCK_DIRNAME / _MAINTENANCE_LOCK)
+    if not lock.acquire(blocking=False):
+        return None
+    try:
+        purged = purge_expired_entries()
+        evicted = evict_if_needed(high_watermark=ARXIV2MD_CACHE_HIGH_WATERMARK)
+        sweep_fetch_locks()
+        sweep_spool()
+    finally:
+        lock.release()
+    return purged, evicted
+
+
+def migrate_compression() -> int:
+    """Rewrite every cached HTML file with the active compression codec.
+
+    Returns the number of files rewritten.
+    """
+    codec = active_codec()
+    backend = get_backend()
+    migrated = 0
+    for key in backend.keys():
+        found = find_blob(backend, key, HTML_BASENAME)
+        if found is None or codec_of(found[0]) == codec:
+            continue
+        recompress(backend, key, found[0], codec)
+        migrated += 1
+
+    if migrated:
+        logger.info("Recompressed %d cached HTML files with %s", migrated, codec)
+        reconcile_index()
+    return migrated
+
+
+def import_directory(source: Path, *, remove: bool = False) -> int:
+    """Copy every entry of a directory cache into the configured backend.
+
+    This is how an existing ``fs`` cache moves to the ``sqlite`` (or
+    ``redis``) backend. Blob mtimes are kept so imported entries keep their
+    age, and leftover ``.part`` files from interrupted downloads are skipped.
+    With ``remove`` each entry directory is deleted once it has been copied.
+
+    Returns the number of entries imported.
+    """
+    target = get_backend()
+    legacy = FilesystemBackend(source.expanduser().resolve())
+    if isinstance(target, FilesystemBackend) and target.root == legacy.root:
+        raise ValueError(f"{source} is already the cache directory of the fs backend")
+
+    imported = 0
+    for key in legacy.keys():
+        blobs = []
+        for name in legacy.names(key):
+            info = legacy.info(key, name)
+            data = legacy.read(key, name)
+            if name.endswith(".part") or info is None or data is None:
+                continue
+            blobs.append((name, data, info.mtime))
+        target.write_many(key, blobs)
+        if remove:
+            legacy.delete_entry(key)
+        imported += 1
+
+    if imported:
+        logger.info("Imported %d cache entries from %s", imported, legacy.root)
+        reconcile_index()
+    return imported
+
+
+def migrate_layout() -> int:
+    """Move ``fs`` backend entries from the flat layout into shard directories.
+
+    Returns the number of entries moved.
+    """
+    backend = get_backend()
+    if not isinstance(backend, FilesystemBackend):
+        return 0
+    moved = backend.migrate_layout()
+    if moved:
+        logger.info("Moved %d cache entries into shard directories", moved)
+    return moved
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run a cache maintenance command."""
+    parser = argparse.ArgumentParser(prog="python -m arxiv2md.cache", description="arxiv2md cache maintenance.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("cleanup", help="Purge expired entries, then evict down to the size limit.")
+    commands.add_parser("compress", help="Rewrite cached HTML with the ARXIV2MD_CACHE_COMPRESSION codec.")
+    commands.add_parser("reconcile", help="Rebuild the cache index from the stored entries.")
+    commands.add_parser("shard", help="Move fs entries from the flat layout into shard directories.")
+    import_parser = commands.add_parser(
+        "import", help="Copy a directory cache into the ARXIV2MD_CACHE_BACKEND backend (e.g. sqlite)."
+    )
+    import_parser.add_argument(
+        "source", nargs="?", type=Path, default=ARXIV2MD_CACHE_PATH, help="Directory cache to import from."
+    )
+    import_parser.add_argument("--remove", action="store_true", help="Delete each entry directory once imported.")
+    args = parser.parse_args(argv)
+
+    if args.command == "cleanup":
+        cleanup_cache()
+    elif args.command == "compress":
+        print(f"Recompressed {migrate_compression()} cached HTML files")
+    elif args.command == "reconcile":
+        print(f"Indexed {reconcile_index()} cache entries")
+    elif args.command == "shard":
+        print(f"Moved {migrate_layout()} cache entries into shard directories")
+    elif args.command == "import":
+        print(f"Imported {import_directory(args.source, remove=args.remove)} cache entries")
+
+
+if __name__ == "__main__":
+    main()
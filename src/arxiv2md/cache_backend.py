@@ -0,0 +1,555 @@
+"""Storage backends for cache entries.
+
+An entry is a key such as ``2501.11120__v1`` (a paper version) or a digest
+UUID, holding a few named blobs: ``source.html.gz``, ``source_url.txt``,
+``validators.json``, ``results/<key>.json`` and so on. ``ARXIV2MD_CACHE_BACKEND``
+selects where those blobs live:
+
+- ``fs`` (default): one directory per entry under ``ARXIV2MD_CACHE_PATH``,
+  sharded two levels deep by a hash of the key (``ab/cd/<key>``).
+- ``sqlite``: a single database file (``ARXIV2MD_CACHE_SQLITE_PATH``) shared
+  by every worker that can reach it.
+- ``redis``: a Redis-protocol server (``ARXIV2MD_CACHE_REDIS_URL``), so a
+  fleet of nodes shares one warm cache.
+
+Per-node bookkeeping stays under ``ARXIV2MD_CACHE_PATH`` whatever the
+backend: the cache index, fetch locks and the spool directory downloads are
+streamed into before they are stored.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+CACHE_BACKENDS = ("fs", "sqlite", "redis")
+SPOOL_DIRNAME = ".spool"
+
+# Hex digits per shard level; two levels of 256 directories keep even a
+# million entries to a few dozen per directory.
+_SHARD_WIDTH = 2
+
+
+@dataclass(frozen=True)
+class BlobInfo:
+    """Size in bytes and modification time (seconds since the epoch) of a blob."""
+
+    size: int
+    mtime: float
+
+    @property
+    def mtime_ns(self) -> int:
+        return int(self.mtime * 1_000_000_000)
+
+
+class CacheBackend(ABC):
+    """Key/blob storage for cache entries.
+
+    Writes replace a blob atomically: concurrent readers see either the old
+    or the new bytes, never a mix.
+    """
+
+    @abstractmethod
+    def read(self, key: str, name: str) -> bytes | None:
+        """Return a blob's bytes, or None if it does not exist."""
+
+    @abstractmethod
+    def info(self, key: str, name: str) -> BlobInfo | None:
+        """Return a blob's size and mtime, or None if it does not exist."""
+
+    @abstractmethod
+    def write(self, key: str, name: str, data: bytes, *, mtime: float | None = None) -> None:
+        """Store ``data``, stamped with ``mtime`` (default: now)."""
+
+    @abstractmethod
+    def touch(self, key: str, name: str) -> None:
+        """Set a blob's mtime to now, if it exists."""
+
+    @abstractmethod
+    def delete(self, key: str, names: Iterable[str]) -> None:
+        """Remove blobs from an entry; missing names are ignored."""
+
+    @abstractmethod
+    def delete_entry(self, key: str) -> None:
+        """Remove an entry and all of its blobs."""
+
+    @abstractmethod
+    def names(self, key: str) -> list[str]:
+        """Return the names of an entry's blobs."""
+
+    @abstractmethod
+    def keys(self) -> list[str]:
+        """Return every entry key."""
+
+    @abstractmethod
+    def spool_dir(self, key: str) -> Path:
+        """Return a local directory to stream a download for ``key`` into."""
+
+    def write_many(self, key: str, blobs: Iterable[tuple[str, bytes, float | None]]) -> None:
+        """Store several ``(name, data, mtime)`` blobs in one entry."""
+        for name, data, mtime in blobs:
+            self.write(key, name, data, mtime=mtime)
+
+    def write_file(self, key: str, name: str, path: Path) -> None:
+        """Store a spooled file as a blob, consuming the file."""
+        try:
+            self.write(key, name, path.read_bytes())
+        finally:
+            path.unlink(missing_ok=True)
+
+    def entry_size(self, key: str) -> int:
+        return sum(info.size for info in self._infos(key))
+
+    def entry_mtime(self, key: str) -> float:
+        """Return the most recent mtime of any blob in the entry (0.0 if empty)."""
+        return max((info.mtime for info in self._infos(key)), default=0.0)
+
+    def close(self) -> None:
+        """Release connections held by the calling thread."""
+
+    def _infos(self, key: str) -> list[BlobInfo]:
+        return [info for name in self.names(key) if (info := self.info(key, name)) is not None]
+
+
+def shard_for(key: str) -> Path:
+    """Return the relative two-level shard directory (``ab/cd``) for ``key``."""
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return Path(digest[:_SHARD_WIDTH], digest[_SHARD_WIDTH : 2 * _SHARD_WIDTH])
+
+
+def _is_shard_name(name: str) -> bool:
+    return len(name) == _SHARD_WIDTH and all(char in "0123456789abcdef" for char in name)
+
+
+class FilesystemBackend(CacheBackend):
+    """One directory per entry, one file per blob.
+
+    Entries live in hashed shard directories (``ab/cd/<key>``) so no single
+    directory grows with the cache. Entries from the older flat layout
+    (``<key>`` directly under the root) are still read and updated in place
+    until :meth:`migrate_layout` moves them.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def entry_dir(self, key: str) -> Path:
+        legacy = self.root / key
+        if legacy.is_dir():
+            return legacy
+        return self.root / shard_for(key) / key
+
+    def path(self, key: str, name: str) -> Path:
+        return self.entry_dir(key) / name
+
+    def read(self, key: str, name: str) -> bytes | None:
+        try:
+            return self.path(key, name).read_bytes()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    def info(self, key: str, name: str) -> BlobInfo | None:
+        try:
+            stat = self.path(key, name).stat()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return BlobInfo(size=stat.st_size, mtime=stat.st_mtime)
+
+    def write(self, key: str, name: str, data: bytes, *, mtime: float | None = None) -> None:
+        path = self.path(key, name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f"{path.name}.", suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            if mtime is not None:
+                os.utime(tmp, (mtime, mtime))
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def write_file(self, key: str, name: str, path: Path) -> None:
+        # The spool directory is under the same root, so this is a same-filesystem rename.
+        target = self.path(key, name)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, target)
+
+    def touch(self, key: str, name: str) -> None:
+        try:
+            os.utime(self.path(key, name))
+        except FileNotFoundError:
+            pass
+
+    def delete(self, key: str, names: Iterable[str]) -> None:
+        entry_dir = self.entry_dir(key)
+        for name in names:
+            path = entry_dir / name
+            path.unlink(missing_ok=True)
+            # Drop subdirectories (e.g. results/) once they are empty.
+            if path.parent != entry_dir:
+                try:
+                    path.parent.rmdir()
+                except OSError:
+                    pass
+
+    def delete_entry(self, key: str) -> None:
+        entry_dir = self.entry_dir(key)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        self._remove_empty_shards(entry_dir.parent)
+
+    def _remove_empty_shards(self, shard: Path) -> None:
+        while shard != self.root and _is_shard_name(shard.name):
+            try:
+                shard.rmdir()
+            except OSError:
+                return
+            shard = shard.parent
+
+    def names(self, key: str) -> list[str]:
+        entry_dir = self.entry_dir(key)
+        if not entry_dir.is_dir():
+            return []
+        return [path.relative_to(entry_dir).as_posix() for path in entry_dir.rglob("*") if path.is_file()]
+
+    def keys(self) -> list[str]:
+        return [path.name for path in self._entry_dirs()]
+
+    def _entry_dirs(self) -> list[Path]:
+        # Hidden directories (e.g. ``.locks``) hold bookkeeping, not entries.
+        if not self.root.is_dir():
+            return []
+        entries = []
+        for path in self.root.iterdir():
+            if not path.is_dir() or path.name.startswith("."):
+                continue
+            if not _is_shard_name(path.name):
+                entries.append(path)
+                continue
+            for inner in path.iterdir():
+                if inner.is_dir() and _is_shard_name(inner.name):
+                    entries.extend(entry for entry in inner.iterdir() if entry.is_dir())
+        return entries
+
+    def migrate_layout(self) -> int:
+        """Move entries from the flat layout into shard directories.
+
+        Run this while no worker is writing to the cache, as with the other
+        one-shot migrations. Returns the number of entries moved.
+        """
+        moved = 0
+        for path in self._entry_dirs():
+            if path.parent != self.root:
+                continue
+            target = self.root / shard_for(path.name) / path.name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.replace(path, target)
+            except OSError:
+                # The key exists in both layouts (e.g. written by a newer
+                # release before a rollback); keep the sharded copy.
+                shutil.rmtree(path, ignore_errors=True)
+            moved += 1
+        return moved
+
+    def spool_dir(self, key: str) -> Path:
+        # Not the entry itself, so partial downloads never count as blobs.
+        return self.root / SPOOL_DIRNAME
+
+    def entry_size(self, key: str) -> int:
+        return sum(path.stat().st_size for path in self.entry_dir(key).rglob("*") if path.is_file())
+
+    def entry_mtime(self, key: str) -> float:
+        mtimes = [path.stat().st_mtime for path in self.entry_dir(key).rglob("*") if path.is_file()]
+        return max(mtimes, default=0.0)
+
+
+# Readers map the database instead of copying pages through read() calls.
+_SQLITE_MMAP_BYTES = 256 * 1024 * 1024
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (key, name)
+);
+"""
+
+
+class SqliteBackend(CacheBackend):
+    """Every entry in one SQLite database, in WAL mode so readers never block.
+
+    This keeps a large cache to a single file instead of a directory and a few
+    files per paper. Each thread of each worker process gets its own
+    connection; writers serialise on SQLite's lock while readers carry on
+    from the last committed snapshot.
+    """
+
+    def __init__(self, path: Path, *, spool: Path) -> None:
+        self.path = path
+        self.spool = spool
+        self._local = threading.local()
+
+    def read(self, key: str, name: str) -> bytes | None:
+        row = self._connection().execute("SELECT data FROM blobs WHERE key = ? AND name = ?", (key, name)).fetchone()
+        return row[0] if row else None
+
+    def info(self, key: str, name: str) -> BlobInfo | None:
+        row = (
+            self._connection()
+            .execute("SELECT size, mtime FROM blobs WHERE key = ? AND name = ?", (key, name))
+            .fetchone()
+        )
+        return BlobInfo(size=row[0], mtime=row[1]) if row else None
+
+    def write(self, key: str, name: str, data: bytes, *, mtime: float | None = None) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO blobs (key, name, size, mtime, data) VALUES (?, ?, ?, ?, ?)",
+                (key, name, len(data), time.time() if mtime is None else mtime, data),
+            )
+
+    def write_many(self, key: str, blobs: Iterable[tuple[str, bytes, float | None]]) -> None:
+        # One transaction, so other workers never see a partly imported entry.
+        now = time.time()
+        rows = [(key, name, len(data), now if mtime is None else mtime, data) for name, data, mtime in blobs]
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO blobs (key, name, size, mtime, data) VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+    def touch(self, key: str, name: str) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute("UPDATE blobs SET mtime = ? WHERE key = ? AND name = ?", (time.time(), key, name))
+
+    def delete(self, key: str, names: Iterable[str]) -> None:
+        connection = self._connection()
+        with connection:
+            connection.executemany("DELETE FROM blobs WHERE key = ? AND name = ?", [(key, name) for name in names])
+
+    def delete_entry(self, key: str) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM blobs WHERE key = ?", (key,))
+
+    def names(self, key: str) -> list[str]:
+        return [row[0] for row in self._connection().execute("SELECT name FROM blobs WHERE key = ?", (key,))]
+
+    def keys(self) -> list[str]:
+        return [row[0] for row in self._connection().execute("SELECT DISTINCT key FROM blobs")]
+
+    def spool_dir(self, key: str) -> Path:
+        return self.spool
+
+    def entry_size(self, key: str) -> int:
+        row = self._connection().execute("SELECT COALESCE(SUM(size), 0) FROM blobs WHERE key = ?", (key,)).fetchone()
+        return row[0]
+
+    def entry_mtime(self, key: str) -> float:
+        row = self._connection().execute("SELECT COALESCE(MAX(mtime), 0) FROM blobs WHERE key = ?", (key,)).fetchone()
+        return row[0]
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA mmap_size={_SQLITE_MMAP_BYTES}")
+            connection.executescript(_SQLITE_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+
+# KEYS: the entry hash and the entries set; ARGV: the entry key, then the fields.
+_REDIS_DELETE_SCRIPT = """
+redis.call('HDEL', KEYS[1], unpack(ARGV, 2))
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[2], ARGV[1])
+end
+return 0
+"""
+
+
+class RedisError(RuntimeError):
+    """An error reply from the Redis server."""
+
+
+class RedisBackend(CacheBackend):
+    """Entries stored in a Redis-protocol server shared by every node.
+
+    Each entry is one hash, ``<prefix>entry:<key>``, with a ``d:<name>``
+    field holding each blob and an ``m:<name>`` field holding its mtime.
+    The set ``<prefix>entries`` lists the keys. The client speaks RESP
+    directly over one socket per thread, so no client library is needed.
+    """
+
+    def __init__(self, url: str, *, prefix: str = "arxiv2md:", spool: Path, timeout: float = 10.0) -> None:
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported Redis URL scheme: {url!r}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.prefix = prefix
+        self.spool = spool
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def read(self, key: str, name: str) -> bytes | None:
+        return self._command("HGET", self._hash(key), f"d:{name}")
+
+    def info(self, key: str, name: str) -> BlobInfo | None:
+        size, mtime = self._pipeline([("HSTRLEN", self._hash(key), f"d:{name}"), ("HGET", self._hash(key), f"m:{name}")])
+        if mtime is None:
+            return None
+        return BlobInfo(size=size, mtime=float(mtime))
+
+    def write(self, key: str, name: str, data: bytes, *, mtime: float | None = None) -> None:
+        stamp = repr(time.time() if mtime is None else mtime)
+        self._pipeline(
+            [
+                ("HSET", self._hash(key), f"d:{name}", data, f"m:{name}", stamp),
+                ("SADD", self._entries(), key),
+            ]
+        )
+
+    def write_many(self, key: str, blobs: Iterable[tuple[str, bytes, float | None]]) -> None:
+        now = time.time()
+        fields: list[str | bytes] = []
+        for name, data, mtime in blobs:
+            fields += [f"d:{name}", data, f"m:{name}", repr(now if mtime is None else mtime)]
+        if fields:
+            self._pipeline([("HSET", self._hash(key), *fields), ("SADD", self._entries(), key)])
+
+    def touch(self, key: str, name: str) -> None:
+        # HSET would resurrect the mtime of a blob deleted in the meantime.
+        if self._command("HEXISTS", self._hash(key), f"d:{name}"):
+            self._command("HSET", self._hash(key), f"m:{name}", repr(time.time()))
+
+    def delete(self, key: str, names: Iterable[str]) -> None:
+        fields = [field for name in names for field in (f"d:{name}", f"m:{name}")]
+        if fields:
+            # One script, so the key leaves the entries set together with its last blob.
+            self._command("EVAL", _REDIS_DELETE_SCRIPT, "2", self._hash(key), self._entries(), key, *fields)
+
+    def delete_entry(self, key: str) -> None:
+        self._pipeline([("DEL", self._hash(key)), ("SREM", self._entries(), key)])
+
+    def names(self, key: str) -> list[str]:
+        fields = self._command("HKEYS", self._hash(key)) or []
+        return [field.decode("utf-8")[2:] for field in fields if field.startswith(b"d:")]
+
+    def keys(self) -> list[str]:
+        return sorted(member.decode("utf-8") for member in self._command("SMEMBERS", self._entries()) or [])
+
+    def spool_dir(self, key: str) -> Path:
+        return self.spool
+
+    def close(self) -> None:
+        sock = getattr(self._local, "socket", None)
+        if sock is not None:
+            self._local.reader.close()
+            sock.close()
+            self._local.socket = self._local.reader = None
+
+    def _hash(self, key: str) -> str:
+        return f"{self.prefix}entry:{key}"
+
+    def _entries(self) -> str:
+        return f"{self.prefix}entries"
+
+    def _command(self, *args: str | bytes) -> object:
+        return self._pipeline([args])[0]
+
+    def _pipeline(self, commands: list[tuple[str | bytes, ...]]) -> list[object]:
+        """Send ``commands`` in one round trip and return their replies in order."""
+        payload = b"".join(_encode_command(command) for command in commands)
+        sock, reader = self._connect()
+        try:
+            sock.sendall(payload)
+            replies = [_read_reply(reader) for _ in commands]
+        except OSError:
+            # The connection is in an unknown state; reconnect next time.
+            self.close()
+            raise
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def _connect(self) -> tuple[socket.socket, object]:
+        sock = getattr(self._local, "socket", None)
+        if sock is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self._local.socket = sock
+            self._local.reader = sock.makefile("rb")
+            setup: list[tuple[str, ...]] = []
+            if self.password:
+                setup.append(("AUTH", self.password))
+            if self.db:
+                setup.append(("SELECT", str(self.db)))
+            try:
+                if setup:
+                    self._pipeline(setup)
+            except (OSError, RedisError):
+                # A rejected AUTH or SELECT leaves the socket unusable.
+                self.close()
+                raise
+        return sock, self._local.reader
+
+
+def _encode_command(args: tuple[str | bytes, ...]) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def _read_reply(reader) -> object:
+    line = reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("Connection closed by Redis server")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode("utf-8")
+    if kind == b"-":
+        return RedisError(rest.decode("utf-8"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = reader.read(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(rest)
+        return None if count < 0 else [_read_reply(reader) for _ in range(count)]
+    raise ConnectionError(f"Unexpected Redis reply: {line!r}")
@@ -0,0 +1,266 @@
+"""Persistent SQLite index of cache entries.
+
+The index records each entry's size, write time, access count and rebuild
+cost so that size checks and eviction never have to walk the cache directory.
+Eviction order follows Greedy-Dual-Size-Frequency (GDSF): entries that are
+read often and are expensive to rebuild relative to their size stay
+resident. The index lives in the cache directory itself (``.index.sqlite3``)
+and is shared by all worker processes through SQLite's WAL mode. If it is
+lost or drifts from what is on disk, :meth:`CacheIndex.reconcile` rebuilds
+it from a directory scan.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+INDEX_FILENAME = ".index.sqlite3"
+
+_TABLES = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    fetched_bytes INTEGER NOT NULL DEFAULT 0,
+    parse_seconds REAL NOT NULL DEFAULT 0,
+    priority REAL NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL,
+    clock REAL NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO totals (id, size) VALUES (0, 0);
+"""
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE INDEX IF NOT EXISTS entries_created ON entries (created);
+CREATE INDEX IF NOT EXISTS entries_priority ON entries (priority);
+
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE totals SET size = size + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries BEGIN
+    UPDATE totals SET size = size - OLD.size + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE totals SET size = size - OLD.size WHERE id = 0;
+END;
+"""
+
+_REPRIORITIZE = (
+    "UPDATE entries SET priority = arxiv2md_priority("
+    "(SELECT clock FROM totals WHERE id = 0), hits, size, fetched_bytes, parse_seconds)"
+)
+
+EVICTION_POLICIES = ("gdsf", "lru")
+
+
+def rebuild_cost(size: int, fetched_bytes: int, parse_seconds: float, bytes_per_s: float) -> float:
+    """Estimate the seconds it would take to rebuild an entry after eviction.
+
+    Entries without a recorded download (e.g. digests) are charged their own size.
+    """
+    return max(fetched_bytes, size) / bytes_per_s + parse_seconds
+
+
+def gdsf_priority(clock: float, frequency: int, cost: float, size: int) -> float:
+    """Greedy-Dual-Size-Frequency priority; the lowest priority is evicted first.
+
+    ``clock`` is the priority of the last evicted entry, which ages out
+    entries that were popular once but are no longer being read.
+    """
+    return clock + max(frequency, 1) * cost / max(size, 1)
+
+
+@dataclass
+class IndexedEntry:
+    """One row of the cache index."""
+
+    key: str
+    size: int
+    created: float
+    last_access: float
+    hits: int
+    fetched_bytes: int = 0
+    parse_seconds: float = 0.0
+    priority: float = 0.0
+
+
+_ENTRY_COLUMNS = "key, size, created, last_access, hits, fetched_bytes, parse_seconds, priority"
+
+
+class CacheIndex:
+    """Thread-safe handle on the cache index database.
+
+    ``bytes_per_s`` converts downloaded bytes into seconds of rebuild cost for
+    the GDSF priority (see :func:`rebuild_cost`).
+    """
+
+    def __init__(self, path: Path, *, bytes_per_s: float = 1_000_000.0) -> None:
+        self.path = path
+        self.bytes_per_s = bytes_per_s
+        self._local = threading.local()
+        self._created = not path.exists()
+
+    @property
+    def created(self) -> bool:
+        """True if the database did not exist when this handle was opened."""
+        return self._created
+
+    def record_write(self, key: str, size: int, *, fetched_bytes: int = 0, now: float | None = None) -> None:
+        """Insert or refresh an entry after its files were (re)written.
+
+        Access counts survive a rewrite so a refreshed popular entry stays hot.
+        """
+        now = time.time() if now is None else now
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT INTO entries (key, size, created, last_access, fetched_bytes) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET size = excluded.size, created = excluded.created, "
+                "last_access = excluded.last_access, fetched_bytes = CASE WHEN excluded.fetched_bytes > 0 "
+                "THEN excluded.fetched_bytes ELSE entries.fetched_bytes END",
+                (key, size, now, now, fetched_bytes),
+            )
+            connection.execute(_REPRIORITIZE + " WHERE key = ?", (key,))
+
+    def record_access(self, key: str, *, now: float | None = None) -> None:
+        """Mark an entry as read."""
+        now = time.time() if now is None else now
+        connection = self._connection()
+        with connection:
+            connection.execute("UPDATE entries SET last_access = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            connection.execute(_REPRIORITIZE + " WHERE key = ?", (key,))
+
+    def record_accesses(self, accesses: Iterable[tuple[str, int, float]]) -> None:
+        """Apply reads buffered in memory, as ``(key, hits, last_access)``, in one transaction."""
+        rows = list(accesses)
+        if not rows:
+            return
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "UPDATE entries SET last_access = MAX(last_access, ?), hits = hits + ? WHERE key = ?",
+                [(last_access, hits, key) for key, hits, last_access in rows],
+            )
+            connection.executemany(_REPRIORITIZE + " WHERE key = ?", [(key,) for key, _, _ in rows])
+
+    def record_parse_time(self, key: str, seconds: float) -> None:
+        """Record how long the entry's HTML took to parse, as part of its rebuild cost."""
+        connection = self._connection()
+        with connection:
+            connection.execute("UPDATE entries SET parse_seconds = ? WHERE key = ?", (seconds, key))
+            connection.execute(_REPRIORITIZE + " WHERE key = ?", (key,))
+
+    def record_size_change(self, key: str, delta: int) -> None:
+        """Adjust an entry's size when files are added next to it without a rewrite."""
+        connection = self._connection()
+        with connection:
+            connection.execute("UPDATE entries SET size = MAX(size + ?, 0) WHERE key = ?", (delta, key))
+            connection.execute(_REPRIORITIZE + " WHERE key = ?", (key,))
+
+    def remove(self, keys: Iterable[str]) -> None:
+        """Forget entries without affecting the eviction clock (e.g. on expiry)."""
+        self._executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+
+    def evict(self, keys: list[str]) -> None:
+        """Forget evicted entries and advance the GDSF clock past their priority."""
+        if not keys:
+            return
+        connection = self._connection()
+        placeholders = ", ".join("?" * len(keys))
+        with connection:
+            connection.execute(
+                f"UPDATE totals SET clock = MAX(clock, (SELECT COALESCE(MAX(priority), 0) FROM entries "
+                f"WHERE key IN ({placeholders}))) WHERE id = 0",
+                keys,
+            )
+            connection.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+
+    def get(self, key: str) -> IndexedEntry | None:
+        row = self._connection().execute(f"SELECT {_ENTRY_COLUMNS} FROM entries WHERE key = ?", (key,)).fetchone()
+        return IndexedEntry(*row) if row else None
+
+    def total_size(self) -> int:
+        """Return the total size of all indexed entries in bytes."""
+        return self._connection().execute("SELECT size FROM totals WHERE id = 0").fetchone()[0]
+
+    def clock(self) -> float:
+        return self._connection().execute("SELECT clock FROM totals WHERE id = 0").fetchone()[0]
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def eviction_candidates(self, limit: int, policy: str = "gdsf") -> list[IndexedEntry]:
+        """Return up to ``limit`` entries in the order ``policy`` would evict them."""
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy!r}")
+        order = "priority ASC, last_access ASC" if policy == "gdsf" else "last_access ASC"
+        rows = self._connection().execute(
+            f"SELECT {_ENTRY_COLUMNS} FROM entries ORDER BY {order} LIMIT ?", (limit,)
+        ).fetchall()
+        return [IndexedEntry(*row) for row in rows]
+
+    def written_before(self, cutoff: float) -> list[str]:
+        """Return keys of entries last written before ``cutoff``."""
+        rows = self._connection().execute("SELECT key FROM entries WHERE created < ?", (cutoff,)).fetchall()
+        return [row[0] for row in rows]
+
+    def reconcile(self, entries: Iterable[tuple[str, int, float]]) -> None:
+        """Replace the index contents with ``(key, size, mtime)`` tuples from a disk scan.
+
+        Access statistics of entries that are still present are preserved.
+        """
+        connection = self._connection()
+        with connection:
+            connection.execute("CREATE TEMP TABLE IF NOT EXISTS scanned (key TEXT PRIMARY KEY, size INTEGER, mtime REAL)")
+            connection.execute("DELETE FROM scanned")
+            connection.executemany("INSERT OR REPLACE INTO scanned VALUES (?, ?, ?)", entries)
+            connection.execute("DELETE FROM entries WHERE key NOT IN (SELECT key FROM scanned)")
+            connection.execute(
+                "INSERT INTO entries (key, size, created, last_access) "
+                "SELECT key, size, mtime, mtime FROM scanned WHERE true "
+                "ON CONFLICT (key) DO UPDATE SET size = excluded.size, created = excluded.created"
+            )
+            connection.execute(_REPRIORITIZE)
+            # Recompute the running total in case it drifted.
+            connection.execute("UPDATE totals SET size = (SELECT COALESCE(SUM(size), 0) FROM entries) WHERE id = 0")
+            connection.execute("DROP TABLE scanned")
+
+    def close(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _priority(self, clock: float, hits: int, size: int, fetched_bytes: int, parse_seconds: float) -> float:
+        cost = rebuild_cost(size, fetched_bytes, parse_seconds, self.bytes_per_s)
+        return gdsf_priority(clock, hits, cost, size)
+
+    def _executemany(self, sql: str, params: list[tuple]) -> None:
+        connection = self._connection()
+        with connection:
+            connection.executemany(sql, params)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.create_function("arxiv2md_priority", 5, self._priority, deterministic=True)
+            connection.executescript(_TABLES)
+            connection.executescript(_INDEXES)
+            self._local.connection = connection
+        return connection
@@ -0,0 +1,159 @@
+"""Periodic cache maintenance for long-running servers.
+
+:class:`CacheMaintenance` runs :func:`arxiv2md.cache.run_maintenance` on an
+interval in a worker thread so purge and eviction I/O never blocks the event
+loop. Every worker process may start one; the maintenance file lock makes
+sure only one of them does the work on each tick. Each run also writes the
+reads :func:`arxiv2md.cache.touch_entry` buffered in this process to the index.
+
+Code that writes to the cache calls :func:`request_eviction` afterwards
+instead of evicting inline: it wakes the running task early once the cache
+is over its high watermark.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from arxiv2md.cache import evict_if_needed, flush_accesses, over_high_watermark, run_maintenance
+from arxiv2md.config import ARXIV2MD_CACHE_MAINTENANCE_INTERVAL_S
+from arxiv2md.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# The running maintenance task of this process, if any.
+_active: CacheMaintenance | None = None
+# Eviction started by request_eviction when there is no maintenance task.
+_fallback: asyncio.Future | None = None
+# Held while an eviction started by request_eviction runs.
+_evicting = threading.Lock()
+
+
+class CacheMaintenance:
+    """Background task that keeps the cache within its TTL and size limits."""
+
+    def __init__(self, interval_s: float = ARXIV2MD_CACHE_MAINTENANCE_INTERVAL_S) -> None:
+        self.interval_s = interval_s
+        self._task: asyncio.Task | None = None
+        self._runs = 0
+        self._skipped = 0
+        self._purged = 0
+        self._evicted = 0
+        self._last_run: float | None = None
+        self._last_duration_s = 0.0
+        self._wakeup: asyncio.Event | None = None
+        self._event_loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the maintenance loop; the first run happens immediately."""
+        global _active
+        if not self.running:
+            self._wakeup = asyncio.Event()
+            self._event_loop = asyncio.get_running_loop()
+            self._task = self._event_loop.create_task(self._loop())
+        _active = self
+
+    def wake(self) -> None:
+        """Run the next maintenance pass now instead of at the end of the interval.
+
+        Safe to call from any thread.
+        """
+        if self._wakeup is not None:
+            self._event_loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def stop(self) -> None:
+        global _active
+        if _active is self:
+            _active = None
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # Keep the reads counted since the last run.
+        await asyncio.to_thread(flush_accesses)
+
+    async def run_once(self) -> None:
+        started = time.monotonic()
+        try:
+            result = await asyncio.to_thread(run_maintenance)
+        except Exception:
+            logger.exception("Cache maintenance failed")
+            return
+        if result is None:
+            # Another worker holds the maintenance lock.
+            self._skipped += 1
+            return
+        purged, evicted = result
+        self._runs += 1
+        self._purged += purged
+        self._evicted += evicted
+        self._last_run = time.time()
+        self._last_duration_s = time.monotonic() - started
+
+    def metrics(self) -> dict[str, float | int | None]:
+        return {
+            "interval_s": self.interval_s,
+            "runs": self._runs,
+            "skipped": self._skipped,
+            "purged": self._purged,
+            "evicted": self._evicted,
+            "last_run": self._last_run,
+            "last_duration_s": round(self._last_duration_s, 4),
+        }
+
+    async def _loop(self) -> None:
+        while True:
+            self._wakeup.clear()
+            await self.run_once()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval_s)
+            except asyncio.TimeoutError:
+                pass
+
+
+def request_eviction() -> None:
+    """Make room after a cache write without evicting on the request path.
+
+    With a running :class:`CacheMaintenance`, it is woken once the cache is
+    over its high watermark. Without one (library or CLI use), eviction runs
+    in a worker thread, or inline when called off the event loop; either
+    way, one at a time.
+    """
+    global _fallback
+    if _active is not None and _active.running:
+        if over_high_watermark():
+            _active.wake()
+        return
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # Already off the event loop (a worker thread or synchronous code).
+        _evict_once()
+        return
+    if _fallback is None or _fallback.done():
+        _fallback = asyncio.ensure_future(asyncio.to_thread(_evict_once))
+        _fallback.add_done_callback(_log_eviction_failure)
+
+
+def _evict_once() -> None:
+    # Skip if another write is already evicting; it frees room for this one too.
+    if _evicting.acquire(blocking=False):
+        try:
+            evict_if_needed()
+        finally:
+            _evicting.release()
+
+
+def _log_eviction_failure(task: asyncio.Future) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Cache eviction failed", extra={"error": str(task.exception())})
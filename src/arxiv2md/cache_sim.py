@@ -0,0 +1,167 @@
+"""Replay a cache access log against different eviction policies.
+
+Enable logging with ``ARXIV2MD_CACHE_ACCESS_LOG`` and then compare policies
+on real traffic, for example::
+
+    python -m arxiv2md.cache_sim access.jsonl --capacity-mb 200
+
+Each policy is simulated with the same capacity. The report gives the hit
+ratio, the byte hit ratio and the share of rebuild cost the cache saved.
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from arxiv2md.cache_index import gdsf_priority, rebuild_cost
+from arxiv2md.config import ARXIV2MD_CACHE_COST_BYTES_PER_S, ARXIV2MD_CACHE_MAX_SIZE_MB
+
+POLICIES = ("lru", "fifo", "lfu-da", "gdsf")
+
+
+@dataclass
+class Request:
+    """One access to a cache entry, with its size and rebuild cost at the time."""
+
+    key: str
+    size: int
+    cost: float
+
+
+@dataclass
+class SimulationResult:
+    policy: str
+    requests: int = 0
+    hits: int = 0
+    bytes_requested: int = 0
+    bytes_hit: int = 0
+    cost_requested: float = 0.0
+    cost_saved: float = 0.0
+
+    @property
+    def hit_ratio(self) -> float:
+        return self.hits / self.requests if self.requests else 0.0
+
+    @property
+    def byte_hit_ratio(self) -> float:
+        return self.bytes_hit / self.bytes_requested if self.bytes_requested else 0.0
+
+    @property
+    def cost_saved_ratio(self) -> float:
+        return self.cost_saved / self.cost_requested if self.cost_requested else 0.0
+
+
+def read_access_log(path: Path, *, bytes_per_s: float = ARXIV2MD_CACHE_COST_BYTES_PER_S) -> Iterator[Request]:
+    """Turn a JSON-lines access log into requests.
+
+    ``write`` and ``parse`` events update what an entry costs; every
+    ``access`` event becomes a request. Malformed lines are skipped.
+    """
+    sizes: dict[str, int] = {}
+    fetched: dict[str, int] = {}
+    parse_seconds: dict[str, float] = {}
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            try:
+                event = json.loads(line)
+                op, key = event["op"], event["key"]
+            except (ValueError, KeyError, TypeError):
+                continue
+            if op == "write":
+                sizes[key] = int(event.get("size", 0))
+                if event.get("fetched_bytes"):
+                    fetched[key] = int(event["fetched_bytes"])
+            elif op == "parse":
+                parse_seconds[key] = float(event.get("seconds", 0.0))
+            elif op == "access" and key in sizes:
+                size = sizes[key]
+                cost = rebuild_cost(size, fetched.get(key, 0), parse_seconds.get(key, 0.0), bytes_per_s)
+                yield Request(key=key, size=size, cost=cost)
+
+
+def simulate(requests: Iterable[Request], *, policy: str, capacity_bytes: int) -> SimulationResult:
+    """Replay ``requests`` through a cache of ``capacity_bytes`` using ``policy``."""
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown policy {policy!r}; choose from {', '.join(POLICIES)}")
+
+    result = SimulationResult(policy=policy)
+    resident: dict[str, tuple[int, float]] = {}  # key -> (size, priority)
+    frequency: dict[str, int] = {}
+    heap: list[tuple[float, int, str]] = []
+    used = 0
+    clock = 0.0
+
+    for tick, request in enumerate(requests):
+        result.requests += 1
+        result.bytes_requested += request.size
+        result.cost_requested += request.cost
+
+        hit = request.key in resident
+        if hit:
+            result.hits += 1
+            result.bytes_hit += request.size
+            result.cost_saved += request.cost
+            frequency[request.key] += 1
+            if policy == "fifo":
+                continue
+        else:
+            if request.size > capacity_bytes:
+                continue
+            while used + request.size > capacity_bytes:
+                # Entries whose priority changed since they were pushed are stale; skip them.
+                priority, _, victim = heapq.heappop(heap)
+                if resident.get(victim, (0, None))[1] != priority:
+                    continue
+                used -= resident.pop(victim)[0]
+                del frequency[victim]
+                clock = priority
+            frequency[request.key] = 1
+            used += request.size
+
+        priority = _priority(policy, tick, clock, frequency[request.key], request)
+        resident[request.key] = (request.size, priority)
+        heapq.heappush(heap, (priority, tick, request.key))
+
+    return result
+
+
+def _priority(policy: str, tick: int, clock: float, frequency: int, request: Request) -> float:
+    if policy in ("lru", "fifo"):
+        return float(tick)
+    if policy == "lfu-da":
+        return clock + frequency
+    return gdsf_priority(clock, frequency, request.cost, request.size)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Compare eviction policies on an access log."""
+    parser = argparse.ArgumentParser(prog="python -m arxiv2md.cache_sim", description=__doc__.split("\n\n")[0])
+    parser.add_argument("log", type=Path, help="Access log written via ARXIV2MD_CACHE_ACCESS_LOG.")
+    parser.add_argument("--capacity-mb", type=float, default=ARXIV2MD_CACHE_MAX_SIZE_MB, help="Simulated cache size.")
+    parser.add_argument("--policy", action="append", choices=POLICIES, help="Policy to simulate (repeatable).")
+    parser.add_argument(
+        "--bytes-per-s",
+        type=float,
+        default=ARXIV2MD_CACHE_COST_BYTES_PER_S,
+        help="Download throughput used to price fetched bytes.",
+    )
+    args = parser.parse_args(argv)
+
+    requests = list(read_access_log(args.log, bytes_per_s=args.bytes_per_s))
+    capacity_bytes = int(args.capacity_mb * 1024 * 1024)
+    print(f"{len(requests)} requests, capacity {args.capacity_mb:g}MB")
+    print(f"{'policy':<8} {'hit ratio':>10} {'byte hits':>10} {'cost saved':>11}")
+    for policy in args.policy or POLICIES:
+        result = simulate(requests, policy=policy, capacity_bytes=capacity_bytes)
+        print(
+            f"{policy:<8} {result.hit_ratio:>10.1%} {result.byte_hit_ratio:>10.1%} {result.cost_saved_ratio:>11.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Transparent compression for cached HTML (and files derived from it).
+
+Cached pages are stored as ``source.html.zst``, ``source.html.gz`` or plain
+``source.html`` blobs depending on ``ARXIV2MD_CACHE_COMPRESSION``. Readers accept
+any of the three so entries written under a previous setting stay usable
+until they are migrated with ``python -m arxiv2md.cache compress``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, BinaryIO
+
+from arxiv2md.config import ARXIV2MD_CACHE_COMPRESSION
+from arxiv2md.utils.logging_config import get_logger
+
+if TYPE_CHECKING:
+    from arxiv2md.cache_backend import BlobInfo, CacheBackend
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = get_logger(__name__)
+
+HTML_BASENAME = "source.html"
+_SUFFIXES = {"zstd": ".zst", "gzip": ".gz", "none": ""}
+_GZIP_LEVEL = 6
+_ZSTD_LEVEL = 3
+
+
+def active_codec() -> str:
+    """Return the codec used for new writes, falling back to gzip without zstandard."""
+    codec = ARXIV2MD_CACHE_COMPRESSION if ARXIV2MD_CACHE_COMPRESSION in _SUFFIXES else "gzip"
+    if codec == "zstd" and zstandard is None:
+        logger.warning("ARXIV2MD_CACHE_COMPRESSION=zstd but zstandard is not installed; using gzip")
+        return "gzip"
+    return codec
+
+
+def blob_name(basename: str, codec: str | None = None) -> str:
+    """Return the blob name ``basename`` is stored under with ``codec`` (default: active codec)."""
+    return basename + _SUFFIXES[codec or active_codec()]
+
+
+def blob_names(basename: str) -> list[str]:
+    """Return the blob names ``basename`` may be stored under, one per codec."""
+    return [basename + suffix for suffix in _SUFFIXES.values()]
+
+
+def find_blob(backend: CacheBackend, key: str, basename: str) -> tuple[str, BlobInfo] | None:
+    """Return the name and info of ``basename`` in entry ``key``, in whatever format it was stored."""
+    preferred = blob_name(basename)
+    info = backend.info(key, preferred)
+    if info is not None:
+        return preferred, info
+    for name in blob_names(basename):
+        if name != preferred and (info := backend.info(key, name)) is not None:
+            return name, info
+    return None
+
+
+def codec_of(name: str) -> str:
+    """Return the codec of a cached blob name, judging by its suffix."""
+    for codec, suffix in _SUFFIXES.items():
+        if suffix and name.endswith(suffix):
+            return codec
+    return "none"
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Cached data is zstd-compressed but zstandard is not installed (pip install zstandard)")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def compress(data: bytes, codec: str) -> bytes:
+    buffer = io.BytesIO()
+    with open_writer(buffer, codec) as writer:
+        writer.write(data)
+    return buffer.getvalue()
+
+
+@contextmanager
+def open_writer(handle: BinaryIO, codec: str) -> Iterator[BinaryIO]:
+    """Wrap ``handle`` so bytes written to it are compressed with ``codec``."""
+    if codec == "gzip":
+        with gzip.GzipFile(fileobj=handle, mode="wb", compresslevel=_GZIP_LEVEL, mtime=0) as writer:
+            yield writer
+    elif codec == "zstd":
+        with zstandard.ZstdCompressor(level=_ZSTD_LEVEL).stream_writer(handle, closefd=False) as writer:
+            yield writer
+    else:
+        yield handle
+
+
+def recompress(backend: CacheBackend, key: str, name: str, codec: str | None = None) -> str:
+    """Rewrite a cached blob with ``codec`` and remove the original.
+
+    Returns the new blob name (unchanged if it was already in the target format).
+    """
+    codec = codec or active_codec()
+    basename = name.removesuffix(_SUFFIXES[codec_of(name)])
+    target = blob_name(basename, codec)
+    if target == name:
+        return name
+    info = backend.info(key, name)
+    data = backend.read(key, name)
+    if info is None or data is None:
+        return name
+    # Keep the original mtime so TTL freshness is unaffected by migration.
+    backend.write(key, target, compress(decompress(data, codec_of(name)), codec), mtime=info.mtime)
+    backend.delete(key, [other for other in blob_names(basename) if other != target])
+    return target
@@ -7,18 +7,100 @@ from pathlib import Path
 
 
 DEFAULT_CACHE_DIR = ".arxiv2md_cache"
+DEFAULT_CACHE_BACKEND = "fs"
+DEFAULT_CACHE_REDIS_URL = "redis://localhost:6379/0"
+DEFAULT_CACHE_REDIS_PREFIX = "arxiv2md:"
 DEFAULT_CACHE_TTL_SECONDS = 24 * 60 * 60
 DEFAULT_CACHE_MAX_SIZE_MB = 500
+DEFAULT_CACHE_COMPRESSION = "gzip"
+DEFAULT_CACHE_EVICTION_POLICY = "gdsf"
+DEFAULT_MEMORY_CACHE_MB = 64
+DEFAULT_MEMORY_CACHE_REVALIDATE_S = 5.0
+DEFAULT_CACHE_MAINTENANCE_INTERVAL_S = 300.0
+DEFAULT_CACHE_HIGH_WATERMARK = 0.9
+DEFAULT_CACHE_LOW_WATERMARK = 0.75
+DEFAULT_CACHE_COST_BYTES_PER_S = 1_000_000.0
+DEFAULT_CACHE_STALE_WHILE_REVALIDATE_S = 24 * 60 * 60
+DEFAULT_CACHE_STALE_IF_ERROR_S = 7 * 24 * 60 * 60
+DEFAULT_NEGATIVE_CACHE_TTL_SECONDS = 6 * 60 * 60
 DEFAULT_FETCH_TIMEOUT_S = 10.0
 DEFAULT_FETCH_MAX_RETRIES = 2
 DEFAULT_FETCH_BACKOFF_S = 0.5
+DEFAULT_FETCH_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_FETCH_HEDGE_DELAY_S = 1.5
+DEFAULT_FETCH_RATE_PER_S = 4.0
+DEFAULT_FETCH_BURST = 8
+DEFAULT_FETCH_MAX_CONCURRENCY = 8
+DEFAULT_FETCH_MAX_RETRY_AFTER_S = 60.0
 DEFAULT_USER_AGENT = "arxiv2md/0.1 (+https://github.com/arxiv2md/arxiv2md)"
+DEFAULT_HTTP_MAX_CONNECTIONS = 20
+DEFAULT_HTTP_MAX_KEEPALIVE = 10
+DEFAULT_HTTP_KEEPALIVE_EXPIRY_S = 30.0
+DEFAULT_HTML_PARSER = "auto"
 
 # Local-only cache directory for stored digests and intermediate HTML.
 ARXIV2MD_CACHE_PATH = Path(os.getenv("ARXIV2MD_CACHE_PATH", DEFAULT_CACHE_DIR)).expanduser().resolve()
+# Where entries are stored: "fs" (directories under the cache path), "sqlite"
+# (one database file) or "redis" (a Redis-protocol server shared by several nodes).
+ARXIV2MD_CACHE_BACKEND = os.getenv("ARXIV2MD_CACHE_BACKEND", DEFAULT_CACHE_BACKEND).lower()
+# Database file for the sqlite backend (default: entries.sqlite3 in the cache path).
+_sqlite_path = os.getenv("ARXIV2MD_CACHE_SQLITE_PATH", "")
+ARXIV2MD_CACHE_SQLITE_PATH = Path(_sqlite_path).expanduser().resolve() if _sqlite_path else None
+ARXIV2MD_CACHE_REDIS_URL = os.getenv("ARXIV2MD_CACHE_REDIS_URL", DEFAULT_CACHE_REDIS_URL)
+ARXIV2MD_CACHE_REDIS_PREFIX = os.getenv("ARXIV2MD_CACHE_REDIS_PREFIX", DEFAULT_CACHE_REDIS_PREFIX)
 ARXIV2MD_CACHE_TTL_SECONDS = int(os.getenv("ARXIV2MD_CACHE_TTL_SECONDS", str(DEFAULT_CACHE_TTL_SECONDS)))
 ARXIV2MD_CACHE_MAX_SIZE_MB = int(os.getenv("ARXIV2MD_CACHE_MAX_SIZE_MB", str(DEFAULT_CACHE_MAX_SIZE_MB)))
+# Codec for cached HTML: "gzip", "zstd" (needs the zstandard package) or "none".
+ARXIV2MD_CACHE_COMPRESSION = os.getenv("ARXIV2MD_CACHE_COMPRESSION", DEFAULT_CACHE_COMPRESSION).lower()
+# Per-worker in-memory cache of served HTML, parsed documents and results (0 disables).
+ARXIV2MD_MEMORY_CACHE_MB = int(os.getenv("ARXIV2MD_MEMORY_CACHE_MB", str(DEFAULT_MEMORY_CACHE_MB)))
+# How long a page found in the cache is served from memory before the backend is checked again.
+ARXIV2MD_MEMORY_CACHE_REVALIDATE_S = float(
+    os.getenv("ARXIV2MD_MEMORY_CACHE_REVALIDATE_S", str(DEFAULT_MEMORY_CACHE_REVALIDATE_S))
+)
+# Cache rendered results per paper and option set (disable to always re-convert).
+ARXIV2MD_RESULT_CACHE = os.getenv("ARXIV2MD_RESULT_CACHE", "true").lower() == "true"
+# Eviction order: "gdsf" (frequency x rebuild cost / size, with aging) or "lru".
+ARXIV2MD_CACHE_EVICTION_POLICY = os.getenv("ARXIV2MD_CACHE_EVICTION_POLICY", DEFAULT_CACHE_EVICTION_POLICY).lower()
+# Background maintenance (server only): purge/evict every interval, once the
+# cache passes the high watermark, down to the low watermark (fractions of max size).
+ARXIV2MD_CACHE_MAINTENANCE_INTERVAL_S = float(
+    os.getenv("ARXIV2MD_CACHE_MAINTENANCE_INTERVAL_S", str(DEFAULT_CACHE_MAINTENANCE_INTERVAL_S))
+)
+ARXIV2MD_CACHE_HIGH_WATERMARK = float(os.getenv("ARXIV2MD_CACHE_HIGH_WATERMARK", str(DEFAULT_CACHE_HIGH_WATERMARK)))
+ARXIV2MD_CACHE_LOW_WATERMARK = float(os.getenv("ARXIV2MD_CACHE_LOW_WATERMARK", str(DEFAULT_CACHE_LOW_WATERMARK)))
+# Download throughput used to turn fetched bytes into seconds of rebuild cost.
+ARXIV2MD_CACHE_COST_BYTES_PER_S = float(
+    os.getenv("ARXIV2MD_CACHE_COST_BYTES_PER_S", str(DEFAULT_CACHE_COST_BYTES_PER_S))
+)
+# Optional JSON-lines log of cache accesses, for replay with python -m arxiv2md.cache_sim.
+_access_log = os.getenv("ARXIV2MD_CACHE_ACCESS_LOG", "")
+ARXIV2MD_CACHE_ACCESS_LOG = Path(_access_log).expanduser().resolve() if _access_log else None
+# Past the TTL, serve stale HTML while refreshing in the background, or when upstream fails.
+ARXIV2MD_CACHE_STALE_WHILE_REVALIDATE_S = int(
+    os.getenv("ARXIV2MD_CACHE_STALE_WHILE_REVALIDATE_S", str(DEFAULT_CACHE_STALE_WHILE_REVALIDATE_S))
+)
+ARXIV2MD_CACHE_STALE_IF_ERROR_S = int(os.getenv("ARXIV2MD_CACHE_STALE_IF_ERROR_S", str(DEFAULT_CACHE_STALE_IF_ERROR_S)))
+# How long a "no HTML rendition" (404) result is remembered per paper.
+ARXIV2MD_NEGATIVE_CACHE_TTL_SECONDS = int(
+    os.getenv("ARXIV2MD_NEGATIVE_CACHE_TTL_SECONDS", str(DEFAULT_NEGATIVE_CACHE_TTL_SECONDS))
+)
 ARXIV2MD_FETCH_TIMEOUT_S = float(os.getenv("ARXIV2MD_FETCH_TIMEOUT_S", str(DEFAULT_FETCH_TIMEOUT_S)))
 ARXIV2MD_FETCH_MAX_RETRIES = int(os.getenv("ARXIV2MD_FETCH_MAX_RETRIES", str(DEFAULT_FETCH_MAX_RETRIES)))
 ARXIV2MD_FETCH_BACKOFF_S = float(os.getenv("ARXIV2MD_FETCH_BACKOFF_S", str(DEFAULT_FETCH_BACKOFF_S)))
+ARXIV2MD_FETCH_MAX_BYTES = int(os.getenv("ARXIV2MD_FETCH_MAX_BYTES", str(DEFAULT_FETCH_MAX_BYTES)))
+# Opt-in: race ar5iv against a slow or missing arxiv.org response after the hedge delay.
+ARXIV2MD_FETCH_HEDGE = os.getenv("ARXIV2MD_FETCH_HEDGE", "false").lower() == "true"
+ARXIV2MD_FETCH_HEDGE_DELAY_S = float(os.getenv("ARXIV2MD_FETCH_HEDGE_DELAY_S", str(DEFAULT_FETCH_HEDGE_DELAY_S)))
+# Outbound pacing per upstream host (token bucket) and overall concurrency cap.
+ARXIV2MD_FETCH_RATE_PER_S = float(os.getenv("ARXIV2MD_FETCH_RATE_PER_S", str(DEFAULT_FETCH_RATE_PER_S)))
+ARXIV2MD_FETCH_BURST = int(os.getenv("ARXIV2MD_FETCH_BURST", str(DEFAULT_FETCH_BURST)))
+ARXIV2MD_FETCH_MAX_CONCURRENCY = int(os.getenv("ARXIV2MD_FETCH_MAX_CONCURRENCY", str(DEFAULT_FETCH_MAX_CONCURRENCY)))
+ARXIV2MD_FETCH_MAX_RETRY_AFTER_S = float(os.getenv("ARXIV2MD_FETCH_MAX_RETRY_AFTER_S", str(DEFAULT_FETCH_MAX_RETRY_AFTER_S)))
 ARXIV2MD_USER_AGENT = os.getenv("ARXIV2MD_USER_AGENT", DEFAULT_USER_AGENT)
+ARXIV2MD_HTTP_MAX_CONNECTIONS = int(os.getenv("ARXIV2MD_HTTP_MAX_CONNECTIONS", str(DEFAULT_HTTP_MAX_CONNECTIONS)))
+ARXIV2MD_HTTP_MAX_KEEPALIVE = int(os.getenv("ARXIV2MD_HTTP_MAX_KEEPALIVE", str(DEFAULT_HTTP_MAX_KEEPALIVE)))
+ARXIV2MD_HTTP_KEEPALIVE_EXPIRY_S = float(os.getenv("ARXIV2MD_HTTP_KEEPALIVE_EXPIRY_S", str(DEFAULT_HTTP_KEEPALIVE_EXPIRY_S)))
+ARXIV2MD_HTTP2 = os.getenv("ARXIV2MD_HTTP2", "false").lower() == "true"
+# BeautifulSoup tree builder: "lxml", "html5lib", "html.parser" or "auto" (html.parser).
+ARXIV2MD_HTML_PARSER = os.getenv("ARXIV2MD_HTML_PARSER", DEFAULT_HTML_PARSER).lower()
@@ -3,22 +3,206 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import datetime, timezone
+import json
+import os
+import tempfile
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
+from typing import TypeVar
 
 import httpx
 
-from arxiv2md.cache import evict_if_needed
+from arxiv2md.cache import fetch_lock, get_backend, record_entry, touch_entry
+from arxiv2md.cache_backend import BlobInfo
+from arxiv2md.cache_maintenance import request_eviction
+from arxiv2md.compression import (
+    HTML_BASENAME,
+    active_codec,
+    blob_name,
+    blob_names,
+    codec_of,
+    decompress,
+    find_blob,
+    open_writer,
+)
 from arxiv2md.config import (
-    ARXIV2MD_CACHE_PATH,
+    ARXIV2MD_CACHE_STALE_IF_ERROR_S,
+    ARXIV2MD_CACHE_STALE_WHILE_REVALIDATE_S,
     ARXIV2MD_CACHE_TTL_SECONDS,
     ARXIV2MD_FETCH_BACKOFF_S,
+    ARXIV2MD_FETCH_HEDGE,
+    ARXIV2MD_FETCH_HEDGE_DELAY_S,
+    ARXIV2MD_FETCH_MAX_BYTES,
     ARXIV2MD_FETCH_MAX_RETRIES,
     ARXIV2MD_FETCH_TIMEOUT_S,
+    ARXIV2MD_HTTP2,
+    ARXIV2MD_HTTP_KEEPALIVE_EXPIRY_S,
+    ARXIV2MD_HTTP_MAX_CONNECTIONS,
+    ARXIV2MD_HTTP_MAX_KEEPALIVE,
+    ARXIV2MD_MEMORY_CACHE_REVALIDATE_S,
+    ARXIV2MD_NEGATIVE_CACHE_TTL_SECONDS,
     ARXIV2MD_USER_AGENT,
 )
+from arxiv2md.memory_cache import memory_cache
+from arxiv2md.outbound import scheduler as outbound_scheduler
+from arxiv2md.result_cache import clear_derived
+from arxiv2md.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_T = TypeVar("_T")
+
+
+class HtmlNotAvailableError(RuntimeError):
+    """Raised when arXiv (and ar5iv) have no HTML rendition of a paper."""
+
+    def __init__(self) -> None:
+        super().__init__(
+            "This paper does not have an HTML version available on arXiv. "
+            "arxiv2md requires papers to be available in HTML format. "
+            "Older papers may only be available as PDF."
+        )
+
 
 _RETRY_STATUS = {429, 500, 502, 503, 504}
+_SOURCE_URL = "source_url.txt"
+_VALIDATORS = "validators.json"
+_NEGATIVE = "no_html.json"
+# Pieces a cached page is yielded in by stream_arxiv_html, and how many
+# downloaded chunks may wait for a slow consumer before it is switched over
+# to reading the rest from the cache.
+_STREAM_CHUNK_BYTES = 64 * 1024
+_STREAM_QUEUE_CHUNKS = 16
+
+# Receives each body chunk with the URL it came from, as it arrives.
+ChunkSink = Callable[[str, bytes], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class CachedHtml:
+    """A page in the cache: its entry key, the blob holding it and when it was written.
+
+    ``mtime_ns`` changes whenever the page is rewritten, so it doubles as a
+    version for anything derived from the page.
+    """
+
+    key: str
+    name: str
+    mtime_ns: int
+
+    @classmethod
+    def from_blob(cls, key: str, name: str, info: BlobInfo) -> CachedHtml:
+        return cls(key=key, name=name, mtime_ns=info.mtime_ns)
+
+    def read(self) -> bytes:
+        """Return the decompressed page bytes."""
+        data = get_backend().read(self.key, self.name)
+        if data is None:
+            raise FileNotFoundError(f"Cached HTML {self.key}/{self.name} was removed")
+        return decompress(data, codec_of(self.name))
+
+
+@dataclass
+class _FetchResponse:
+    """The parts of an upstream response the cache keeps.
+
+    ``path`` is the temporary file the body was streamed into; it is None for
+    a 304 Not Modified. ``size`` is the number of body bytes received.
+    """
+
+    path: Path | None
+    codec: str = "none"
+    size: int = 0
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.path is None
+
+    @classmethod
+    def from_httpx(
+        cls, response: httpx.Response, path: Path | None, codec: str = "none", size: int = 0
+    ) -> _FetchResponse:
+        return cls(
+            path=path,
+            codec=codec,
+            size=size,
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+        )
+
+
+# In-flight downloads keyed by cache entry name (one per arxiv_id/version).
+_inflight: dict[str, asyncio.Task] = {}
+
+# Stale-while-revalidate refreshes, referenced until done so they are not collected.
+_background_refreshes: set[asyncio.Future] = set()
+
+# Process-wide pooled client, bound to the event loop it was created on.
+_http_client: httpx.AsyncClient | None = None
+_http_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+async def open_http_client() -> httpx.AsyncClient:
+    """Create the shared HTTP client for the running event loop (idempotent)."""
+    return get_http_client()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared pooled HTTP client, creating it if needed.
+
+    The client is tied to the event loop that created it. If called from a
+    different loop (e.g. successive ``asyncio.run`` calls), a fresh client is
+    built since pooled connections cannot be shared across loops.
+    """
+    global _http_client, _http_client_loop
+
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_client_loop is not loop:
+        _http_client = _build_http_client()
+        _http_client_loop = loop
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client, releasing pooled connections."""
+    global _http_client, _http_client_loop
+
+    for refresh in list(_background_refreshes):
+        refresh.cancel()
+    client, _http_client, _http_client_loop = _http_client, None, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=ARXIV2MD_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=ARXIV2MD_HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=ARXIV2MD_HTTP_KEEPALIVE_EXPIRY_S,
+    )
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(ARXIV2MD_FETCH_TIMEOUT_S),
+        headers={"User-Agent": ARXIV2MD_USER_AGENT},
+        follow_redirects=True,
+        limits=limits,
+        http2=_http2_available(),
+    )
+
+
+def _http2_available() -> bool:
+    if not ARXIV2MD_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("ARXIV2MD_HTTP2 is enabled but the h2 package is missing (pip install 'httpx[http2]')")
+        return False
+    return True
 
 
 async def fetch_arxiv_html(
@@ -31,38 +215,324 @@ async def fetch_arxiv_html(
 ) -> tuple[str, str]:
     """Fetch arXiv HTML and cache it locally.
 
-    Tries html_url first (arxiv.org), then falls back to ar5iv_url if 404.
+    Convenience wrapper around :func:`fetch_arxiv_html_entry` that reads (and
+    decompresses) the cached page back as text. Recently served pages are
+    kept decoded in the in-process memory cache.
 
     Returns:
         A tuple of (html_text, source_url) where source_url is the URL that
         was actually used to fetch the HTML.
     """
-    cache_dir = _cache_dir_for(arxiv_id, version)
-    html_path = cache_dir / "source.html"
-    source_url_path = cache_dir / "source_url.txt"
 
-    if use_cache and _is_cache_fresh(html_path):
-        cached_source_url = source_url_path.read_text(encoding="utf-8").strip() if source_url_path.exists() else html_url
-        return html_path.read_text(encoding="utf-8"), cached_source_url
+    def read_text(page: CachedHtml, source_url: str) -> tuple[str, str]:
+        key = ("html", page.key, page.name, page.mtime_ns)
+        text = memory_cache.get(key)
+        if text is None:
+            data = page.read()
+            text = data.decode("utf-8")
+            memory_cache.put(key, text, len(data))
+        return text, source_url
+
+    return await with_arxiv_html_entry(
+        html_url, read_text, arxiv_id=arxiv_id, version=version, use_cache=use_cache, ar5iv_url=ar5iv_url
+    )
+
+
+async def with_arxiv_html_entry(
+    html_url: str,
+    use: Callable[[CachedHtml, str], _T],
+    *,
+    arxiv_id: str,
+    version: str | None,
+    use_cache: bool = True,
+    ar5iv_url: str | None = None,
+) -> _T:
+    """Fetch a page with :func:`fetch_arxiv_html_entry` and pass it to ``use``.
+
+    ``use(page, source_url)`` runs in a worker thread, as reading the page
+    blocks on the backend. A page served from memory may have been evicted
+    by another worker since it was last checked; if reading it raises
+    :class:`FileNotFoundError`, the memory record is dropped and the page is
+    looked up (and fetched if need be) once more.
+    """
+    page, source_url = await fetch_arxiv_html_entry(
+        html_url, arxiv_id=arxiv_id, version=version, use_cache=use_cache, ar5iv_url=ar5iv_url
+    )
+    try:
+        return await asyncio.to_thread(use, page, source_url)
+    except FileNotFoundError:
+        memory_cache.discard(("validated", page.key))
+        logger.info("Cached HTML was removed while in use; fetching it again", extra={"cache_key": page.key})
+    page, source_url = await fetch_arxiv_html_entry(
+        html_url, arxiv_id=arxiv_id, version=version, use_cache=use_cache, ar5iv_url=ar5iv_url
+    )
+    return await asyncio.to_thread(use, page, source_url)
+
+
+async def fetch_arxiv_html_entry(
+    html_url: str,
+    *,
+    arxiv_id: str,
+    version: str | None,
+    use_cache: bool = True,
+    ar5iv_url: str | None = None,
+) -> tuple[CachedHtml, str]:
+    """Fetch arXiv HTML into the cache and return where it is stored.
+
+    The response body is streamed to a spool file (bounded by
+    ``ARXIV2MD_FETCH_MAX_BYTES``), compressed according to
+    ``ARXIV2MD_CACHE_COMPRESSION``, and then handed to the cache backend; use
+    :meth:`CachedHtml.read` to get the page bytes back.
+
+    Tries html_url first (arxiv.org), then falls back to ar5iv_url if 404.
+    Concurrent calls for the same paper share a single upstream download,
+    both within this process and across worker processes.
+
+    Expired entries are served immediately within the stale-while-revalidate
+    window while a background task refreshes them, and are used as a fallback
+    within the stale-if-error window when the upstream fetch fails.
+
+    Backend reads and writes run in worker threads, since a remote backend
+    blocks on the network. A page found fresh in the backend is served from
+    memory for ``ARXIV2MD_MEMORY_CACHE_REVALIDATE_S`` without checking the
+    backend again.
+
+    Returns:
+        A tuple of (page, source_url) where source_url is the URL that was
+        actually used to fetch the HTML.
+    """
+    key = _cache_key_for(arxiv_id, version)
+    if use_cache and (validated := _validated_in_memory(key)) is not None:
+        touch_entry(key)
+        return validated
+
+    found = await asyncio.to_thread(_find_html, key) if use_cache else None
+    page = CachedHtml.from_blob(key, *found) if found else None
+    age = time.time() - found[1].mtime if found else None
+
+    if use_cache and age is None and await asyncio.to_thread(_known_missing, key, html_url, ar5iv_url):
+        raise HtmlNotAvailableError()
+
+    def download() -> Awaitable[str]:
+        return _fetch_and_store(html_url, key=key, use_cache=use_cache, ar5iv_url=ar5iv_url)
+
+    if page is not None:
+        if _is_age_fresh(age):
+            touch_entry(key)
+            source_url = await asyncio.to_thread(_cached_source_url, key, html_url, version=page.mtime_ns)
+            _remember_validated(page, source_url)
+            return page, source_url
+        if age <= ARXIV2MD_CACHE_TTL_SECONDS + ARXIV2MD_CACHE_STALE_WHILE_REVALIDATE_S:
+            touch_entry(key)
+            _refresh_in_background(key, download)
+            return page, await asyncio.to_thread(_cached_source_url, key, html_url, version=page.mtime_ns)
+
+    try:
+        source_url = await _single_flight(key, download)
+        found = await asyncio.to_thread(_find_html, key)
+        if found is None:
+            raise RuntimeError(f"Cached HTML for {key} disappeared after download")
+        touch_entry(key)
+        page = CachedHtml.from_blob(key, *found)
+        _remember_validated(page, source_url)
+        return page, source_url
+    except Exception as exc:
+        if page is None or age > ARXIV2MD_CACHE_TTL_SECONDS + ARXIV2MD_CACHE_STALE_IF_ERROR_S:
+            raise
+        logger.warning(
+            "Upstream fetch failed; serving stale cached HTML",
+            extra={"cache_key": key, "age_seconds": int(age), "error": str(exc)},
+        )
+        touch_entry(key)
+        return page, await asyncio.to_thread(_cached_source_url, key, html_url)
+
+
+async def stream_arxiv_html(
+    html_url: str,
+    *,
+    arxiv_id: str,
+    version: str | None,
+    ar5iv_url: str | None = None,
+) -> AsyncIterator[tuple[str, bytes]]:
+    """Yield the page as ``(source_url, chunk)`` pairs while it downloads.
+
+    On a cache miss the download is started with a sink that forwards each
+    body chunk as it arrives, so callers can work on the page while the rest
+    is in flight; the page is cached exactly as by
+    :func:`fetch_arxiv_html_entry`. The download never waits for the
+    consumer, since it holds an outbound slot and the fetch lock: once
+    ``_STREAM_QUEUE_CHUNKS`` chunks are waiting, forwarding stops and the
+    consumer gets the rest of the page from the cache when it is stored.
+
+    Cached pages, and downloads another caller already started, are read
+    back from the cache once ready. Streamed downloads are not hedged, and
+    a transfer that fails after its first chunk is not retried, since the
+    chunks already yielded cannot be taken back.
+    """
+    key = _cache_key_for(arxiv_id, version)
+    # Bytes of the page already yielded from the download.
+    offset = 0
+    if key not in _inflight and await asyncio.to_thread(_find_html, key) is None:
+        if await asyncio.to_thread(_known_missing, key, html_url, ar5iv_url):
+            raise HtmlNotAvailableError()
+
+        queue: asyncio.Queue[tuple[str, bytes]] = asyncio.Queue(maxsize=_STREAM_QUEUE_CHUNKS)
+        listening = True
+        fell_behind = False
+
+        async def forward(url: str, chunk: bytes) -> None:
+            nonlocal listening, fell_behind
+            if not listening:
+                return
+            if queue.full():
+                fell_behind, listening = True, False
+                return
+            queue.put_nowait((url, chunk))
+
+        def download() -> Awaitable[str]:
+            return _fetch_and_store(html_url, key=key, use_cache=True, ar5iv_url=ar5iv_url, on_chunk=forward)
+
+        done = asyncio.ensure_future(_single_flight(key, download))
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait({getter, done}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    break
+                url, chunk = getter.result()
+                offset += len(chunk)
+                yield url, chunk
+            while not queue.empty():
+                url, chunk = queue.get_nowait()
+                offset += len(chunk)
+                yield url, chunk
+            await done
+        finally:
+            # Stop queueing if the consumer stopped early; the download still fills the cache.
+            listening = False
+            while not queue.empty():
+                queue.get_nowait()
+            # Stop waiting on it too (the shielded download carries on), and
+            # retrieve any failure nobody is left to await.
+            if not done.done():
+                done.cancel()
+            elif not done.cancelled():
+                done.exception()
+        if offset and not fell_behind:
+            return
+
+    data, source_url = await with_arxiv_html_entry(
+        html_url, lambda page, url: (page.read(), url), arxiv_id=arxiv_id, version=version, ar5iv_url=ar5iv_url
+    )
+    for start in range(offset, len(data), _STREAM_CHUNK_BYTES):
+        yield source_url, data[start : start + _STREAM_CHUNK_BYTES]
+
+
+def _refresh_in_background(key: str, factory: Callable[[], Awaitable[str]]) -> None:
+    """Start a refresh for ``key`` unless one is already in flight."""
+    task = _inflight.get(key)
+    if task is not None and task.get_loop() is asyncio.get_running_loop():
+        return
+    refresh = asyncio.ensure_future(_single_flight(key, factory))
+    _background_refreshes.add(refresh)
+    refresh.add_done_callback(partial(_on_refresh_done, key))
+
+
+def _on_refresh_done(key: str, task: asyncio.Future) -> None:
+    _background_refreshes.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Background cache refresh failed", extra={"cache_key": key, "error": str(task.exception())})
+
+
+async def _single_flight(key: str, factory: Callable[[], Awaitable[_T]]) -> _T:
+    """Run ``factory`` once per key; concurrent callers await the same task."""
+    loop = asyncio.get_running_loop()
+    task = _inflight.get(key)
+    if task is None or task.get_loop() is not loop:
+        task = loop.create_task(factory())
+        _inflight[key] = task
+        task.add_done_callback(partial(_forget_inflight, key))
+    # Shield so one cancelled waiter does not abort the download for the rest.
+    return await asyncio.shield(task)
+
+
+def _forget_inflight(key: str, task: asyncio.Task) -> None:
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if not task.cancelled():
+        task.exception()  # Mark as retrieved even if every waiter went away.
+
+
+async def _fetch_and_store(
+    html_url: str,
+    *,
+    key: str,
+    use_cache: bool,
+    ar5iv_url: str | None,
+    on_chunk: ChunkSink | None = None,
+) -> str:
+    # Locks are per node; with a shared backend, two nodes may still fetch
+    # the same paper at once, and the later write simply wins.
+    lock = fetch_lock(key)
+    acquired = await lock.acquire_async(timeout=_fetch_lock_timeout())
+    if not acquired:
+        logger.warning("Timed out waiting for fetch lock; fetching without it", extra={"cache_key": key})
+    try:
+        # Another worker may have filled the cache while we waited for the lock.
+        if use_cache and acquired and await asyncio.to_thread(_is_cache_fresh, key):
+            return await asyncio.to_thread(_cached_source_url, key, html_url)
+        return await _download(html_url, key=key, use_cache=use_cache, ar5iv_url=ar5iv_url, on_chunk=on_chunk)
+    finally:
+        lock.release()
+
+
+async def _download(
+    html_url: str,
+    *,
+    key: str,
+    ar5iv_url: str | None,
+    use_cache: bool = True,
+    on_chunk: ChunkSink | None = None,
+) -> str:
+    """Download into entry ``key`` and return the URL the HTML came from.
+
+    With ``use_cache`` False the cached copy is neither revalidated nor
+    consulted for known-missing URLs, so the page is always downloaded again.
+
+    ``on_chunk`` receives the body as it is downloaded (see
+    :func:`stream_arxiv_html`); hedging is skipped when it is given, as two
+    racing bodies cannot both be streamed.
+    """
+    if use_cache:
+        revalidated = await _revalidate(key)
+        if revalidated is not None:
+            return revalidated
+
+    missing = await asyncio.to_thread(_read_negative, key) if use_cache else set()
+    spool = get_backend().spool_dir(key)
 
-    # Try primary URL (arxiv.org) first
+    if ARXIV2MD_FETCH_HEDGE and on_chunk is None and ar5iv_url and not missing & {html_url, ar5iv_url}:
+        return await _download_hedged(html_url, key=key, ar5iv_url=ar5iv_url)
+
+    # Try primary URL (arxiv.org) first, unless it is known to have no HTML
     try:
-        html_text = await _fetch_with_retries(html_url)
-        evict_if_needed()
-        cache_dir.mkdir(parents=True, exist_ok=True)
-        html_path.write_text(html_text, encoding="utf-8")
-        source_url_path.write_text(html_url, encoding="utf-8")
-        return html_text, html_url
+        if html_url in missing:
+            raise HtmlNotAvailableError()
+        response = await _fetch_with_retries(html_url, dest_dir=spool, on_chunk=on_chunk)
+        await asyncio.to_thread(_store_html, key, response, html_url)
+        return html_url
     except RuntimeError as primary_error:
+        if isinstance(primary_error, HtmlNotAvailableError) and html_url not in missing:
+            await asyncio.to_thread(_record_negative, key, html_url)
         # If we got 404 and have ar5iv fallback, try it
-        if ar5iv_url and "does not have an HTML version" in str(primary_error):
+        if ar5iv_url and ar5iv_url not in missing and isinstance(primary_error, HtmlNotAvailableError):
             try:
-                html_text = await _fetch_with_retries(ar5iv_url)
-                evict_if_needed()
-                cache_dir.mkdir(parents=True, exist_ok=True)
-                html_path.write_text(html_text, encoding="utf-8")
-                source_url_path.write_text(ar5iv_url, encoding="utf-8")
-                return html_text, ar5iv_url
+                response = await _fetch_with_retries(ar5iv_url, dest_dir=spool, on_chunk=on_chunk)
+                await asyncio.to_thread(_store_html, key, response, ar5iv_url)
+                return ar5iv_url
+            except HtmlNotAvailableError:
+                await asyncio.to_thread(_record_negative, key, ar5iv_url)
             except Exception:
                 # If ar5iv also fails, raise the original error
                 pass
@@ -70,34 +540,250 @@ async def fetch_arxiv_html(
         raise primary_error
 
 
-async def _fetch_with_retries(url: str) -> str:
-    timeout = httpx.Timeout(ARXIV2MD_FETCH_TIMEOUT_S)
-    headers = {"User-Agent": ARXIV2MD_USER_AGENT}
+async def _download_hedged(html_url: str, *, key: str, ar5iv_url: str) -> str:
+    """Race arxiv.org against ar5iv once the primary is slow or missing.
+
+    The ar5iv request starts when arxiv.org has not answered within the hedge
+    delay, or as soon as it fails. The first valid HTML wins and the other
+    request is cancelled; if both fail, the primary error is raised.
+    """
+    spool = get_backend().spool_dir(key)
+    primary = asyncio.ensure_future(_fetch_with_retries(html_url, dest_dir=spool))
+    tasks = {primary: html_url}
+    try:
+        await asyncio.wait({primary}, timeout=ARXIV2MD_FETCH_HEDGE_DELAY_S)
+        if primary.done() and primary.exception() is None:
+            return await _store_winner(key, primary.result(), html_url)
+
+        tasks[asyncio.ensure_future(_fetch_with_retries(ar5iv_url, dest_dir=spool))] = ar5iv_url
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # Iterate in insertion order so arxiv.org wins a tie.
+            for task, url in tasks.items():
+                if task not in done:
+                    continue
+                if task.exception() is None:
+                    return await _store_winner(key, task.result(), url)
+                if isinstance(task.exception(), HtmlNotAvailableError):
+                    await asyncio.to_thread(_record_negative, key, url)
+        raise primary.exception()
+    finally:
+        for task in tasks:
+            if task.cancel():
+                continue
+            # A finished loser still owns a streamed temp file.
+            if not task.cancelled() and task.exception() is None and task.result().path.exists():
+                task.result().path.unlink(missing_ok=True)
+
+
+async def _store_winner(key: str, response: _FetchResponse, source_url: str) -> str:
+    await asyncio.to_thread(_store_html, key, response, source_url)
+    return source_url
+
+
+async def _revalidate(key: str) -> str | None:
+    """Conditionally re-fetch a stale entry from the URL it was cached from.
+
+    Returns None when there is nothing to revalidate or the page has gone
+    away upstream, in which case the caller falls back to a full fetch.
+    """
+    found, stored_url, validators = await asyncio.to_thread(_revalidation_state, key)
+    if not validators or found is None or stored_url is None:
+        return None
+
+    source_url = stored_url.decode("utf-8").strip()
+    try:
+        response = await _fetch_with_retries(source_url, dest_dir=get_backend().spool_dir(key), validators=validators)
+    except HtmlNotAvailableError:
+        return None
+
+    if response.not_modified:
+        # Unchanged upstream: refreshing the mtime restarts the TTL window.
+        await asyncio.to_thread(_restart_ttl, key, found[0])
+        return source_url
+
+    await asyncio.to_thread(_store_html, key, response, source_url)
+    return source_url
+
+
+def _validated_in_memory(key: str) -> tuple[CachedHtml, str] | None:
+    """Return the page and source URL last found fresh in the backend, if that was recent enough."""
+    validated = memory_cache.get(("validated", key))
+    if validated is None:
+        return None
+    page, source_url, checked_at = validated
+    if time.monotonic() - checked_at > ARXIV2MD_MEMORY_CACHE_REVALIDATE_S:
+        return None
+    if not _is_age_fresh(time.time() - page.mtime_ns / 1e9):
+        return None
+    return page, source_url
+
+
+def _remember_validated(page: CachedHtml, source_url: str) -> None:
+    if ARXIV2MD_MEMORY_CACHE_REVALIDATE_S > 0:
+        memory_cache.put(("validated", page.key), (page, source_url, time.monotonic()), len(source_url))
+
+
+def _revalidation_state(key: str) -> tuple[tuple[str, BlobInfo] | None, bytes | None, dict[str, str]]:
+    """Return the cached HTML, its stored source URL and its validators."""
+    return _find_html(key), get_backend().read(key, _SOURCE_URL), _read_validators(key)
+
+
+def _restart_ttl(key: str, name: str) -> None:
+    get_backend().touch(key, name)
+    record_entry(key)
+
+
+def _cached_source_url(key: str, default_source_url: str, *, version: int | None = None) -> str:
+    """Return the URL an entry was fetched from.
+
+    With ``version`` (the HTML blob's mtime) the answer is memoised in memory,
+    since the URL only changes when the HTML is rewritten.
+    """
+    memory_key = ("source_url", key, version)
+    if version is not None and (source_url := memory_cache.get(memory_key)) is not None:
+        return source_url
+    stored = get_backend().read(key, _SOURCE_URL)
+    if stored is None:
+        return default_source_url
+    source_url = stored.decode("utf-8").strip()
+    if version is not None:
+        memory_cache.put(memory_key, source_url, len(source_url))
+    return source_url
+
+
+def _store_html(key: str, response: _FetchResponse, source_url: str) -> None:
+    backend = get_backend()
+    # Write the URL first and store the streamed body last, atomically, so
+    # readers in other workers never observe a partially written page.
+    backend.write(key, _SOURCE_URL, source_url.encode("utf-8"))
+    _write_validators(key, response)
+    backend.delete(key, [_NEGATIVE])
+    # Anything rendered from the previous HTML is now out of date.
+    clear_derived(key)
+    name = blob_name(HTML_BASENAME, response.codec)
+    backend.write_file(key, name, response.path)
+    # Drop any copy left over in a different format (e.g. after a codec change).
+    backend.delete(key, [other for other in blob_names(HTML_BASENAME) if other != name])
+    record_entry(key, fetched_bytes=response.size)
+    request_eviction()
+
+
+def _read_validators(key: str) -> dict[str, str]:
+    """Return the conditional request headers for a cached entry."""
+    try:
+        stored = json.loads(get_backend().read(key, _VALIDATORS) or b"{}")
+    except ValueError:
+        return {}
+    headers: dict[str, str] = {}
+    if stored.get("etag"):
+        headers["If-None-Match"] = stored["etag"]
+    if stored.get("last_modified"):
+        headers["If-Modified-Since"] = stored["last_modified"]
+    return headers
+
+
+def _write_validators(key: str, response: _FetchResponse) -> None:
+    if not response.etag and not response.last_modified:
+        get_backend().delete(key, [_VALIDATORS])
+        return
+    validators = {"etag": response.etag, "last_modified": response.last_modified}
+    get_backend().write(key, _VALIDATORS, json.dumps(validators).encode("utf-8"))
+
+
+def _known_missing(key: str, html_url: str, ar5iv_url: str | None) -> bool:
+    """Return True if every candidate URL recently answered 404."""
+    missing = _read_negative(key)
+    return html_url in missing and (ar5iv_url is None or ar5iv_url in missing)
+
+
+def _read_negative(key: str) -> set[str]:
+    """Return URLs recorded as having no HTML, if the record is still fresh."""
+    backend = get_backend()
+    info = backend.info(key, _NEGATIVE)
+    if info is None or time.time() - info.mtime > ARXIV2MD_NEGATIVE_CACHE_TTL_SECONDS:
+        return set()
+    try:
+        return set(json.loads(backend.read(key, _NEGATIVE) or b"{}").get("missing", []))
+    except ValueError:
+        return set()
+
+
+def _record_negative(key: str, url: str) -> None:
+    if ARXIV2MD_NEGATIVE_CACHE_TTL_SECONDS <= 0:
+        return
+    missing = _read_negative(key) | {url}
+    get_backend().write(key, _NEGATIVE, json.dumps({"missing": sorted(missing)}).encode("utf-8"))
+    record_entry(key)
+
+
+def _fetch_lock_timeout() -> float:
+    # Long enough for the lock holder to exhaust its retries on both hosts.
+    attempts = ARXIV2MD_FETCH_MAX_RETRIES + 1
+    backoff = sum(ARXIV2MD_FETCH_BACKOFF_S * (2**attempt) for attempt in range(ARXIV2MD_FETCH_MAX_RETRIES))
+    return 2 * (attempts * ARXIV2MD_FETCH_TIMEOUT_S + backoff)
+
+
+async def _fetch_with_retries(
+    url: str,
+    *,
+    dest_dir: Path,
+    validators: dict[str, str] | None = None,
+    on_chunk: ChunkSink | None = None,
+) -> _FetchResponse:
+    """GET ``url`` with retries, streaming a successful body into ``dest_dir``.
+
+    Each body chunk is also passed to ``on_chunk``; once one has been, a
+    failure is raised instead of retried.
+    """
+    client = get_http_client()
     last_exc: Exception | None = None
+    delivered = False
+
+    async def forward(chunk: bytes) -> None:
+        nonlocal delivered
+        delivered = True
+        await on_chunk(url, chunk)
 
     for attempt in range(ARXIV2MD_FETCH_MAX_RETRIES + 1):
+        throttled = False
         try:
-            async with httpx.AsyncClient(timeout=timeout, headers=headers, follow_redirects=True) as client:
-                response = await client.get(url)
-
-            # Check for 404 specifically to provide a better error message
-            if response.status_code == 404:
-                raise RuntimeError(
-                    "This paper does not have an HTML version available on arXiv. "
-                    "arxiv2md requires papers to be available in HTML format. "
-                    "Older papers may only be available as PDF."
-                )
+            async with outbound_scheduler.slot(url), client.stream("GET", url, headers=validators) as response:
+                if response.status_code == 304 and validators:
+                    return _FetchResponse.from_httpx(response, path=None)
+
+                # A 404 is definitive, so fail straight away instead of retrying
+                if response.status_code == 404:
+                    raise HtmlNotAvailableError()
+
+                if response.status_code not in _RETRY_STATUS:
+                    response.raise_for_status()
+                    _ensure_html_response(response)
+                    codec = active_codec()
+                    path, size = await _stream_to_file(
+                        response, dest_dir, codec, on_chunk=forward if on_chunk else None
+                    )
+                    return _FetchResponse.from_httpx(response, path=path, codec=codec, size=size)
 
             if response.status_code in _RETRY_STATUS:
                 last_exc = RuntimeError(f"HTTP {response.status_code} from arXiv")
-            else:
-                response.raise_for_status()
-                _ensure_html_response(response)
-                return response.text
+                # Shared backoff: the next slot() for this host waits it out.
+                outbound_scheduler.back_off(
+                    url,
+                    attempt=attempt,
+                    base_delay=ARXIV2MD_FETCH_BACKOFF_S,
+                    retry_after=response.headers.get("retry-after"),
+                )
+                throttled = True
+        except HtmlNotAvailableError:
+            raise
         except (httpx.RequestError, httpx.HTTPStatusError, RuntimeError) as exc:
             last_exc = exc
+            if delivered:
+                break
 
-        if attempt < ARXIV2MD_FETCH_MAX_RETRIES:
+        if attempt < ARXIV2MD_FETCH_MAX_RETRIES and not throttled:
             backoff = ARXIV2MD_FETCH_BACKOFF_S * (2**attempt)
             await asyncio.sleep(backoff)
 
@@ -108,22 +794,65 @@ def _ensure_html_response(response: httpx.Response) -> None:
     content_type = response.headers.get("content-type", "")
     if "text/html" not in content_type:
         raise ValueError(f"Unexpected content-type: {content_type}")
+    content_length = response.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > ARXIV2MD_FETCH_MAX_BYTES:
+        raise ValueError(f"Response too large: {content_length} bytes (limit {ARXIV2MD_FETCH_MAX_BYTES})")
 
 
-def _is_cache_fresh(html_path: Path) -> bool:
-    if not html_path.exists():
+async def _stream_to_file(
+    response: httpx.Response,
+    dest_dir: Path,
+    codec: str,
+    *,
+    on_chunk: Callable[[bytes], Awaitable[None]] | None = None,
+) -> tuple[Path, int]:
+    """Write the response body to a temp file in ``dest_dir``, enforcing the size cap.
+
+    Returns the temp file and the number of body bytes received.
+
+    The cap applies to the uncompressed body; the file is written with ``codec``.
+    Each chunk is also handed to ``on_chunk`` once written.
+    """
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=dest_dir, prefix=f"{HTML_BASENAME}.", suffix=".part")
+    path = Path(name)
+    received = 0
+    try:
+        with os.fdopen(fd, "wb") as handle, open_writer(handle, codec) as writer:
+            async for chunk in response.aiter_bytes():
+                received += len(chunk)
+                if received > ARXIV2MD_FETCH_MAX_BYTES:
+                    raise ValueError(f"Response too large: over {ARXIV2MD_FETCH_MAX_BYTES} bytes")
+                writer.write(chunk)
+                if on_chunk is not None:
+                    await on_chunk(chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return path, received
+
+
+def _is_cache_fresh(key: str) -> bool:
+    found = _find_html(key)
+    return found is not None and _is_age_fresh(time.time() - found[1].mtime)
+
+
+def _is_age_fresh(age_seconds: float | None) -> bool:
+    if age_seconds is None:
         return False
     if ARXIV2MD_CACHE_TTL_SECONDS <= 0:
         return True
-    mtime = datetime.fromtimestamp(html_path.stat().st_mtime, tz=timezone.utc)
-    age_seconds = (datetime.now(timezone.utc) - mtime).total_seconds()
     return age_seconds <= ARXIV2MD_CACHE_TTL_SECONDS
 
 
-def _cache_dir_for(arxiv_id: str, version: str | None) -> Path:
+def _find_html(key: str) -> tuple[str, BlobInfo] | None:
+    """Return the blob name and info of the entry's cached HTML, if any."""
+    return find_blob(get_backend(), key, HTML_BASENAME)
+
+
+def _cache_key_for(arxiv_id: str, version: str | None) -> str:
     base = arxiv_id
     if version and arxiv_id.endswith(version):
         base = arxiv_id[: -len(version)]
     version_tag = version or "latest"
-    key = f"{base}__{version_tag}".replace("/", "_")
-    return ARXIV2MD_CACHE_PATH / key
+    return f"{base}__{version_tag}".replace("/", "_")
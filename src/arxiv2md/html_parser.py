@@ -2,21 +2,26 @@
 
 from __future__ import annotations
 
+import copy
 import re
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Iterator
 
+from arxiv2md.prefilter import prefilter_html
 from arxiv2md.schemas import SectionNode
+from arxiv2md.soup import make_soup, parse_fragment
 
 
 try:
     from bs4 import BeautifulSoup
-    from bs4.element import NavigableString, Tag
+    from bs4.element import NavigableString, PageElement, Tag
 except ImportError as exc:  # pragma: no cover - runtime dependency check
     raise RuntimeError("BeautifulSoup4 is required for HTML parsing (pip install beautifulsoup4).") from exc
 
 
 _HEADING_RE = re.compile(r"^h[1-6]$")
+_ABSTRACT_CLASS_RE = re.compile(r"ltx_abstract")
+_NESTED_SECTION_CLASSES = ("ltx_section", "ltx_subsection", "ltx_subsubsection")
 _EMAIL_RE = re.compile(r"^[\w.+-]+@[\w.-]+\.\w+$")
 # Keywords that indicate footnotes or contribution statements (case-insensitive check)
 _SKIP_KEYWORDS = {"footnotemark:", "equal contribution", "work performed", "listing order"}
@@ -33,9 +38,19 @@ class ParsedArxivHtml:
     sections: list[SectionNode]
 
 
-def parse_arxiv_html(html: str) -> ParsedArxivHtml:
-    """Extract title, authors, abstract, and section tree from HTML."""
-    soup = BeautifulSoup(html, "html.parser")
+def parse_arxiv_html(html: str | bytes, *, engine: str | None = None) -> ParsedArxivHtml:
+    """Extract title, authors, abstract, and section tree from HTML.
+
+    ``html`` may be text or the raw UTF-8 bytes of a cached page. ``engine``
+    overrides the configured parser engine (see :mod:`arxiv2md.soup`). Markup
+    the converter never uses is dropped before parsing (see
+    :mod:`arxiv2md.prefilter`).
+
+    Each section's body is kept as its parsed nodes (``SectionNode.nodes``)
+    rather than serialized back to HTML; lower it with
+    :func:`arxiv2md.ir.lower_nodes`.
+    """
+    soup = make_soup(prefilter_html(html), engine=engine)
     document_root = _find_document_root(soup)
 
     title = _extract_title(soup)
@@ -46,6 +61,15 @@ def parse_arxiv_html(html: str) -> ParsedArxivHtml:
     return ParsedArxivHtml(title=title, authors=authors, abstract=abstract, sections=sections)
 
 
+def parse_sections(html: str | bytes, *, engine: str | None = None) -> list[SectionNode]:
+    """Build the section tree of a fragment, such as a single ``<section>``.
+
+    Like :func:`parse_arxiv_html` but without looking for the title, authors
+    and abstract, which a fragment of the body does not have.
+    """
+    return _extract_sections(parse_fragment(prefilter_html(html), engine=engine))
+
+
 def _find_document_root(soup: BeautifulSoup) -> Tag:
     root = soup.find("article", class_=re.compile(r"ltx_document"))
     if root:
@@ -93,7 +117,8 @@ def _extract_authors(soup: BeautifulSoup) -> list[str]:
 
 def _clean_author_text(node: Tag) -> list[str]:
     """Extract clean author names/affiliations, filtering out emails and footnotes."""
-    clone = BeautifulSoup(str(node), "html.parser")
+    # Copy the subtree instead of serializing and reparsing it.
+    clone = copy.copy(node)
     # Remove superscripts (footnote markers)
     for sup in clone.find_all("sup"):
         sup.decompose()
@@ -133,78 +158,94 @@ def _clean_author_text(node: Tag) -> list[str]:
 
 
 def _extract_abstract(soup: BeautifulSoup) -> str | None:
-    abstract = soup.find(class_=re.compile(r"ltx_abstract"))
+    abstract = soup.find(class_=_ABSTRACT_CLASS_RE)
     if not abstract:
         return None
     return abstract.get_text(" ", strip=True)
 
 
 def _extract_sections(root: Tag) -> list[SectionNode]:
-    headings = [heading for heading in _iter_headings(root) if not _is_title_heading(heading)]
+    """Build the section tree in one depth-first walk of ``root``.
+
+    Headings inside ``<nav>`` or the abstract are skipped, along with the
+    rest of those subtrees. A heading's body is the run of siblings that
+    follow it in its ``<section>``, up to the next heading there, skipping
+    nested sections (they carry their own heading). Each node is visited
+    once, so the cost is linear in the size of the document.
+    """
+    if any(_is_skipped_subtree(tag) for tag in (root, *root.parents)):
+        return []
+
     sections: list[SectionNode] = []
-    stack: list[SectionNode] = []
+    open_sections: list[SectionNode] = []
+    # One frame per element whose children are being walked. ``body`` is set
+    # for a <section> element and holds the node its loose children belong to.
+    stack: list[tuple[Iterator[PageElement], _Body | None]] = [(iter(root.children), _body_for(root))]
+    while stack:
+        children, body = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            continue
+        if not isinstance(child, Tag):
+            if body is not None and body.node is not None and isinstance(child, NavigableString) and child.strip():
+                body.node.nodes.append(child)
+            continue
 
-    for heading in headings:
-        level = int(heading.name[1])
-        title = heading.get_text(" ", strip=True)
-        anchor = heading.get("id") or heading.parent.get("id")
-        html = _collect_section_html(heading)
+        if _HEADING_RE.match(child.name) and not _is_title_heading(child):
+            node = _section_node(child)
+            while open_sections and open_sections[-1].level >= node.level:
+                open_sections.pop()
+            (open_sections[-1].children if open_sections else sections).append(node)
+            open_sections.append(node)
+            if body is not None:
+                body.node = node
+        elif body is not None and body.node is not None and not _is_nested_section(child):
+            body.node.nodes.append(child)
+
+        if not _is_skipped_subtree(child):
+            stack.append((iter(child.children), _body_for(child)))
+
+    _drop_empty_bodies(sections)
+    return sections
 
-        node = SectionNode(title=title, level=level, anchor=anchor, html=html)
 
-        while stack and stack[-1].level >= level:
-            stack.pop()
+@dataclass
+class _Body:
+    """The section node that a ``<section>`` element's loose children belong to."""
 
-        if stack:
-            stack[-1].children.append(node)
-        else:
-            sections.append(node)
+    node: SectionNode | None = None
 
-        stack.append(node)
 
-    return sections
+def _body_for(tag: Tag) -> _Body | None:
+    return _Body() if tag.name == "section" else None
 
 
-def _iter_headings(root: Tag) -> Iterable[Tag]:
-    for heading in root.find_all(_HEADING_RE):
-        if heading.find_parent("nav"):
-            continue
-        if heading.find_parent(class_=re.compile(r"ltx_abstract")):
-            continue
-        yield heading
+def _section_node(heading: Tag) -> SectionNode:
+    return SectionNode(
+        title=heading.get_text(" ", strip=True),
+        level=int(heading.name[1]),
+        anchor=heading.get("id") or heading.parent.get("id"),
+        nodes=[],
+    )
 
 
-def _is_title_heading(heading: Tag) -> bool:
-    classes = heading.get("class", [])
-    return "ltx_title_document" in classes
+def _drop_empty_bodies(sections: list[SectionNode]) -> None:
+    for section in sections:
+        if not section.nodes:
+            section.nodes = None
+        _drop_empty_bodies(section.children)
 
 
-def _collect_section_html(heading: Tag) -> str | None:
-    section = heading.find_parent("section")
-    if not section:
-        return None
+def _is_skipped_subtree(tag: Tag) -> bool:
+    """Whether headings under ``tag`` are not sections (navigation or the abstract)."""
+    return tag.name == "nav" or any(_ABSTRACT_CLASS_RE.search(cls) for cls in tag.get("class", []))
 
-    parts: list[str] = []
-    started = False
-    for child in section.children:
-        if child == heading:
-            started = True
-            continue
-        if not started:
-            continue
-        if isinstance(child, Tag) and child.name == "section":
-            continue
-        if isinstance(child, Tag) and any(
-            cls.startswith("ltx_section") or cls.startswith("ltx_subsection") or cls.startswith("ltx_subsubsection")
-            for cls in child.get("class", [])
-        ):
-            continue
-        if isinstance(child, NavigableString):
-            text = str(child)
-            if text.strip():
-                parts.append(text)
-            continue
-        if isinstance(child, Tag):
-            parts.append(str(child))
-    html = "".join(parts).strip()
-    return html or None
+
+def _is_nested_section(tag: Tag) -> bool:
+    return tag.name == "section" or any(cls.startswith(_NESTED_SECTION_CLASSES) for cls in tag.get("class", []))
+
+
+def _is_title_heading(heading: Tag) -> bool:
+    classes = heading.get("class", [])
+    return "ltx_title_document" in classes
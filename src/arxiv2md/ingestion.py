@@ -2,11 +2,18 @@
 
 from __future__ import annotations
 
-from arxiv2md.fetch import fetch_arxiv_html
-from arxiv2md.html_parser import parse_arxiv_html
+import time
+from functools import partial
+
+from arxiv2md.cache import record_parse_time
+from arxiv2md.config import ARXIV2MD_RESULT_CACHE
+from arxiv2md.fetch import CachedHtml, with_arxiv_html_entry
+from arxiv2md.html_parser import ParsedArxivHtml, parse_arxiv_html
+from arxiv2md.ir import lower_nodes, render_markdown
 from arxiv2md.markdown import convert_fragment_to_markdown
 from arxiv2md.output_formatter import format_paper
-from arxiv2md.schemas import IngestionResult
+from arxiv2md.result_cache import load_parsed, load_result, result_key, store_parsed, store_result
+from arxiv2md.schemas import IngestionResult, SectionNode
 from arxiv2md.sections import filter_sections
 
 _REFERENCE_TITLES = ("references", "bibliography")
@@ -28,14 +35,66 @@ async def ingest_paper(
 ) -> tuple[IngestionResult, dict[str, str | list[str] | None]]:
     """Fetch, parse, and serialize an arXiv paper into Markdown.
 
+    Finished results are cached per paper and option set, so repeat requests
+    skip parsing and conversion (see :mod:`arxiv2md.result_cache`).
+
     Parameters
     ----------
     remove_inline_citations : bool
         If True, completely remove inline citation links from the output.
         If False (default), citation URLs are stripped but text is kept.
     """
-    html, source_url = await fetch_arxiv_html(html_url, arxiv_id=arxiv_id, version=version, use_cache=True, ar5iv_url=ar5iv_url)
-    parsed = parse_arxiv_html(html)
+    # Cache lookups can block on a remote backend and parsing is CPU-bound,
+    # so the rest runs in a worker thread.
+    convert = partial(
+        _convert_page,
+        arxiv_id=arxiv_id,
+        version=version,
+        remove_refs=remove_refs,
+        remove_toc=remove_toc,
+        remove_inline_citations=remove_inline_citations,
+        section_filter_mode=section_filter_mode,
+        sections=sections,
+        include_frontmatter=include_frontmatter,
+    )
+    return await with_arxiv_html_entry(
+        html_url, convert, arxiv_id=arxiv_id, version=version, use_cache=True, ar5iv_url=ar5iv_url
+    )
+
+
+def _convert_page(
+    page: CachedHtml,
+    source_url: str,
+    *,
+    arxiv_id: str,
+    version: str | None,
+    remove_refs: bool,
+    remove_toc: bool,
+    remove_inline_citations: bool,
+    section_filter_mode: str,
+    sections: list[str],
+    include_frontmatter: bool,
+) -> tuple[IngestionResult, dict[str, str | list[str] | None]]:
+    """Return the cached result for ``page`` and these options, converting it if needed."""
+    key = result_key(
+        arxiv_id=arxiv_id,
+        version=version,
+        source_url=source_url,
+        remove_refs=remove_refs,
+        remove_toc=remove_toc,
+        remove_inline_citations=remove_inline_citations,
+        section_filter_mode=section_filter_mode,
+        sections=sections,
+        include_frontmatter=include_frontmatter,
+    )
+    # The page's mtime changes whenever it is rewritten, which keeps
+    # in-memory copies of derived data from outliving the page.
+    if ARXIV2MD_RESULT_CACHE:
+        cached = load_result(page.key, key, html_version=page.mtime_ns)
+        if cached is not None:
+            return cached
+
+    parsed = _load_or_parse(page)
 
     filtered_sections = filter_sections(parsed.sections, mode=section_filter_mode, selected=sections)
     if remove_refs:
@@ -69,11 +128,39 @@ async def ingest_paper(
         "abstract": parsed.abstract,
     }
 
+    if ARXIV2MD_RESULT_CACHE:
+        store_result(page.key, key, result, metadata, html_version=page.mtime_ns)
     return result, metadata
 
 
+def _load_or_parse(page: CachedHtml) -> ParsedArxivHtml:
+    """Return the parsed document, parsing the HTML only the first time."""
+    parsed = load_parsed(page.key, html_version=page.mtime_ns)
+    if parsed is not None:
+        return parsed
+    # Parse straight from the cached bytes rather than a decoded copy of the page.
+    started = time.perf_counter()
+    parsed = parse_arxiv_html(page.read())
+    # Lower sections once so every option set renders without touching HTML again.
+    _lower_sections(parsed.sections)
+    record_parse_time(page.key, time.perf_counter() - started)
+    store_parsed(page.key, parsed, html_version=page.mtime_ns)
+    return parsed
+
+
+def _lower_sections(sections: list[SectionNode]) -> None:
+    for section in sections:
+        if section.nodes:
+            section.ir = lower_nodes(section.nodes)
+        # Release the parsed page once every section is lowered.
+        section.nodes = None
+        _lower_sections(section.children)
+
+
 def _populate_section_markdown(section, *, remove_inline_citations: bool = False, base_url: str | None = None) -> None:
-    if section.html:
+    if section.ir is not None:
+        section.markdown = render_markdown(section.ir, remove_inline_citations=remove_inline_citations, base_url=base_url)
+    elif section.html:
         section.markdown = convert_fragment_to_markdown(section.html, remove_inline_citations=remove_inline_citations, base_url=base_url)
     for child in section.children:
         _populate_section_markdown(child, remove_inline_citations=remove_inline_citations, base_url=base_url)
@@ -0,0 +1,346 @@
+"""Option-independent intermediate representation of section HTML.
+
+Converting a section to Markdown happens in two steps:
+
+1. :func:`lower_nodes` lowers a section's nodes from the parsed page, and
+   :func:`lower_fragment` does the same for an HTML string. Both return a
+   list of blocks made of plain JSON values, so the result can be stored in
+   the parsed document cache.
+2. :func:`render_markdown` turns those blocks into Markdown for one set of
+   output options. It never touches HTML.
+
+Anything the output options can change is kept as a marked node and decided
+at render time. That covers citation links, ``ltx_cite`` citations,
+internal cross-reference links and image URLs. Everything else is
+collapsed into plain strings at lowering time.
+
+Blocks are either finished Markdown strings or lists tagged by their first
+item: ``["p", inline]``, ``["quote", inline]``, ``["list", items]``,
+``["table", rows]``, ``["figure", caption, src, alt]`` and
+``["table_figure", caption, table]``. Inline content is a list of strings
+and tagged lists: ``["em", inline]``, ``["strong", inline]``,
+``["sup", inline]``, ``["note", inline]``, ``["link", href, inline]``,
+``["cite_link", inline]``, ``["xref", href, inline]`` and
+``["cite", inline]``.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Union
+from urllib.parse import urljoin
+
+from arxiv2md.latexml import (
+    EQUATION_TABLE_RE,
+    cleanup_inline_text,
+    convert_all_mathml_to_latex,
+    fix_tabular_tables,
+    is_citation_link,
+    is_internal_paper_link,
+    normalize_text,
+    strip_unwanted_elements,
+)
+from arxiv2md.prefilter import prefilter_html
+from arxiv2md.soup import parse_fragment
+
+try:
+    from bs4.element import NavigableString, PageElement, Tag
+except ImportError as exc:  # pragma: no cover - runtime dependency check
+    raise RuntimeError("BeautifulSoup4 is required for HTML parsing (pip install beautifulsoup4).") from exc
+
+Inline = list[Union[str, list[Any]]]
+Block = Union[str, list[Any]]
+
+_HEADINGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+
+
+def lower_fragment(html: str, *, engine: str | None = None) -> list[Block]:
+    """Parse an HTML fragment into blocks that can be rendered with any options."""
+    return _lower_root(parse_fragment(prefilter_html(html), engine=engine))
+
+
+def lower_nodes(nodes: list[PageElement]) -> list[Block]:
+    """Lower nodes of an already-parsed page, as :func:`lower_fragment` does for HTML.
+
+    This skips serializing the nodes and parsing them again. They are moved
+    out of their page and modified, so lower each node only once.
+    """
+    root = Tag(name="div")
+    for node in nodes:
+        root.append(node)
+    return _lower_root(root)
+
+
+def _lower_root(root: Tag) -> list[Block]:
+    strip_unwanted_elements(root)
+    convert_all_mathml_to_latex(root)
+    fix_tabular_tables(root)
+    return _lower_children(root)
+
+
+def render_markdown(blocks: list[Block], *, remove_inline_citations: bool = False, base_url: str | None = None) -> str:
+    """Render lowered blocks to Markdown.
+
+    Options mean the same as in :func:`arxiv2md.markdown.convert_fragment_to_markdown`.
+    """
+    renderer = _Renderer(remove_inline_citations=remove_inline_citations, base_url=base_url)
+    rendered = (renderer.block(block) for block in blocks)
+    return "\n\n".join(block for block in rendered if block).strip()
+
+
+# ---------------------------------------------------------------------------
+# Lowering (HTML -> IR)
+# ---------------------------------------------------------------------------
+
+
+def _lower_children(container: Tag) -> list[Block]:
+    blocks: list[Block] = []
+    for child in container.children:
+        if isinstance(child, Tag):
+            blocks.extend(_lower_block(child))
+    return blocks
+
+
+def _lower_block(tag: Tag) -> list[Block]:
+    if tag.name in {"section", "article", "div", "span"}:
+        return _lower_children(tag)
+
+    if tag.name in _HEADINGS:
+        heading = normalize_text(tag.get_text(" ", strip=True))
+        return [f"{'#' * int(tag.name[1])} {heading}"] if heading else []
+
+    if tag.name == "p":
+        return [["p", _lower_inline(tag)]]
+
+    if tag.name in {"ul", "ol"}:
+        return [_lower_list(tag)]
+
+    if tag.name == "figure":
+        return [_lower_figure(tag)]
+
+    if tag.name == "table":
+        return [_lower_table(tag)]
+
+    if tag.name == "blockquote":
+        return [["quote", _lower_inline(tag)]]
+
+    if tag.name == "br":
+        return []
+
+    return _lower_children(tag)
+
+
+def _lower_inline(node: Tag | NavigableString) -> Inline:
+    if isinstance(node, NavigableString):
+        return [str(node)]
+
+    if node.name == "br":
+        return ["\n"]
+
+    if node.name in {"em", "i"}:
+        return [["em", _lower_inline_children(node)]]
+
+    if node.name in {"strong", "b"}:
+        return [["strong", _lower_inline_children(node)]]
+
+    if node.name == "a":
+        href = node.get("href")
+        children = _lower_inline_children(node)
+        if is_citation_link(href):
+            return [["cite_link", children]]
+        if is_internal_paper_link(href):
+            return [["xref", href, children]]
+        return [["link", href or None, children]]
+
+    if node.name == "sup":
+        return [["sup", _lower_inline_children(node)]]
+
+    if node.name == "cite":
+        if "ltx_cite" in node.get("class", []):
+            return [["cite", _lower_inline_children(node)]]
+        return _lower_inline_children(node)
+
+    if node.name == "math":
+        text = node.get_text(" ", strip=True)
+        return [f"${text}$"] if text else []
+
+    if "ltx_note" in node.get("class", []):
+        return [["note", _lower_inline_children(node)]]
+
+    return _lower_inline_children(node)
+
+
+def _lower_inline_children(tag: Tag) -> Inline:
+    inline: Inline = []
+    for child in tag.children:
+        for item in _lower_inline(child):
+            # Merge adjacent text runs to keep the stored IR small.
+            if isinstance(item, str) and inline and isinstance(inline[-1], str):
+                inline[-1] += item
+            else:
+                inline.append(item)
+    return inline
+
+
+def _lower_list(list_tag: Tag) -> list[Any]:
+    items = []
+    for item in list_tag.find_all("li", recursive=False):
+        text: Inline = []
+        nested: list[Any] = []
+        for child in item.children:
+            if isinstance(child, Tag) and child.name in {"ul", "ol"}:
+                nested.append(_lower_list(child))
+            else:
+                text.extend(_lower_inline(child))
+        items.append([text, nested])
+    return ["list", items]
+
+
+def _lower_table(table: Tag) -> Block:
+    classes = " ".join(table.get("class", []))
+    if EQUATION_TABLE_RE.search(classes):
+        eqn_text = normalize_text(table.get_text(" ", strip=True))
+        return f"$$ {eqn_text} $$" if eqn_text else ""
+
+    containers = table.find_all(["tbody", "thead", "tfoot"], recursive=False) or [table]
+    rows = []
+    for container in containers:
+        for row in container.find_all("tr", recursive=False):
+            cells = row.find_all(["th", "td"], recursive=False)
+            if cells:
+                rows.append([_lower_inline(cell) for cell in cells])
+    return ["table", rows]
+
+
+def _lower_figure(figure: Tag) -> list[Any]:
+    caption_tag = figure.find("figcaption")
+    caption = _lower_inline(caption_tag) if caption_tag else None
+
+    if "ltx_table" in " ".join(figure.get("class", [])):
+        # fix_tabular_tables strips attributes, so look for any table element.
+        table = figure.find("table")
+        return ["table_figure", caption, _lower_table(table) if table else None]
+
+    img = figure.find("img")
+    src = img.get("src") if img else None
+    alt = img.get("alt") if img else None
+    return ["figure", caption, src or None, alt or None]
+
+
+# ---------------------------------------------------------------------------
+# Rendering (IR -> Markdown)
+# ---------------------------------------------------------------------------
+
+
+class _Renderer:
+    def __init__(self, *, remove_inline_citations: bool, base_url: str | None) -> None:
+        self.remove_inline_citations = remove_inline_citations
+        # Ensure base_url ends with '/' so urljoin resolves relative paths correctly
+        self.base_url = base_url if not base_url or base_url.endswith("/") else base_url + "/"
+
+    def block(self, block: Block) -> str:
+        if isinstance(block, str):
+            return block
+        kind = block[0]
+        if kind == "p":
+            return cleanup_inline_text(self.inline(block[1]))
+        if kind == "quote":
+            content = normalize_text(self.inline(block[1]))
+            return "> " + content if content else ""
+        if kind == "list":
+            return "\n".join(self.list_lines(block))
+        if kind == "table":
+            return self.table(block)
+        if kind == "figure":
+            return self.figure(block)
+        if kind == "table_figure":
+            return self.table_figure(block)
+        raise ValueError(f"Unknown IR block: {kind!r}")
+
+    def inline(self, inline: Inline) -> str:
+        return "".join(item if isinstance(item, str) else self.inline_node(item) for item in inline)
+
+    def inline_node(self, node: list[Any]) -> str:
+        kind = node[0]
+        if kind == "em":
+            return f"*{self.inline(node[1])}*"
+        if kind == "strong":
+            return f"**{self.inline(node[1])}**"
+        if kind == "sup":
+            text = self.inline(node[1]).strip()
+            return f"^{text}" if text else ""
+        if kind == "note":
+            text = normalize_text(self.inline(node[1]))
+            return f"({text})" if text else ""
+        if kind == "cite":
+            return "" if self.remove_inline_citations else self.inline(node[1])
+        if kind == "cite_link":
+            return "" if self.remove_inline_citations else self.inline(node[1]).strip()
+        if kind == "xref":
+            text = self.inline(node[2]).strip()
+            return text if self.remove_inline_citations else f"[{text or node[1]}]({node[1]})"
+        if kind == "link":
+            text = self.inline(node[2]).strip()
+            return f"[{text or node[1]}]({node[1]})" if node[1] else text
+        raise ValueError(f"Unknown IR inline node: {kind!r}")
+
+    def list_lines(self, block: list[Any], indent: int = 0) -> list[str]:
+        lines: list[str] = []
+        for text, nested in block[1]:
+            item_text = cleanup_inline_text(self.inline(text))
+            prefix = "  " * indent + "- "
+            lines.append(prefix + item_text if item_text else prefix.rstrip())
+            for child in nested:
+                lines.extend(self.list_lines(child, indent + 1))
+        return lines
+
+    def table(self, block: Block) -> str:
+        if isinstance(block, str):
+            return block
+        rows = [
+            [cleanup_inline_text(self.inline(cell)).replace("\n", "<br>") for cell in row] for row in block[1]
+        ]
+        if not rows:
+            return ""
+        max_cols = max(len(row) for row in rows)
+        normalized = [row + [""] * (max_cols - len(row)) for row in rows]
+        header = normalized[0]
+        lines = [
+            "| " + " | ".join(header) + " |",
+            "| " + " | ".join("---" for _ in header) + " |",
+        ]
+        for row in normalized[1:]:
+            lines.append("| " + " | ".join(row) + " |")
+        return "\n".join(lines)
+
+    def figure(self, block: list[Any]) -> str:
+        _, caption, src, alt = block
+        caption = self.caption(caption)
+        lines = []
+        if caption:
+            lines.append(f"Figure: {caption}")
+        if src:
+            lines.append(f"{alt or 'Image'}: {self.image_src(src)}")
+        return "\n".join(lines).strip()
+
+    def table_figure(self, block: list[Any]) -> str:
+        _, caption, table = block
+        caption = self.caption(caption)
+        lines = []
+        if table is not None:
+            table_md = self.table(table)
+            if caption:
+                lines.append(f"**{caption}**")
+            if table_md:
+                lines.append(table_md)
+        elif caption:
+            # Fallback if no table found but has caption
+            lines.append(f"Table: {caption}")
+        return "\n".join(lines).strip()
+
+    def caption(self, caption: Inline | None) -> str:
+        return normalize_text(self.inline(caption)) if caption is not None else ""
+
+    def image_src(self, src: str) -> str:
+        if self.base_url and not src.startswith(("http://", "https://", "data:")):
+            return urljoin(self.base_url, src)
+        return src
@@ -0,0 +1,72 @@
+"""Helpers for LaTeXML markup shared by the Markdown converters.
+
+:mod:`arxiv2md.ir` and :mod:`arxiv2md.markdown` both clean up a parsed page
+before reading it (dropping page chrome, turning MathML into LaTeX, stripping
+table attributes) and classify links the same way, so those steps live here.
+"""
+
+from __future__ import annotations
+
+import re
+
+try:
+    from bs4.element import Tag
+except ImportError as exc:  # pragma: no cover - runtime dependency check
+    raise RuntimeError("BeautifulSoup4 is required for HTML parsing (pip install beautifulsoup4).") from exc
+
+
+EQUATION_TABLE_RE = re.compile(r"ltx_equationgroup|ltx_eqn_align|ltx_eqn_table")
+
+
+def strip_unwanted_elements(root: Tag) -> None:
+    for tag in root.find_all(["script", "style", "noscript", "link", "meta"]):
+        tag.decompose()
+    for tag in root.select("nav.ltx_page_navbar, nav.ltx_TOC"):
+        tag.decompose()
+    for tag in root.select("button.sr-only, div.package-alerts, div.ltx_pagination, footer"):
+        tag.decompose()
+
+
+def convert_all_mathml_to_latex(root: Tag) -> None:
+    for math in root.find_all("math"):
+        annotation = math.find("annotation", attrs={"encoding": "application/x-tex"})
+        if annotation and annotation.text:
+            latex_source = annotation.text.strip()
+            latex_source = re.sub(r"(?<!\\)%", "", latex_source)
+            latex_source = re.sub(r"\\([_^])", r"\1", latex_source)
+            latex_source = re.sub(r"\\(?=[\[\]])", "", latex_source)
+            math.replace_with(f"${latex_source}$")
+        else:
+            math.replace_with(math.get_text(" ", strip=True))
+
+
+def fix_tabular_tables(root: Tag) -> None:
+    tables = root.find_all("table", class_=re.compile(r"ltx_tabular"))
+    for table in tables:
+        table.attrs = {}
+        for child in table.find_all(["tbody", "thead", "tfoot", "tr", "td", "th"]):
+            child.attrs = {}
+
+
+def is_citation_link(href: str | None) -> bool:
+    """Check if a link is a citation reference (e.g., #bib.bib7)."""
+    if not href:
+        return False
+    return "#bib." in href or href.startswith("#bib")
+
+
+def is_internal_paper_link(href: str | None) -> bool:
+    """Check if a link is an internal paper section reference (e.g., arxiv.org/html/...#S2.SS1)."""
+    if not href:
+        return False
+    return "arxiv.org/html/" in href and "#" in href and "#bib" not in href
+
+
+def cleanup_inline_text(text: str) -> str:
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"\s*\n\s*", "\n", text)
+    return text.strip()
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
@@ -0,0 +1,188 @@
+"""Outbound request scheduling for upstream arXiv hosts.
+
+Every upstream GET passes through a process-wide :class:`OutboundScheduler`
+which paces requests per host with a token bucket, caps the number of
+requests in flight, and shares backoff state between concurrent requests so
+that a 429/503 (or a ``Retry-After`` header) slows every caller down together
+instead of each one retrying on its own schedule.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from arxiv2md.config import (
+    ARXIV2MD_FETCH_BURST,
+    ARXIV2MD_FETCH_MAX_CONCURRENCY,
+    ARXIV2MD_FETCH_MAX_RETRY_AFTER_S,
+    ARXIV2MD_FETCH_RATE_PER_S,
+)
+
+_JITTER_FRACTION = 0.25
+
+
+class TokenBucket:
+    """A token bucket that hands out reservations instead of rejecting callers."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, now: float | None = None) -> float:
+        """Take one token and return how many seconds the caller must wait for it."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+
+@dataclass
+class _HostState:
+    bucket: TokenBucket
+    backoff_until: float = 0.0
+
+
+@dataclass
+class _Stats:
+    queued: int = 0
+    in_flight: int = 0
+    requests: int = 0
+    throttled: int = 0
+    total_wait_s: float = 0.0
+    max_wait_s: float = 0.0
+    backoff_until: dict[str, float] = field(default_factory=dict)
+
+
+class OutboundScheduler:
+    """Pace, cap and back off outbound requests per upstream host."""
+
+    def __init__(
+        self,
+        *,
+        rate_per_s: float = ARXIV2MD_FETCH_RATE_PER_S,
+        burst: float = ARXIV2MD_FETCH_BURST,
+        max_concurrency: int = ARXIV2MD_FETCH_MAX_CONCURRENCY,
+        max_retry_after_s: float = ARXIV2MD_FETCH_MAX_RETRY_AFTER_S,
+    ) -> None:
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self.max_concurrency = max(max_concurrency, 1)
+        self.max_retry_after_s = max_retry_after_s
+        self._hosts: dict[str, _HostState] = {}
+        self._stats = _Stats()
+        self._semaphore: asyncio.Semaphore | None = None
+        self._semaphore_loop: asyncio.AbstractEventLoop | None = None
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Wait for permission to send a request to ``url``'s host."""
+        state = self._host_state(url)
+        started = time.monotonic()
+        self._stats.queued += 1
+        try:
+            # Honour any shared backoff, then take a paced slot. Re-check after
+            # sleeping in case another request pushed the backoff further out.
+            while (delay := state.backoff_until - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            delay = state.bucket.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self._get_semaphore().acquire()
+        finally:
+            self._stats.queued -= 1
+
+        waited = time.monotonic() - started
+        self._stats.requests += 1
+        self._stats.total_wait_s += waited
+        self._stats.max_wait_s = max(self._stats.max_wait_s, waited)
+        self._stats.in_flight += 1
+        try:
+            yield
+        finally:
+            self._stats.in_flight -= 1
+            self._get_semaphore().release()
+
+    def back_off(self, url: str, *, attempt: int, base_delay: float, retry_after: str | None = None) -> float:
+        """Delay every request to ``url``'s host and return the chosen delay.
+
+        ``Retry-After`` (seconds or an HTTP date) wins over exponential backoff.
+        Jitter is added so queued callers do not all wake at the same instant.
+        """
+        delay = _parse_retry_after(retry_after)
+        if delay is None:
+            delay = base_delay * (2**attempt)
+        delay = min(delay, self.max_retry_after_s) if self.max_retry_after_s > 0 else delay
+        delay += random.uniform(0, delay * _JITTER_FRACTION)
+
+        host = _host_of(url)
+        state = self._host_state(url)
+        state.backoff_until = max(state.backoff_until, time.monotonic() + delay)
+        self._stats.throttled += 1
+        self._stats.backoff_until[host] = state.backoff_until
+        return delay
+
+    def metrics(self) -> dict[str, float | int | dict[str, float]]:
+        """Return a snapshot of queue depth, wait times and backoff state."""
+        now = time.monotonic()
+        stats = self._stats
+        return {
+            "queue_depth": stats.queued,
+            "in_flight": stats.in_flight,
+            "requests": stats.requests,
+            "throttled": stats.throttled,
+            "avg_wait_s": round(stats.total_wait_s / stats.requests, 4) if stats.requests else 0.0,
+            "max_wait_s": round(stats.max_wait_s, 4),
+            "backoff_remaining_s": {
+                host: round(until - now, 3) for host, until in stats.backoff_until.items() if until > now
+            },
+        }
+
+    def _host_state(self, url: str) -> _HostState:
+        host = _host_of(url)
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(bucket=TokenBucket(self.rate_per_s, self.burst))
+            self._hosts[host] = state
+        return state
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphores bind to the loop they are first used on; rebuild per loop.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+
+def _host_of(url: str) -> str:
+    return urlsplit(url).hostname or ""
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+scheduler = OutboundScheduler()
@@ -129,13 +129,18 @@ def _render_content(
 
 
 def _render_section(section: SectionNode) -> list[str]:
-    blocks: list[str] = []
+    blocks = section_blocks(section)
+    for child in section.children:
+        blocks.extend(_render_section(child))
+    return blocks
+
+
+def section_blocks(section: SectionNode) -> list[str]:
+    """Return the heading and Markdown blocks of ``section``, without its children."""
     heading_prefix = "#" * min(section.level, 6)
-    blocks.append(f"{heading_prefix} {section.title}")
+    blocks = [f"{heading_prefix} {section.title}"]
     if section.markdown:
         blocks.append(section.markdown)
-    for child in section.children:
-        blocks.extend(_render_section(child))
     return blocks
 
 
@@ -0,0 +1,129 @@
+"""Drop markup we never use from raw HTML before it is parsed.
+
+LaTeXML pages are dominated by bulk the converter throws away: presentation
+MathML under every ``<math>`` (only the TeX annotation is kept), scripts and
+styles, ``<link>``/``<meta>``, navigation bars, footers, package alerts and
+inline SVG. Removing it after parsing still pays for building all of those
+nodes, so :func:`prefilter_html` removes it from the raw bytes in one forward
+scan instead:
+
+- each ``<math>`` that has a TeX annotation is reduced to just that
+  annotation, which :func:`arxiv2md.latexml.convert_all_mathml_to_latex`
+  turns into ``$...$`` as before (math without one is left alone);
+- the elements that :func:`arxiv2md.latexml.strip_unwanted_elements`
+  would remove, plus ``<svg>``, are dropped whole.
+
+The scan only looks at tags, so anything it does not recognise, including
+malformed markup, is passed through for the parser to handle as before.
+"""
+
+from __future__ import annotations
+
+import re
+
+_TOKEN_RE = re.compile(
+    rb"<!--|<(script|style|noscript|link|meta|svg|math|nav|footer|div|button)\b([^>]*)>",
+    re.IGNORECASE,
+)
+_CLASS_RE = re.compile(rb"""\bclass\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.IGNORECASE)
+_TEX_ANNOTATION_RE = re.compile(
+    rb"""<annotation\b[^>]*\bencoding\s*=\s*["']application/x-tex["'][^>]*>(.*?)</annotation\s*>""",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Elements whose content is raw text, dropped through their end tag.
+_RAW_TEXT = {b"script", b"style", b"noscript"}
+_VOID = {b"link", b"meta"}
+# Other elements dropped when they carry one of these classes (None: always).
+_JUNK_CLASSES: dict[bytes, frozenset[bytes] | None] = {
+    b"svg": None,
+    b"footer": None,
+    b"nav": frozenset({b"ltx_page_navbar", b"ltx_TOC"}),
+    b"div": frozenset({b"package-alerts", b"ltx_pagination"}),
+    b"button": frozenset({b"sr-only"}),
+}
+
+
+def prefilter_html(html: str | bytes, *, keep_toc: bool = False) -> bytes:
+    """Return ``html`` as UTF-8 bytes without the markup the converter discards.
+
+    ``keep_toc`` keeps ``<nav class="ltx_TOC">`` for callers that render the
+    table of contents.
+    """
+    data = html.encode("utf-8") if isinstance(html, str) else html
+    out: list[bytes] = []
+    cursor = 0
+    for match in _TOKEN_RE.finditer(data):
+        start = match.start()
+        if start < cursor:
+            # Inside something already copied or dropped.
+            continue
+        if match.group(1) is None:
+            end = data.find(b"-->", match.end())
+            end = len(data) if end < 0 else end + 3
+            out.append(data[cursor:end])
+            cursor = end
+            continue
+
+        name = match.group(1).lower()
+        attrs = match.group(2)
+        self_closing = attrs.endswith(b"/")
+        if name in _VOID:
+            end = match.end()
+        elif name in _RAW_TEXT:
+            end = _end_of_raw_text(data, name, match.end())
+        elif name == b"math":
+            end = None if self_closing else _end_of_element(data, name, match.end())
+            if end is not None:
+                annotation = _TEX_ANNOTATION_RE.search(data, match.end(), end)
+                # Empty annotations fall back to the MathML text, so keep those whole.
+                if annotation is not None and annotation.group(1):
+                    out.append(data[cursor:start])
+                    out.append(b'<math><annotation encoding="application/x-tex">')
+                    out.append(annotation.group(1))
+                    out.append(b"</annotation></math>")
+                    cursor = end
+            continue
+        elif _is_junk(name, attrs, keep_toc=keep_toc):
+            end = match.end() if self_closing else _end_of_element(data, name, match.end())
+        else:
+            continue
+
+        if end is None:
+            continue
+        out.append(data[cursor:start])
+        cursor = end
+    out.append(data[cursor:])
+    return b"".join(out)
+
+
+def _is_junk(name: bytes, attrs: bytes, *, keep_toc: bool) -> bool:
+    if name not in _JUNK_CLASSES:
+        return False
+    classes = _JUNK_CLASSES[name]
+    if classes is None:
+        return True
+    found = _CLASS_RE.search(attrs)
+    if found is None:
+        return False
+    wanted = classes - {b"ltx_TOC"} if keep_toc else classes
+    return not wanted.isdisjoint((found.group(1) or found.group(2) or found.group(3)).split())
+
+
+def _end_of_raw_text(data: bytes, name: bytes, pos: int) -> int | None:
+    close = re.compile(rb"</" + name + rb"\s*>", re.IGNORECASE).search(data, pos)
+    return close.end() if close else None
+
+
+def _end_of_element(data: bytes, name: bytes, pos: int) -> int | None:
+    """Return the offset just past the end tag matching an open ``name`` tag ending at ``pos``."""
+    tags = re.compile(rb"<(/?)" + name + rb"\b[^>]*>", re.IGNORECASE)
+    depth = 1
+    for tag in tags.finditer(data, pos):
+        if tag.group(1):
+            depth -= 1
+            if depth == 0:
+                return tag.end()
+        elif not tag.group(0).endswith(b"/>"):
+            depth += 1
+    return None
@@ -0,0 +1,215 @@
+"""Caches of work derived from the cached HTML, stored alongside it.
+
+Two tiers live as blobs in each entry:
+
+- ``parsed.json`` (compressed like the HTML): the parsed document, so a
+  paper is parsed at most once whatever options it is later rendered with.
+- ``results/<key>.json``: one per combination of output options, holding
+  the finished :class:`IngestionResult`.
+
+Recently used values are also kept in the per-worker memory cache when the
+caller passes the HTML file's mtime as ``html_version``.
+
+Both are tagged with :data:`CONVERTER_VERSION`, a fingerprint of the
+conversion code and the selected parser engine, so upgrading arxiv2md never serves output produced by an
+older converter. Both are dropped whenever the entry's HTML is rewritten.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import json
+from pathlib import Path
+
+from arxiv2md.cache import get_backend, record_derived_bytes
+from arxiv2md.compression import active_codec, blob_name, blob_names, codec_of, compress, decompress, find_blob
+from arxiv2md.html_parser import ParsedArxivHtml
+from arxiv2md.memory_cache import memory_cache
+from arxiv2md.schemas import IngestionResult, SectionNode
+from arxiv2md.soup import active_engine
+from arxiv2md.utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+RESULTS_DIRNAME = "results"
+PARSED_BASENAME = "parsed.json"
+
+# Modules whose code determines the rendered output or the shape of what is
+# cached. Named rather than imported, as ``ingestion`` imports this module.
+_CONVERTER_MODULES = (
+    "arxiv2md.soup",
+    "arxiv2md.prefilter",
+    "arxiv2md.latexml",
+    "arxiv2md.html_parser",
+    "arxiv2md.ir",
+    "arxiv2md.markdown",
+    "arxiv2md.sections",
+    "arxiv2md.output_formatter",
+    "arxiv2md.ingestion",
+    "arxiv2md.schemas.sections",
+    "arxiv2md.schemas.ingestion",
+)
+
+
+def _converter_fingerprint() -> str:
+    digest = hashlib.sha256()
+    for name in _CONVERTER_MODULES:
+        digest.update(Path(importlib.util.find_spec(name).origin).read_bytes())
+    # Engines repair malformed markup differently, so they are not interchangeable.
+    digest.update(active_engine().encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+CONVERTER_VERSION = _converter_fingerprint()
+
+
+def result_key(
+    *,
+    arxiv_id: str,
+    version: str | None,
+    source_url: str,
+    remove_refs: bool,
+    remove_toc: bool,
+    remove_inline_citations: bool,
+    section_filter_mode: str,
+    sections: list[str],
+    include_frontmatter: bool,
+) -> str:
+    """Return a stable key for one paper rendered with one set of options."""
+    options = {
+        "arxiv_id": arxiv_id,
+        "version": version,
+        "source_url": source_url,
+        "remove_refs": remove_refs,
+        "remove_toc": remove_toc,
+        "remove_inline_citations": remove_inline_citations,
+        "section_filter_mode": section_filter_mode,
+        # Section matching is case-insensitive and order-independent.
+        "sections": sorted({title.lower() for title in sections}),
+        "include_frontmatter": include_frontmatter,
+        "converter": CONVERTER_VERSION,
+        "parser": active_engine(),
+    }
+    return hashlib.sha256(json.dumps(options, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def load_result(entry: str, key: str, *, html_version: int | None = None) -> tuple[IngestionResult, dict] | None:
+    """Return a cached result and its metadata, or None on a miss.
+
+    With ``html_version`` (the HTML blob's mtime) the in-process memory cache
+    is consulted first and filled on a backend hit.
+    """
+    memory_key = ("result", entry, html_version, key)
+    if html_version is not None and (cached := memory_cache.get(memory_key)) is not None:
+        result, metadata = cached
+        return result.model_copy(), dict(metadata)
+    name = _result_name(key)
+    data = get_backend().read(entry, name)
+    if data is None:
+        return None
+    try:
+        stored = json.loads(data)
+        result, metadata = IngestionResult.model_validate(stored["result"]), stored["metadata"]
+    except (ValueError, KeyError) as exc:
+        logger.warning("Ignoring unreadable cached result", extra={"entry": entry, "name": name, "error": str(exc)})
+        return None
+    if html_version is not None:
+        memory_cache.put(memory_key, (result, metadata), len(data))
+        return result.model_copy(), dict(metadata)
+    return result, metadata
+
+
+def store_result(
+    entry: str, key: str, result: IngestionResult, metadata: dict, *, html_version: int | None = None
+) -> None:
+    """Store a result for ``entry`` under the option-set ``key``."""
+    data = json.dumps({"result": result.model_dump(), "metadata": metadata}).encode("utf-8")
+    _write(entry, _result_name(key), data)
+    if html_version is not None:
+        memory_cache.put(("result", entry, html_version, key), (result.model_copy(), dict(metadata)), len(data))
+
+
+def load_parsed(entry: str, *, html_version: int | None = None) -> ParsedArxivHtml | None:
+    """Return the stored parse of ``entry``'s HTML, or None if there is no current one.
+
+    ``html_version`` enables the memory cache as for :func:`load_result`. The
+    caller gets its own copy of the section tree and may modify it.
+    """
+    memory_key = ("parsed", entry, html_version, CONVERTER_VERSION)
+    if html_version is not None and (cached := memory_cache.get(memory_key)) is not None:
+        return _copy_parsed(cached)
+    backend = get_backend()
+    found = find_blob(backend, entry, PARSED_BASENAME)
+    raw = backend.read(entry, found[0]) if found else None
+    if raw is None:
+        return None
+    try:
+        data = decompress(raw, codec_of(found[0]))
+        stored = json.loads(data)
+        if stored.get("converter") != CONVERTER_VERSION:
+            return None
+        parsed = ParsedArxivHtml(
+            title=stored["title"],
+            authors=stored["authors"],
+            abstract=stored["abstract"],
+            sections=[SectionNode.model_validate(section) for section in stored["sections"]],
+        )
+    except (OSError, ValueError, KeyError) as exc:
+        logger.warning("Ignoring unreadable parsed document", extra={"entry": entry, "error": str(exc)})
+        return None
+    if html_version is not None:
+        memory_cache.put(memory_key, parsed, len(data))
+        return _copy_parsed(parsed)
+    return parsed
+
+
+def store_parsed(entry: str, parsed: ParsedArxivHtml, *, html_version: int | None = None) -> None:
+    """Persist a parsed document next to the HTML it came from."""
+    stored = {
+        "converter": CONVERTER_VERSION,
+        "title": parsed.title,
+        "authors": parsed.authors,
+        "abstract": parsed.abstract,
+        "sections": [section.model_dump(exclude_none=True) for section in parsed.sections],
+    }
+    data = json.dumps(stored, separators=(",", ":")).encode("utf-8")
+    codec = active_codec()
+    _write(entry, blob_name(PARSED_BASENAME, codec), compress(data, codec))
+    if html_version is not None:
+        memory_cache.put(("parsed", entry, html_version, CONVERTER_VERSION), _copy_parsed(parsed), len(data))
+
+
+def clear_derived(entry: str) -> None:
+    """Drop the parsed document and every cached result, e.g. after the HTML changed."""
+    backend = get_backend()
+    results = [name for name in backend.names(entry) if name.startswith(f"{RESULTS_DIRNAME}/")]
+    backend.delete(entry, blob_names(PARSED_BASENAME) + results)
+
+
+def _result_name(key: str) -> str:
+    return f"{RESULTS_DIRNAME}/{key}.json"
+
+
+def _copy_parsed(parsed: ParsedArxivHtml) -> ParsedArxivHtml:
+    # Ingestion filters children and fills in Markdown in place; the IR and
+    # HTML strings are never modified, so they can be shared.
+    return ParsedArxivHtml(
+        title=parsed.title,
+        authors=list(parsed.authors),
+        abstract=parsed.abstract,
+        sections=_copy_sections(parsed.sections),
+    )
+
+
+def _copy_sections(sections: list[SectionNode]) -> list[SectionNode]:
+    return [section.model_copy(update={"children": _copy_sections(section.children)}) for section in sections]
+
+
+def _write(entry: str, name: str, data: bytes) -> None:
+    """Store a derived blob, counting it in the entry's size the first time."""
+    backend = get_backend()
+    replaced = backend.info(entry, name) is not None
+    backend.write(entry, name, data)
+    if not replaced:
+        record_derived_bytes(entry, len(data))
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+from typing import Any
+
 from pydantic import BaseModel, Field
 
 
@@ -12,5 +14,10 @@ class SectionNode(BaseModel):
     level: int = Field(..., ge=1, le=6)
     anchor: str | None = None
     html: str | None = None
+    # The section body as nodes of the parsed page, set by arxiv2md.html_parser
+    # and dropped once ingestion has lowered them. Never serialized.
+    nodes: list[Any] | None = Field(default=None, exclude=True, repr=False)
+    # Option-independent lowering of the body (see arxiv2md.ir), filled in by ingestion.
+    ir: list[Any] | None = None
     markdown: str | None = None
     children: list["SectionNode"] = Field(default_factory=list)
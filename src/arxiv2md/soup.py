@@ -0,0 +1,77 @@
+"""Choose the BeautifulSoup tree builder used for all HTML parsing.
+
+Parsing the page dominates CPU time for large papers, and bs4's pure-Python
+``html.parser`` builder is its slowest. ``ARXIV2MD_HTML_PARSER`` selects the
+engine: ``lxml`` (fastest, needs the lxml package), ``html5lib`` (browser-
+exact but slower still, needs the html5lib package) or ``html.parser``. The
+default, ``auto``, is ``html.parser``: the other engines repair invalid nesting
+differently (a block inside ``<p>`` closes the paragraph, and html5lib hoists
+a table out of its paragraph), which loses text on some pages, so they are
+opt-in.
+
+``tests/test_soup.py`` checks the engines agree on well-formed LaTeXML and
+records where they differ; ``python -m arxiv2md.bench parsers`` compares their
+speed on a real page. The selected engine is part of the result cache key.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+from functools import cache
+
+from arxiv2md.config import ARXIV2MD_HTML_PARSER
+from arxiv2md.utils.logging_config import get_logger
+
+try:
+    from bs4 import BeautifulSoup
+    from bs4.element import Tag
+except ImportError as exc:  # pragma: no cover - runtime dependency check
+    raise RuntimeError("BeautifulSoup4 is required for HTML parsing (pip install beautifulsoup4).") from exc
+
+logger = get_logger(__name__)
+
+# Each engine with the module it needs.
+PARSER_ENGINES = {"lxml": "lxml", "html5lib": "html5lib", "html.parser": None}
+DEFAULT_ENGINE = "html.parser"
+
+
+@cache
+def available_engines() -> tuple[str, ...]:
+    """Return the installed parser engines."""
+    return tuple(
+        engine for engine, module in PARSER_ENGINES.items() if module is None or importlib.util.find_spec(module)
+    )
+
+
+@cache
+def _resolve_engine(setting: str) -> str:
+    installed = available_engines()
+    if setting in installed:
+        return setting
+    if setting != "auto":
+        logger.warning("ARXIV2MD_HTML_PARSER=%s is not available; using %s", setting, DEFAULT_ENGINE)
+    return DEFAULT_ENGINE
+
+
+def active_engine() -> str:
+    """Return the engine selected by ``ARXIV2MD_HTML_PARSER``."""
+    return _resolve_engine(ARXIV2MD_HTML_PARSER)
+
+
+def make_soup(markup: str | bytes, *, engine: str | None = None) -> BeautifulSoup:
+    """Parse a whole document; ``markup`` may be text or UTF-8 bytes."""
+    engine = engine or active_engine()
+    if isinstance(markup, bytes):
+        return BeautifulSoup(markup, engine, from_encoding="utf-8")
+    return BeautifulSoup(markup, engine)
+
+
+def parse_fragment(html: str | bytes, *, engine: str | None = None) -> Tag:
+    """Parse an HTML fragment and return the element holding its nodes.
+
+    ``lxml`` and ``html5lib`` wrap fragments in ``<html><body>``, which
+    ``html.parser`` does not; the wrapper is skipped so callers see the same
+    top-level children whatever the engine.
+    """
+    soup = make_soup(html, engine=engine)
+    return soup.body or soup
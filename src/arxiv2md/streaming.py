@@ -0,0 +1,235 @@
+"""Convert arXiv HTML to Markdown while it is still downloading.
+
+:func:`arxiv2md.ingestion.ingest_paper` waits for the whole page, parses it
+and only then renders anything, so the first byte of Markdown costs a full
+download plus a full parse, and the whole page tree is in memory at once.
+:class:`StreamingConverter` instead runs the stdlib incremental tokenizer
+(``html.parser.HTMLParser.feed``) over chunks as they arrive and cuts the
+page into its top-level pieces: the abstract, each outermost ``<section>``
+and any heading outside one. Only the piece being read is buffered; when it
+closes, it goes through the usual pipeline (pre-filter, parse, lower,
+render) and its Markdown blocks are returned straight away.
+
+The blocks, joined with blank lines, are the ``content`` that
+:func:`~arxiv2md.ingestion.ingest_paper` produces with ``remove_toc=True``
+in ``exclude`` mode. A table of contents, include-mode filters and the
+summary need the whole section tree, so they are not available here. The
+abstract is expected before the first section, as LaTeXML writes it; one
+that comes later is ignored.
+"""
+
+from __future__ import annotations
+
+import codecs
+from collections.abc import AsyncIterator, Iterable
+from html.parser import HTMLParser
+
+from arxiv2md.fetch import stream_arxiv_html
+from arxiv2md.html_parser import _ABSTRACT_CLASS_RE, _HEADING_RE, parse_arxiv_html, parse_sections
+from arxiv2md.ir import lower_nodes, render_markdown
+from arxiv2md.output_formatter import section_blocks
+from arxiv2md.schemas import SectionNode
+from arxiv2md.sections import normalize_section_title
+
+_REFERENCE_TITLES = ("references", "bibliography")
+_ABSTRACT_TITLE = "abstract"
+# Subtrees whose headings are not sections (the batch parser skips <nav>, and
+# the pre-filter drops <footer>).
+_SKIPPED_TAGS = frozenset({"nav", "footer"})
+
+
+class StreamingConverter:
+    """Turn an arXiv page fed in chunks into Markdown blocks as pieces close.
+
+    Example::
+
+        converter = StreamingConverter(base_url=source_url, remove_refs=True)
+        for chunk in chunks:
+            send(converter.feed(chunk))
+        send(converter.close())
+
+    ``exclude`` lists section titles to leave out, as with
+    ``section_filter_mode="exclude"``; "Abstract" leaves out the abstract.
+    """
+
+    def __init__(
+        self,
+        *,
+        base_url: str | None = None,
+        remove_refs: bool = False,
+        remove_inline_citations: bool = False,
+        exclude: Iterable[str] = (),
+        engine: str | None = None,
+    ) -> None:
+        self.base_url = base_url
+        self.remove_inline_citations = remove_inline_citations
+        self.engine = engine
+        exclude = [title for title in exclude if title.strip()]
+        self._excluded = {normalize_section_title(title) for title in exclude}
+        if remove_refs:
+            self._excluded.update(_REFERENCE_TITLES)
+        self._include_abstract = _ABSTRACT_TITLE not in (title.lower() for title in exclude)
+        self._splitter = _PieceSplitter()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        # (level, excluded) for each heading still open, as in the batch parser's stack.
+        self._open: list[tuple[int, bool]] = []
+        self._past_abstract = False
+
+    def feed(self, chunk: bytes) -> list[str]:
+        """Consume the next chunk of the page and return the blocks it completed."""
+        self._splitter.feed(self._decoder.decode(chunk))
+        return self._drain()
+
+    def close(self) -> list[str]:
+        """Flush the end of the page and return the remaining blocks."""
+        self._splitter.feed(self._decoder.decode(b"", final=True))
+        self._splitter.close()
+        return self._drain()
+
+    def _drain(self) -> list[str]:
+        blocks: list[str] = []
+        for kind, html in self._splitter.pieces:
+            if kind == "abstract":
+                abstract = parse_arxiv_html(html, engine=self.engine).abstract
+                if not self._past_abstract and self._include_abstract and abstract:
+                    blocks.extend(["## Abstract", abstract.strip()])
+                self._past_abstract = True
+                continue
+            self._past_abstract = True
+            blocks.extend(self._render(parse_sections(html, engine=self.engine)))
+        self._splitter.pieces.clear()
+        return [block for block in blocks if block]
+
+    def _render(self, sections: list[SectionNode]) -> list[str]:
+        blocks: list[str] = []
+        for section in sections:
+            # A piece's first headings may nest under ones from earlier pieces.
+            while self._open and self._open[-1][0] >= section.level:
+                self._open.pop()
+            excluded = normalize_section_title(section.title) in self._excluded or (
+                bool(self._open) and self._open[-1][1]
+            )
+            self._open.append((section.level, excluded))
+            if not excluded:
+                if section.nodes:
+                    section.markdown = render_markdown(
+                        lower_nodes(section.nodes),
+                        remove_inline_citations=self.remove_inline_citations,
+                        base_url=self.base_url,
+                    )
+                blocks.extend(section_blocks(section))
+            blocks.extend(self._render(section.children))
+        return blocks
+
+
+async def stream_paper(
+    *,
+    arxiv_id: str,
+    version: str | None,
+    html_url: str,
+    ar5iv_url: str | None = None,
+    remove_refs: bool,
+    remove_inline_citations: bool = False,
+    sections: list[str] | None = None,
+) -> AsyncIterator[str]:
+    """Yield a paper's Markdown content block by block while it downloads.
+
+    ``sections`` are excluded by title. Join the blocks with ``"\\n\\n"`` to
+    get the content :func:`~arxiv2md.ingestion.ingest_paper` returns for the
+    same options without a table of contents.
+    """
+    converter: StreamingConverter | None = None
+    async for source_url, chunk in stream_arxiv_html(
+        html_url, arxiv_id=arxiv_id, version=version, ar5iv_url=ar5iv_url
+    ):
+        if converter is None:
+            converter = StreamingConverter(
+                base_url=source_url,
+                remove_refs=remove_refs,
+                remove_inline_citations=remove_inline_citations,
+                exclude=sections or [],
+            )
+        for block in converter.feed(chunk):
+            yield block
+    if converter is not None:
+        for block in converter.close():
+            yield block
+
+
+class _PieceSplitter(HTMLParser):
+    """Collect the raw markup of each top-level piece of a page as it closes.
+
+    A piece runs from its start tag to the matching end tag, found by
+    counting tags of the same name. Markup between pieces is dropped, so the
+    buffer never holds more than the piece being read.
+    """
+
+    def __init__(self) -> None:
+        # Keep references as written so each piece reparses exactly like the page.
+        super().__init__(convert_charrefs=False)
+        self.pieces: list[tuple[str, str]] = []
+        self._tag: str | None = None
+        self._kind: str | None = None
+        self._depth = 0
+        self._parts: list[str] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self._tag is None:
+            self._kind = _piece_kind(tag, attrs)
+            if self._kind is None:
+                return
+            self._tag = tag
+        elif tag != self._tag:
+            self._keep(self.get_starttag_text())
+            return
+        self._depth += 1
+        self._keep(self.get_starttag_text())
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._keep(self.get_starttag_text())
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._tag is None:
+            return
+        self._keep(f"</{tag}>")
+        if tag != self._tag:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            if self._kind != "skip":
+                self.pieces.append((self._kind, "".join(self._parts)))
+            self._tag = self._kind = None
+            self._parts = []
+
+    def handle_data(self, data: str) -> None:
+        self._keep(data)
+
+    def handle_entityref(self, name: str) -> None:
+        self._keep(f"&{name};")
+
+    def handle_charref(self, name: str) -> None:
+        self._keep(f"&#{name};")
+
+    def handle_comment(self, data: str) -> None:
+        self._keep(f"<!--{data}-->")
+
+    def unknown_decl(self, data: str) -> None:
+        self._keep(f"<![{data}]>")
+
+    def _keep(self, text: str | None) -> None:
+        if self._tag is not None and self._kind != "skip" and text:
+            self._parts.append(text)
+
+
+def _piece_kind(tag: str, attrs: list[tuple[str, str | None]]) -> str | None:
+    """Classify an element outside any piece, mirroring what the batch parser reads."""
+    classes = (dict(attrs).get("class") or "").split()
+    if tag in _SKIPPED_TAGS:
+        return "skip"
+    if any(_ABSTRACT_CLASS_RE.search(cls) for cls in classes):
+        return "abstract"
+    if tag == "section":
+        return "section"
+    if _HEADING_RE.match(tag) and "ltx_title_document" not in classes:
+        return "heading"
+    return None
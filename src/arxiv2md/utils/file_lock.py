@@ -0,0 +1,103 @@
+"""Advisory inter-process file locks.
+
+Locks are taken with ``fcntl.flock`` on POSIX systems. The kernel releases
+them automatically when the holding process exits, so a crashed worker never
+leaves a stale lock behind. On platforms without ``fcntl`` the lock degrades
+to a no-op and only in-process coordination applies.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from types import TracebackType
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class FileLock:
+    """An exclusive advisory lock backed by a file on disk."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._fd: int | None = None
+
+    @property
+    def locked(self) -> bool:
+        """Return True if this instance currently holds the lock."""
+        return self._fd is not None
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        """Acquire the lock, returning False if ``blocking`` is off and it is held elsewhere.
+
+        Lock files may be deleted by whoever holds them (see
+        ``arxiv2md.cache.sweep_fetch_locks``). A lock taken on a file that was
+        unlinked meanwhile guards nothing, so it is dropped and taken again on
+        the file now at ``path``.
+        """
+        if self._fd is not None:
+            return True
+        while True:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            except FileNotFoundError:
+                # The emptied directory was removed after mkdir.
+                continue
+            if fcntl is None:
+                break
+            flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+            try:
+                fcntl.flock(fd, flags)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+            if self._is_current(fd):
+                break
+            os.close(fd)
+        self._fd = fd
+        return True
+
+    def _is_current(self, fd: int) -> bool:
+        try:
+            return os.fstat(fd).st_ino == os.stat(self.path).st_ino
+        except FileNotFoundError:
+            return False
+
+    async def acquire_async(self, *, timeout: float | None = None, poll_interval: float = 0.05) -> bool:
+        """Acquire the lock without blocking the event loop.
+
+        Returns False if ``timeout`` seconds elapse before the lock is free.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.acquire(blocking=False):
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(poll_interval)
+        return True
+
+    def release(self) -> None:
+        """Release the lock if held."""
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+    def __enter__(self) -> FileLock:
+        self.acquire()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.release()
@@ -0,0 +1,59 @@
+"""Content-addressed storage for downloadable digests.
+
+Each distinct digest is stored once, under a key derived from its SHA-256.
+Every ingest ID handed out in a ``digest_url`` is a small alias blob naming
+that hash, so repeat requests for the same paper and options only add an
+alias instead of another copy of the digest.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+from arxiv2md.cache import get_backend, record_entry, touch_entry
+from arxiv2md.cache_maintenance import request_eviction
+from server.server_config import DIGEST_FILENAME, DIGEST_REF_FILENAME
+
+_DIGEST_KEY_PREFIX = "digest-"
+
+
+def _content_key(digest_hash: str) -> str:
+    return f"{_DIGEST_KEY_PREFIX}{digest_hash}"
+
+
+def store_digest(ingest_id: str, digest_content: str) -> None:
+    """Store ``digest_content`` once by content hash and alias ``ingest_id`` to it."""
+    data = digest_content.encode("utf-8")
+    digest_hash = hashlib.sha256(data).hexdigest()
+    content_key = _content_key(digest_hash)
+    backend = get_backend()
+    is_new = backend.info(content_key, DIGEST_FILENAME) is None
+    if is_new:
+        backend.write(content_key, DIGEST_FILENAME, data)
+    else:
+        # Its age is the blob's mtime, so refresh that too; otherwise the digest
+        # expires before its newest alias (and a rebuilt index ages it again).
+        backend.touch(content_key, DIGEST_FILENAME)
+    record_entry(content_key)
+    backend.write(ingest_id, DIGEST_REF_FILENAME, digest_hash.encode("ascii"))
+    record_entry(ingest_id)
+    if is_new:
+        request_eviction()
+
+
+def load_digest(ingest_id: str) -> bytes | None:
+    """Return the digest aliased by ``ingest_id``, or ``None`` if it is gone."""
+    backend = get_backend()
+    ref = backend.read(ingest_id, DIGEST_REF_FILENAME)
+    if ref is None:
+        # Digests written before content addressing live under the ingest ID itself.
+        key = ingest_id
+    else:
+        key = _content_key(ref.decode("ascii"))
+    digest = backend.read(key, DIGEST_FILENAME)
+    if digest is None:
+        return None
+    if key != ingest_id:
+        touch_entry(ingest_id)
+    touch_entry(key)
+    return digest
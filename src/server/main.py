@@ -16,6 +16,10 @@ from slowapi.util import get_remote_address
 
 # Import logging configuration first to intercept all logging
 from arxiv2md.cache import cleanup_cache
+from arxiv2md.cache_maintenance import CacheMaintenance
+from arxiv2md.fetch import close_http_client, open_http_client
+from arxiv2md.memory_cache import memory_cache
+from arxiv2md.outbound import scheduler as outbound_scheduler
 from arxiv2md.utils.logging_config import get_logger
 from server.routers import dynamic, index, ingest, markdown_api
 
@@ -28,13 +32,23 @@ logger = get_logger(__name__)
 # Initialize rate limiter
 limiter = Limiter(key_func=get_remote_address)
 
+cache_maintenance = CacheMaintenance()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     """Run startup/shutdown tasks for the application."""
-    logger.info("Running startup cache cleanup")
-    cleanup_cache()
-    yield
+    if cache_maintenance.interval_s > 0:
+        cache_maintenance.start()
+    else:
+        logger.info("Running startup cache cleanup")
+        cleanup_cache()
+    await open_http_client()
+    try:
+        yield
+    finally:
+        await cache_maintenance.stop()
+        await close_http_client()
 
 
 # Initialize the FastAPI application
@@ -61,6 +75,23 @@ async def health_check() -> dict[str, str]:
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> dict[str, dict]:
+    """Report internal counters for this worker process.
+
+    **Returns**
+
+    - **dict[str, dict]**: Outbound fetch queue depth, wait times and backoff state,
+      background cache maintenance counters and in-memory cache usage
+
+    """
+    return {
+        "fetch": outbound_scheduler.metrics(),
+        "cache_maintenance": cache_maintenance.metrics(),
+        "memory_cache": memory_cache.metrics(),
+    }
+
+
 @app.head("/", include_in_schema=False)
 async def head_root() -> HTMLResponse:
     """Respond to HTTP HEAD requests for the root URL.
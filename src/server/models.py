@@ -85,7 +85,7 @@ class IngestSuccessResponse(BaseModel):
     title: str | None = Field(default=None, description="Paper title")
     source_url: str | None = Field(default=None, description="Canonical arXiv abstract URL")
     summary: str = Field(..., description="Ingestion summary with token estimates")
-    digest_url: str = Field(..., description="URL to download the full digest content")
+    digest_url: str | None = Field(default=None, description="URL to download the full digest content")
     tree: str = Field(..., description="Section tree structure")
     sections_tree: str | None = Field(default=None, description="Section tree (alias for tree)")
     content: str = Field(..., description="Processed markdown content")
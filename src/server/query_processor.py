@@ -2,13 +2,13 @@
 
 from __future__ import annotations
 
+import asyncio
 from typing import TYPE_CHECKING, cast
 
-from arxiv2md.cache import evict_if_needed
-from arxiv2md.config import ARXIV2MD_CACHE_PATH
 from arxiv2md.ingestion import ingest_paper
 from arxiv2md.query_parser import parse_arxiv_input
 from arxiv2md.utils.logging_config import get_logger
+from server.digest_store import store_digest
 from server.models import IngestErrorResponse, IngestResponse, IngestSuccessResponse, PatternType
 from server.server_config import MAX_DISPLAY_SIZE
 
@@ -18,17 +18,8 @@ if TYPE_CHECKING:
     from arxiv2md.schemas.query import ArxivQuery
 
 
-def _store_digest_content(query: ArxivQuery, digest_content: str) -> None:
-    """Store digest content locally under the cache directory."""
-    evict_if_needed()
-    cache_dir = ARXIV2MD_CACHE_PATH / str(query.id)
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    local_txt_file = cache_dir / "digest.txt"
-    local_txt_file.write_text(digest_content, encoding="utf-8")
-
-
 def _generate_digest_url(query: ArxivQuery) -> str:
-    """Generate the digest URL for the local cache."""
+    """Generate the digest URL for the cached digest."""
     return f"/api/download/file/{query.id}"
 
 
@@ -45,8 +36,14 @@ async def process_query(
     pattern: str | None = None,
     token: str | None = None,
     include_frontmatter: bool = False,
+    store_digest_content: bool = True,
 ) -> IngestResponse:
-    """Process an arXiv query and return a markdown summary."""
+    """Process an arXiv query and return a markdown summary.
+
+    The downloadable digest is only stored, and ``digest_url`` only set, when
+    ``store_digest_content`` is True; callers that never hand out the URL
+    should pass False.
+    """
     # These parameters are kept for API compatibility but not used
     _ = max_file_size, pattern_type, pattern
 
@@ -85,8 +82,8 @@ async def process_query(
         summary = result.summary
         tree = result.sections_tree
         content = result.content
-        digest_content = tree + "\n" + content
-        _store_digest_content(query, digest_content)
+        if store_digest_content:
+            await asyncio.to_thread(store_digest, str(query.id), tree + "\n" + content)
     except Exception as exc:
         logger.error("Query processing failed", extra={"url": query.html_url, "error": str(exc)})
         return IngestErrorResponse(error=str(exc))
@@ -98,7 +95,7 @@ async def process_query(
         )
 
     _log_success(url=query.html_url, summary=summary)
-    digest_url = _generate_digest_url(query)
+    digest_url = _generate_digest_url(query) if store_digest_content else None
 
     return IngestSuccessResponse(
         arxiv_id=query.arxiv_id,
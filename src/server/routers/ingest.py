@@ -1,15 +1,16 @@
 """Ingest endpoint for the API."""
 
+import asyncio
 from typing import Union
 from uuid import UUID
 
 from fastapi import APIRouter, HTTPException, Request, status
-from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
+from fastapi.responses import JSONResponse, RedirectResponse, Response
 
-from arxiv2md.config import ARXIV2MD_CACHE_PATH
+from server.digest_store import load_digest
 from server.models import IngestRequest
 from server.routers_utils import COMMON_INGEST_RESPONSES, _perform_ingestion
-from server.server_config import DEFAULT_FILE_SIZE_KB
+from server.server_config import DEFAULT_FILE_SIZE_KB, DIGEST_FILENAME
 
 router = APIRouter()
 
@@ -96,11 +97,11 @@ async def api_ingest_get(
 @router.get("/api/download/file/{ingest_id}", response_model=None)
 async def download_ingest(
     ingest_id: UUID,
-) -> Union[RedirectResponse, FileResponse]:  # noqa: FA100 (future-rewritable-type-annotation) (pydantic)
-    """Download the first text file produced for an ingest ID.
+) -> Union[RedirectResponse, Response]:  # noqa: FA100 (future-rewritable-type-annotation) (pydantic)
+    """Download the digest produced for an ingest ID.
 
-    **This endpoint retrieves the first ``*.txt`` file produced during the ingestion process**
-    and returns it as a downloadable file from the local cache directory.
+    **This endpoint retrieves the digest stored during the ingestion process**
+    and returns it as a downloadable text file from the cache backend.
 
     **Parameters**
 
@@ -108,35 +109,19 @@ async def download_ingest(
 
     **Returns**
 
-    - **FileResponse**: Streamed response with media type ``text/plain`` for local files
+    - **Response**: The digest with media type ``text/plain``
 
     **Raises**
 
-    - **HTTPException**: **404** - digest directory is missing or contains no ``*.txt`` file
-    - **HTTPException**: **403** - the process lacks permission to read the directory or file
+    - **HTTPException**: **404** - no digest is stored for the ingest ID
 
     """
-    # Fall back to local file serving
-    # Normalize and validate the directory path
-    directory = (ARXIV2MD_CACHE_PATH / str(ingest_id)).resolve()
-    if not str(directory).startswith(str(ARXIV2MD_CACHE_PATH.resolve())):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"Invalid ingest ID: {ingest_id!r}")
-
-    if not directory.is_dir():
+    digest = await asyncio.to_thread(load_digest, str(ingest_id))
+    if digest is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Digest {ingest_id!r} not found")
 
-    try:
-        first_txt_file = next(directory.glob("*.txt"))
-    except StopIteration as exc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"No .txt file found for digest {ingest_id!r}",
-        ) from exc
-
-    try:
-        return FileResponse(path=first_txt_file, media_type="text/plain", filename=first_txt_file.name)
-    except PermissionError as exc:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"Permission denied for {first_txt_file}",
-        ) from exc
+    return Response(
+        content=digest,
+        media_type="text/plain",
+        headers={"Content-Disposition": f'attachment; filename="{DIGEST_FILENAME}"'},
+    )
@@ -1,12 +1,16 @@
 """Simple GET API endpoints for markdown conversion."""
 
+from collections.abc import AsyncIterator
 from typing import Any
 
 from fastapi import APIRouter, Query, Request, status
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
+from arxiv2md.fetch import HtmlNotAvailableError
+from arxiv2md.query_parser import parse_arxiv_input
+from arxiv2md.streaming import stream_paper
 from server.models import IngestErrorResponse, MarkdownJsonResponse
 from server.query_processor import process_query
 
@@ -54,6 +58,7 @@ async def api_json(
             remove_inline_citations=remove_citations,
             section_filter_mode="exclude",
             sections=[],
+            store_digest_content=False,
         )
 
         if isinstance(result, IngestErrorResponse):
@@ -103,6 +108,7 @@ async def api_markdown(
             remove_inline_citations=remove_citations,
             section_filter_mode="exclude",
             sections=[],
+            store_digest_content=False,
             include_frontmatter=frontmatter,
         )
 
@@ -122,3 +128,54 @@ async def api_markdown(
 
     except Exception as exc:
         return PlainTextResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content=f"Error: {exc!s}")
+
+
+@router.get("/api/markdown/stream", responses=COMMON_API_RESPONSES)
+@limiter.limit("30/minute")
+async def api_markdown_stream(
+    request: Request,
+    url: str = Query(..., description="arXiv URL or ID (e.g., https://arxiv.org/abs/2301.07041 or 2301.07041)"),
+    remove_refs: bool = Query(default=True, description="Remove references section"),
+    remove_citations: bool = Query(default=True, description="Remove inline citations"),
+) -> Response:
+    """Convert an arXiv paper to markdown, sending each section as soon as it is converted.
+
+    Conversion runs while the paper is still downloading from arXiv, so the
+    first sections arrive before the whole page has. The body matches
+    ``/api/markdown`` without a table of contents or frontmatter.
+
+    **Example:**
+    ```
+    GET /api/markdown/stream?url=2301.07041
+    ```
+
+    **Returns:** Plain text markdown content, streamed.
+    """
+    try:
+        query = parse_arxiv_input(url)
+        blocks = stream_paper(
+            arxiv_id=query.arxiv_id,
+            version=query.version,
+            html_url=query.html_url,
+            ar5iv_url=query.ar5iv_url,
+            remove_refs=remove_refs,
+            remove_inline_citations=remove_citations,
+        )
+        # Wait for the first block so fetch errors still get an error status.
+        first = await anext(blocks, None)
+    except ValueError as ve:
+        return PlainTextResponse(status_code=status.HTTP_400_BAD_REQUEST, content=f"Validation error: {ve!s}")
+    except HtmlNotAvailableError as exc:
+        return PlainTextResponse(status_code=status.HTTP_400_BAD_REQUEST, content=f"Error: {exc!s}")
+    except Exception as exc:
+        return PlainTextResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content=f"Error: {exc!s}")
+
+    return StreamingResponse(_join_blocks(first, blocks), media_type="text/plain; charset=utf-8")
+
+
+async def _join_blocks(first: str | None, blocks: AsyncIterator[str]) -> AsyncIterator[str]:
+    if first is None:
+        return
+    yield first
+    async for block in blocks:
+        yield "\n\n" + block
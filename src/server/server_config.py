@@ -9,6 +9,11 @@ from fastapi.templating import Jinja2Templates
 
 MAX_DISPLAY_SIZE: int = 300_000
 
+# Blob name of a downloadable digest, stored once per distinct content.
+DIGEST_FILENAME: str = "digest.txt"
+# Blob name of the alias from an ingest ID to the digest's content hash.
+DIGEST_REF_FILENAME: str = "digest.ref"
+
 # Slider configuration (if updated, update the logSliderToSize function in src/static/js/utils.js)
 DEFAULT_FILE_SIZE_KB: int = 5 * 1024  # 5 mb
 MAX_FILE_SIZE_KB: int = 100 * 1024  # 100 mb
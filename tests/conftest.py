@@ -5,7 +5,22 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
+
+
+@pytest.fixture
+def cache_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Point every module that reads the cache location at a temporary directory."""
+    from arxiv2md import cache
+    from arxiv2md.memory_cache import memory_cache
+
+    memory_cache.clear()
+    cache._pending_accesses.clear()
+    path = tmp_path / "cache"
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_PATH", path)
+    return path
@@ -0,0 +1,263 @@
+"""Tests for cache maintenance and storage format."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from arxiv2md import cache, cache_maintenance, compression
+from arxiv2md.cache_maintenance import CacheMaintenance
+from arxiv2md.compression import HTML_BASENAME, blob_name, decompress, find_blob
+from arxiv2md.utils.file_lock import FileLock
+
+HTML = b"<html>" + b"<p>repetitive LaTeXML markup</p>" * 200 + b"</html>"
+
+
+def _seed_entry(cache_path: Path, key: str = "2501.11120__v1", *, mtime: float | None = None) -> Path:
+    entry = cache_path / key
+    entry.mkdir(parents=True)
+    html_path = entry / "source.html"
+    html_path.write_bytes(HTML)
+    if mtime is not None:
+        os.utime(html_path, (mtime, mtime))
+    return entry
+
+
+@pytest.mark.parametrize("codec", ["gzip", "zstd"])
+def test_migrate_compression_rewrites_entries(cache_path: Path, monkeypatch: pytest.MonkeyPatch, codec: str) -> None:
+    if codec == "zstd" and compression.zstandard is None:
+        pytest.skip("zstandard not installed")
+    monkeypatch.setattr(compression, "ARXIV2MD_CACHE_COMPRESSION", codec)
+    entry = _seed_entry(cache_path, mtime=1_700_000_000)
+
+    assert cache.migrate_compression() == 1
+    assert cache.migrate_compression() == 0
+
+    backend = cache.get_backend()
+    name, info = find_blob(backend, entry.name, HTML_BASENAME)
+    assert name == blob_name(HTML_BASENAME, codec)
+    assert backend.names(entry.name) == [name]
+    assert decompress(backend.read(entry.name, name), codec) == HTML
+    assert info.mtime == 1_700_000_000
+    # Size accounting sees the compressed bytes.
+    assert cache.get_cache_size_bytes() < len(HTML) // 5
+
+
+def test_legacy_uncompressed_entry_is_readable(cache_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(compression, "ARXIV2MD_CACHE_COMPRESSION", "gzip")
+    entry = _seed_entry(cache_path)
+
+    name, _ = find_blob(cache.get_backend(), entry.name, HTML_BASENAME)
+    assert name == "source.html"
+    assert cache.get_backend().read(entry.name, name) == HTML
+
+
+def test_index_tracks_size_and_evicts_least_recently_used(cache_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_EVICTION_POLICY", "lru")
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_LOW_WATERMARK", 1.0)
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_MAX_SIZE_MB", 1)
+    entries = [_seed_entry(cache_path, f"2501.0000{i}__v1") for i in range(3)]
+    for entry in entries:
+        cache.record_entry(entry.name)
+    assert cache.get_cache_size_bytes() == 3 * len(HTML)
+
+    # Reading the oldest entry makes the middle one the eviction candidate.
+    cache.touch_entry(entries[0].name)
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_MAX_SIZE_MB", 2.5 * len(HTML) / (1024 * 1024))
+
+    assert cache.evict_if_needed() == 1
+    assert not entries[1].exists()
+    assert entries[0].exists() and entries[2].exists()
+    assert cache.get_cache_size_bytes() == 2 * len(HTML)
+
+
+def test_gdsf_keeps_hot_expensive_entries(cache_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_EVICTION_POLICY", "gdsf")
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_LOW_WATERMARK", 1.0)
+    hot = _seed_entry(cache_path, "2501.00001__v1")
+    cache.record_entry(hot.name, fetched_bytes=20 * len(HTML))
+    cache.record_parse_time(hot.name, 0.5)
+    for _ in range(10):
+        cache.touch_entry(hot.name)
+    # Written and read after the hot entry, but only once and cheap to rebuild.
+    recent = _seed_entry(cache_path, "2501.00002__v1")
+    cache.record_entry(recent.name, fetched_bytes=len(HTML))
+    cache.touch_entry(recent.name)
+
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_MAX_SIZE_MB", 1.5 * len(HTML) / (1024 * 1024))
+    assert cache.evict_if_needed() == 1
+    assert hot.exists() and not recent.exists()
+    # The clock advanced past the evicted entry, ageing out stale popularity.
+    assert cache.get_index().clock() > 0
+
+
+def test_maintenance_evicts_between_watermarks(cache_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_EVICTION_POLICY", "lru")
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_HIGH_WATERMARK", 0.9)
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_LOW_WATERMARK", 0.5)
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_MAX_SIZE_MB", 10 * len(HTML) / (1024 * 1024))
+    entries = [_seed_entry(cache_path, f"2501.0000{i}__v1") for i in range(9)]
+    for entry in entries:
+        cache.record_entry(entry.name)
+
+    # At 90% of the limit: under the hard max the request path leaves it alone.
+    assert cache.evict_if_needed() == 0
+    assert cache.run_maintenance() == (0, 0)
+
+    cache.record_entry(_seed_entry(cache_path, "2501.00009__v1").name)
+    lock = FileLock(cache_path / ".locks" / "maintenance.lock")
+    assert lock.acquire(blocking=False)
+    try:
+        # Another worker is already running maintenance.
+        assert cache.run_maintenance() is None
+    finally:
+        lock.release()
+
+    assert cache.run_maintenance() == (0, 5)
+    assert [entry.exists() for entry in entries[:6]] == [False] * 5 + [True]
+    assert cache.get_cache_size_bytes() == 5 * len(HTML)
+
+
+def test_fetch_locks_are_removed_with_their_entries(cache_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_TTL_SECONDS", 60)
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_STALE_WHILE_REVALIDATE_S", 0)
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_STALE_IF_ERROR_S", 0)
+    _seed_entry(cache_path, "2501.00001__v1", mtime=1_700_000_000)
+    _seed_entry(cache_path, "2501.00002__v1")
+    cache.reconcile_index()
+    locks = {key: cache.fetch_lock(key) for key in ("2501.00001__v1", "2501.00002__v1", "2501.00003__v1", "held")}
+    for lock in locks.values():
+        assert lock.acquire()
+        lock.release()
+    assert locks["held"].acquire()
+
+    try:
+        assert cache.run_maintenance() == (1, 0)
+    finally:
+        locks["held"].release()
+
+    # The expired entry's lock went with it, as did the lock of a paper that was
+    # never cached; the cached paper's lock and the held one stay.
+    assert {key for key, lock in locks.items() if lock.path.exists()} == {"2501.00002__v1", "held"}
+    assert len(list((cache_path / ".locks").glob("*/*/*.lock"))) == 2
+    assert cache.sweep_fetch_locks() == 1
+    assert not locks["held"].path.parent.exists()
+
+
+def test_downloads_spool_outside_entries(cache_path: Path) -> None:
+    backend = cache.get_backend()
+    backend.write("2501.00001__v1", "source_url.txt", b"https://arxiv.org/html/2501.00001v1")
+    spool = backend.spool_dir("2501.00001__v1")
+    spool.mkdir(parents=True, exist_ok=True)
+    abandoned = spool / "source.html.gz.abc.part"
+    abandoned.write_bytes(b"partial")
+    os.utime(abandoned, (1, 1))
+    in_progress = spool / "source.html.gz.def.part"
+    in_progress.write_bytes(b"partial")
+
+    assert backend.names("2501.00001__v1") == ["source_url.txt"]
+    assert backend.keys() == ["2501.00001__v1"]
+    assert cache.run_maintenance() == (0, 0)
+    assert not abandoned.exists()
+    assert in_progress.exists()
+
+
+async def test_waiter_relocks_a_lock_file_removed_under_it(cache_path: Path) -> None:
+    holder = cache.fetch_lock("2501.00001__v1")
+    assert holder.acquire()
+    waiter = cache.fetch_lock("2501.00001__v1")
+    waiting = asyncio.create_task(asyncio.to_thread(waiter.acquire))
+    await asyncio.sleep(0.1)  # let the waiter open the file and block on it
+
+    # What _remove_lock_file does: unlink while holding the lock, then release.
+    holder.path.unlink()
+    holder.release()
+    assert await waiting
+
+    # The waiter holds the file now at the path, so nobody else can take it.
+    try:
+        assert waiter.path.exists()
+        assert not cache.fetch_lock("2501.00001__v1").acquire(blocking=False)
+    finally:
+        waiter.release()
+
+
+async def test_background_maintenance_runs_off_request_path(cache_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_TTL_SECONDS", 60)
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_STALE_WHILE_REVALIDATE_S", 0)
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_STALE_IF_ERROR_S", 0)
+    expired = _seed_entry(cache_path, "2501.00001__v1", mtime=1_700_000_000)
+    maintenance = CacheMaintenance(interval_s=3600)
+
+    maintenance.start()
+    for _ in range(100):
+        if maintenance.metrics()["runs"]:
+            break
+        await asyncio.sleep(0.01)
+    await maintenance.stop()
+
+    assert not expired.exists()
+    assert maintenance.metrics()["purged"] == 1
+    assert not maintenance.running
+
+
+async def test_writes_wake_maintenance_instead_of_evicting_inline(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_HIGH_WATERMARK", 0.9)
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_LOW_WATERMARK", 0.5)
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_MAX_SIZE_MB", 4 * len(HTML) / (1024 * 1024))
+    maintenance = CacheMaintenance(interval_s=3600)
+    maintenance.start()
+    try:
+        while not maintenance.metrics()["runs"]:
+            await asyncio.sleep(0.01)
+        for i in range(5):
+            cache.record_entry(_seed_entry(cache_path, f"2501.0000{i}__v1").name)
+            cache_maintenance.request_eviction()
+        # Nothing was evicted on the request path itself.
+        assert cache.get_cache_size_bytes() == 5 * len(HTML)
+
+        for _ in range(100):
+            if maintenance.metrics()["evicted"]:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await maintenance.stop()
+
+    assert maintenance.metrics()["runs"] == 2
+    assert cache.get_cache_size_bytes() == 2 * len(HTML)
+
+
+async def test_writes_evict_in_a_thread_without_maintenance(cache_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_LOW_WATERMARK", 0.5)
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_MAX_SIZE_MB", 2 * len(HTML) / (1024 * 1024))
+    for i in range(3):
+        cache.record_entry(_seed_entry(cache_path, f"2501.0000{i}__v1").name)
+
+    cache_maintenance.request_eviction()
+    assert cache.get_cache_size_bytes() == 3 * len(HTML)
+    await cache_maintenance._fallback
+
+    assert cache.get_cache_size_bytes() == len(HTML)
+
+
+def test_reconcile_rebuilds_index_from_disk(cache_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_TTL_SECONDS", 60)
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_STALE_WHILE_REVALIDATE_S", 0)
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_STALE_IF_ERROR_S", 0)
+    fresh = _seed_entry(cache_path, "2501.00001__v1")
+    cache.record_entry(fresh.name)
+    # Written behind the index's back, e.g. by an older release.
+    expired = _seed_entry(cache_path, "2501.00002__v1", mtime=1_700_000_000)
+    assert cache.get_cache_size_bytes() == len(HTML)
+
+    assert cache.reconcile_index() == 2
+    assert cache.get_cache_size_bytes() == 2 * len(HTML)
+
+    assert cache.purge_expired_entries() == 1
+    assert not expired.exists() and fresh.exists()
+    assert cache.get_cache_size_bytes() == len(HTML)
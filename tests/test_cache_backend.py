@@ -0,0 +1,328 @@
+"""Tests for the cache storage backends."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import socketserver
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+import httpx
+import pytest
+
+from arxiv2md import cache, fetch, ingestion
+from arxiv2md.cache_backend import (
+    _REDIS_DELETE_SCRIPT,
+    CacheBackend,
+    FilesystemBackend,
+    RedisBackend,
+    RedisError,
+    SqliteBackend,
+    shard_for,
+)
+from arxiv2md.memory_cache import memory_cache
+
+HTML_URL = "https://arxiv.org/html/2501.11120v1"
+
+
+class _FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Just enough of the Redis protocol for :class:`RedisBackend`."""
+
+    def handle(self) -> None:
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = [self._read_bulk() for _ in range(int(line[1:]))]
+            self.wfile.write(self._execute(args[0].upper().decode(), args[1:]))
+
+    def _read_bulk(self) -> bytes:
+        length = int(self.rfile.readline()[1:])
+        return self.rfile.read(length + 2)[:-2]
+
+    def _execute(self, command: str, args: list[bytes]) -> bytes:
+        data = self.server.data
+        with self.server.lock:
+            if command in {"PING", "SELECT"}:
+                return b"+OK\r\n"
+            if command == "HSET":
+                fields = data.setdefault(args[0], {})
+                fields.update(zip(args[1::2], args[2::2]))
+                return b":1\r\n"
+            if command == "HGET":
+                return _bulk(data.get(args[0], {}).get(args[1]))
+            if command == "HSTRLEN":
+                return b":%d\r\n" % len(data.get(args[0], {}).get(args[1], b""))
+            if command == "HEXISTS":
+                return b":%d\r\n" % (args[1] in data.get(args[0], {}))
+            if command == "HDEL":
+                fields = data.get(args[0], {})
+                return b":%d\r\n" % sum(fields.pop(field, None) is not None for field in args[1:])
+            if command == "HKEYS":
+                return _array(list(data.get(args[0], {})))
+            if command == "SADD":
+                data.setdefault(args[0], set()).update(args[1:])
+                return b":1\r\n"
+            if command == "SREM":
+                data.get(args[0], set()).difference_update(args[1:])
+                return b":1\r\n"
+            if command == "SMEMBERS":
+                return _array(sorted(data.get(args[0], set())))
+            if command == "DEL":
+                return b":%d\r\n" % sum(data.pop(key, None) is not None for key in args)
+            if command == "EVAL" and args[0] == _REDIS_DELETE_SCRIPT.encode():
+                entry, entries, key, *fields = args[2:]
+                remaining = data.get(entry, {})
+                for field in fields:
+                    remaining.pop(field, None)
+                if not remaining:
+                    data.pop(entry, None)
+                    data.get(entries, set()).discard(key)
+                return b":0\r\n"
+        return b"-ERR unknown command '%s'\r\n" % command.encode()
+
+
+def _bulk(value: bytes | None) -> bytes:
+    return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _array(values: list[bytes]) -> bytes:
+    return b"*%d\r\n" % len(values) + b"".join(_bulk(value) for value in values)
+
+
+@pytest.fixture
+def redis_url() -> Iterator[str]:
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _FakeRedisHandler)
+    server.daemon_threads = True
+    server.data = {}
+    server.lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"redis://127.0.0.1:{server.server_address[1]}/0"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture(params=["fs", "sqlite", "redis"])
+def backend(request: pytest.FixtureRequest, tmp_path: Path) -> Iterator[CacheBackend]:
+    spool = tmp_path / ".spool"
+    if request.param == "fs":
+        backend = FilesystemBackend(tmp_path)
+    elif request.param == "sqlite":
+        backend = SqliteBackend(tmp_path / "entries.sqlite3", spool=spool)
+    else:
+        backend = RedisBackend(request.getfixturevalue("redis_url"), spool=spool)
+    yield backend
+    backend.close()
+
+
+def test_backend_contract(backend: CacheBackend) -> None:
+    assert backend.read("2501.11120__v1", "source.html.gz") is None
+    assert backend.info("2501.11120__v1", "source.html.gz") is None
+
+    backend.write("2501.11120__v1", "source.html.gz", b"compressed page", mtime=1_700_000_000)
+    backend.write("2501.11120__v1", "results/abc.json", b"{}")
+    backend.write("2501.22222__v2", "source_url.txt", b"https://arxiv.org/html/2501.22222v2")
+
+    assert backend.read("2501.11120__v1", "source.html.gz") == b"compressed page"
+    info = backend.info("2501.11120__v1", "source.html.gz")
+    assert (info.size, info.mtime) == (len(b"compressed page"), 1_700_000_000)
+    assert sorted(backend.names("2501.11120__v1")) == ["results/abc.json", "source.html.gz"]
+    assert sorted(backend.keys()) == ["2501.11120__v1", "2501.22222__v2"]
+    assert backend.entry_size("2501.11120__v1") == len(b"compressed page") + 2
+
+    backend.touch("2501.11120__v1", "source.html.gz")
+    assert backend.info("2501.11120__v1", "source.html.gz").mtime > 1_700_000_000
+    assert backend.entry_mtime("2501.11120__v1") > 1_700_000_000
+
+    spooled = backend.spool_dir("2501.11120__v1") / "download.part"
+    spooled.parent.mkdir(parents=True, exist_ok=True)
+    spooled.write_bytes(b"new page")
+    backend.write_file("2501.11120__v1", "source.html", spooled)
+    assert backend.read("2501.11120__v1", "source.html") == b"new page"
+    assert not spooled.exists()
+
+    backend.delete("2501.11120__v1", ["results/abc.json", "missing.json"])
+    assert sorted(backend.names("2501.11120__v1")) == ["source.html", "source.html.gz"]
+
+    backend.delete_entry("2501.11120__v1")
+    assert backend.names("2501.11120__v1") == []
+    assert backend.keys() == ["2501.22222__v2"]
+
+
+def test_redis_delete_drops_emptied_entries(redis_url: str, tmp_path: Path) -> None:
+    backend = RedisBackend(redis_url, spool=tmp_path / ".spool")
+    backend.write("2501.11120__v1", "source.html", b"page")
+    backend.write("2501.11120__v1", "source_url.txt", HTML_URL.encode())
+
+    backend.delete("2501.11120__v1", ["source.html"])
+    assert backend.keys() == ["2501.11120__v1"]
+    backend.delete("2501.11120__v1", ["source_url.txt"])
+    assert backend.keys() == []
+    backend.close()
+
+
+def test_redis_closes_the_socket_when_setup_fails(redis_url: str, tmp_path: Path) -> None:
+    # The fake server rejects AUTH, like a server given the wrong password.
+    backend = RedisBackend(redis_url.replace("//", "//:secret@"), spool=tmp_path / ".spool")
+    with pytest.raises(RedisError):
+        backend.read("2501.11120__v1", "source.html")
+    assert backend._local.socket is None
+
+
+async def test_redis_round_trips_stay_off_the_event_loop(
+    redis_url: str, cache_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_BACKEND", "redis")
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_REDIS_URL", redis_url)
+    monkeypatch.setattr(
+        fetch,
+        "_build_http_client",
+        lambda: httpx.AsyncClient(
+            transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, headers={"content-type": "text/html"}, text="<html>ok</html>")
+            )
+        ),
+    )
+    on_loop: list[tuple] = []
+    pipeline = RedisBackend._pipeline
+
+    def recording_pipeline(self: RedisBackend, commands: list[tuple]) -> list[object]:
+        try:
+            asyncio.get_running_loop()
+            on_loop.extend(commands)
+        except RuntimeError:
+            pass
+        return pipeline(self, commands)
+
+    monkeypatch.setattr(RedisBackend, "_pipeline", recording_pipeline)
+    try:
+        for _ in range(2):
+            memory_cache.clear()
+            assert await fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1") == (
+                "<html>ok</html>",
+                HTML_URL,
+            )
+            result, _ = await ingestion.ingest_paper(
+                arxiv_id="2501.11120v1",
+                version="v1",
+                html_url=HTML_URL,
+                remove_refs=False,
+                remove_toc=True,
+                section_filter_mode="exclude",
+                sections=[],
+            )
+            assert result.content == ""
+    finally:
+        await fetch.close_http_client()
+
+    assert on_loop == []
+
+
+@pytest.mark.parametrize("backend_name", ["sqlite", "redis"])
+async def test_nodes_share_a_warm_cache(
+    backend_name: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, request: pytest.FixtureRequest
+) -> None:
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_BACKEND", backend_name)
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_SQLITE_PATH", tmp_path / "shared.sqlite3")
+    if backend_name == "redis":
+        monkeypatch.setattr(cache, "ARXIV2MD_CACHE_REDIS_URL", request.getfixturevalue("redis_url"))
+    requests: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, headers={"content-type": "text/html"}, text="<html>shared</html>")
+
+    monkeypatch.setattr(
+        fetch, "_build_http_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    )
+    try:
+        # Each node has its own local cache path (index, locks, spool) and memory.
+        for node in ("node-a", "node-b"):
+            monkeypatch.setattr(cache, "ARXIV2MD_CACHE_PATH", tmp_path / node)
+            memory_cache.clear()
+            result = await fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1")
+            assert result == ("<html>shared</html>", HTML_URL)
+    finally:
+        await fetch.close_http_client()
+
+    assert len(requests) == 1
+    assert not any((tmp_path / node / "2501.11120__v1").exists() for node in ("node-a", "node-b"))
+
+
+def test_import_directory_into_sqlite(cache_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    for key in ("2501.00001__v1", "2501.00002__v1"):
+        entry = cache_path / key
+        (entry / "results").mkdir(parents=True)
+        (entry / "source.html.gz").write_bytes(b"page " + key.encode())
+        (entry / "results" / "abc.json").write_bytes(b"{}")
+        (entry / "source.html.gz.tmp1.part").write_bytes(b"interrupted download")
+        os.utime(entry / "source.html.gz", (1_700_000_000, 1_700_000_000))
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_BACKEND", "sqlite")
+    monkeypatch.setattr(cache, "ARXIV2MD_CACHE_SQLITE_PATH", None)
+
+    assert cache.main(["import", str(cache_path), "--remove"]) is None
+
+    backend = cache.get_backend()
+    assert isinstance(backend, SqliteBackend)
+    assert backend.path == cache_path / "entries.sqlite3"
+    assert sorted(backend.keys()) == ["2501.00001__v1", "2501.00002__v1"]
+    assert backend.read("2501.00001__v1", "source.html.gz") == b"page 2501.00001__v1"
+    assert backend.info("2501.00001__v1", "source.html.gz").mtime == 1_700_000_000
+    assert sorted(backend.names("2501.00002__v1")) == ["results/abc.json", "source.html.gz"]
+    assert not (cache_path / "2501.00001__v1").exists()
+    assert cache.get_cache_size_bytes() == 2 * (len(b"page 2501.00001__v1") + 2)
+
+
+def test_sqlite_readers_see_whole_blobs_during_writes(tmp_path: Path) -> None:
+    backend = SqliteBackend(tmp_path / "entries.sqlite3", spool=tmp_path / ".spool")
+    versions = [bytes([value]) * 256_000 for value in range(8)]
+    backend.write("2501.11120__v1", "source.html", versions[0])
+    seen: list[bytes] = []
+    done = threading.Event()
+
+    def reader() -> None:
+        # Each thread has its own connection, like separate worker processes.
+        while not done.is_set():
+            seen.append(backend.read("2501.11120__v1", "source.html"))
+        backend.close()
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for data in versions[1:]:
+        backend.write("2501.11120__v1", "source.html", data)
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    assert seen and all(data in versions for data in seen)
+
+
+def test_filesystem_layout_migrates_to_shards(cache_path: Path) -> None:
+    legacy = cache_path / "2501.00001__v1"
+    legacy.mkdir(parents=True)
+    (legacy / "source.html").write_bytes(b"old layout")
+    backend = cache.get_backend()
+    assert isinstance(backend, FilesystemBackend)
+    backend.write("2501.00002__v1", "source.html", b"new layout")
+
+    sharded = cache_path / shard_for("2501.00002__v1") / "2501.00002__v1"
+    assert (sharded / "source.html").read_bytes() == b"new layout"
+    # Flat entries are still found, and updated where they are.
+    assert sorted(backend.keys()) == ["2501.00001__v1", "2501.00002__v1"]
+    backend.write("2501.00001__v1", "source_url.txt", b"https://arxiv.org/html/2501.00001v1")
+    assert (legacy / "source_url.txt").exists()
+
+    assert cache.main(["shard"]) is None
+    assert cache.migrate_layout() == 0
+    assert not legacy.exists()
+    assert backend.read("2501.00001__v1", "source.html") == b"old layout"
+    assert sorted(backend.keys()) == ["2501.00001__v1", "2501.00002__v1"]
+
+    backend.delete_entry("2501.00002__v1")
+    assert not (cache_path / shard_for("2501.00002__v1").parts[0]).exists()
@@ -0,0 +1,48 @@
+"""Tests for the eviction policy simulator."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from arxiv2md.cache_sim import Request, read_access_log, simulate
+
+
+def _trace() -> list[Request]:
+    # One expensive paper read constantly, amid a scan of one-off cheap ones.
+    hot = Request(key="hot", size=100, cost=50.0)
+    requests = []
+    for i in range(50):
+        requests.append(hot)
+        requests.append(Request(key=f"cold-{i}", size=100, cost=1.0))
+        requests.append(Request(key=f"cold-{i}-b", size=100, cost=1.0))
+    return requests
+
+
+def test_gdsf_saves_more_cost_than_lru() -> None:
+    lru = simulate(_trace(), policy="lru", capacity_bytes=200)
+    gdsf = simulate(_trace(), policy="gdsf", capacity_bytes=200)
+
+    assert lru.hits == 0
+    assert gdsf.hits == 49
+    assert gdsf.cost_saved_ratio > 0.9
+
+
+def test_unknown_policy_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        simulate([], policy="random", capacity_bytes=1)
+
+
+def test_read_access_log(tmp_path: Path) -> None:
+    log = tmp_path / "access.jsonl"
+    events = [
+        {"op": "access", "key": "unknown"},
+        {"op": "write", "key": "a", "size": 1000, "fetched_bytes": 4000},
+        {"op": "parse", "key": "a", "seconds": 0.25},
+        {"op": "access", "key": "a"},
+    ]
+    log.write_text("\n".join(json.dumps(event) for event in events) + "\nnot json\n", encoding="utf-8")
+
+    assert list(read_access_log(log, bytes_per_s=1000)) == [Request(key="a", size=1000, cost=4.25)]
@@ -0,0 +1,510 @@
+"""Tests for fetching and caching arXiv HTML."""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+import gzip
+import json
+import os
+import time
+from collections.abc import AsyncIterator, Callable
+from pathlib import Path
+
+import httpx
+import pytest
+
+from arxiv2md import cache, compression, fetch
+from arxiv2md.cache_backend import shard_for
+from arxiv2md.outbound import OutboundScheduler
+from arxiv2md.result_cache import RESULTS_DIRNAME
+from arxiv2md.utils.file_lock import FileLock
+
+Handler = Callable[[httpx.Request], httpx.Response]
+
+HTML_URL = "https://arxiv.org/html/2501.11120v1"
+AR5IV_URL = "https://ar5iv.labs.arxiv.org/html/2501.11120v1"
+
+
+def _cached_html(key: str) -> str:
+    found = fetch._find_html(key)
+    assert found is not None
+    return fetch.CachedHtml.from_blob(key, *found).read().decode("utf-8")
+
+
+def _html_response(text: str = "<html>ok</html>") -> httpx.Response:
+    return httpx.Response(200, headers={"content-type": "text/html"}, text=text)
+
+
+def _install_transport(
+    monkeypatch: pytest.MonkeyPatch,
+    handler: Handler,
+    *,
+    delay: float = 0.0,
+    host_delays: dict[str, float] | None = None,
+) -> list[httpx.Request]:
+    """Route the shared client through an in-memory transport and record requests."""
+    requests: list[httpx.Request] = []
+
+    async def recording_handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        request_delay = (host_delays or {}).get(request.url.host, delay)
+        if request_delay:
+            await asyncio.sleep(request_delay)
+        return handler(request)
+
+    def build_client() -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(recording_handler), follow_redirects=True)
+
+    monkeypatch.setattr(fetch, "_build_http_client", build_client)
+    return requests
+
+
+@pytest.fixture(autouse=True)
+def outbound_scheduler(monkeypatch: pytest.MonkeyPatch) -> OutboundScheduler:
+    """Give each test an unthrottled scheduler so pacing state does not leak."""
+    scheduler = OutboundScheduler(rate_per_s=0, burst=1, max_concurrency=8, max_retry_after_s=60)
+    monkeypatch.setattr(fetch, "outbound_scheduler", scheduler)
+    return scheduler
+
+
+@pytest.fixture
+async def http_client() -> AsyncIterator[None]:
+    """Close the shared client after each test."""
+    yield
+    await fetch.close_http_client()
+
+
+@pytest.fixture
+def mock_transport(monkeypatch: pytest.MonkeyPatch) -> list[httpx.Request]:
+    return _install_transport(monkeypatch, lambda request: _html_response())
+
+
+async def test_shared_client_is_reused(mock_transport: list[httpx.Request], tmp_path: Path) -> None:
+    first = fetch.get_http_client()
+    try:
+        assert fetch.get_http_client() is first
+        await fetch._fetch_with_retries(HTML_URL, dest_dir=tmp_path)
+        await fetch._fetch_with_retries(AR5IV_URL, dest_dir=tmp_path)
+        assert fetch.get_http_client() is first
+        assert len(mock_transport) == 2
+    finally:
+        await fetch.close_http_client()
+
+    assert first.is_closed
+
+
+async def test_client_recreated_after_close(mock_transport: list[httpx.Request]) -> None:
+    first = await fetch.open_http_client()
+    await fetch.close_http_client()
+    second = fetch.get_http_client()
+    try:
+        assert second is not first
+        assert not second.is_closed
+    finally:
+        await fetch.close_http_client()
+
+
+async def test_concurrent_fetches_are_coalesced(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    requests = _install_transport(monkeypatch, lambda request: _html_response("<html>paper</html>"), delay=0.05)
+
+    results = await asyncio.gather(
+        *(fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1") for _ in range(10))
+    )
+
+    assert len(requests) == 1
+    assert all(result == ("<html>paper</html>", HTML_URL) for result in results)
+    assert _cached_html("2501.11120__v1") == "<html>paper</html>"
+
+
+async def test_memory_hits_skip_the_backend_until_revalidation(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    _install_transport(monkeypatch, lambda request: _html_response("<html>paper</html>"))
+    await fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1")
+    lookups: list[str] = []
+    find_html = fetch._find_html
+    monkeypatch.setattr(fetch, "_find_html", lambda key: lookups.append(key) or find_html(key))
+
+    for _ in range(3):
+        assert await fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1") == (
+            "<html>paper</html>",
+            HTML_URL,
+        )
+    assert lookups == []
+    # Reads are counted in memory and reach the index when maintenance flushes them.
+    assert cache.get_index().get("2501.11120__v1").hits == 0
+    assert cache.flush_accesses() == 1
+    assert cache.get_index().get("2501.11120__v1").hits == 4
+
+    monkeypatch.setattr(fetch, "ARXIV2MD_MEMORY_CACHE_REVALIDATE_S", 0)
+    await fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1")
+    assert lookups == ["2501.11120__v1"]
+
+
+async def test_cache_filled_by_lock_holder_is_reused(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    requests = _install_transport(monkeypatch, lambda request: _html_response())
+    cache_dir = cache_path / "2501.11120__v1"
+    other_worker = FileLock(cache_path / ".locks" / shard_for("2501.11120__v1") / "2501.11120__v1.lock")
+    assert other_worker.acquire()
+
+    pending = asyncio.ensure_future(fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1"))
+    await asyncio.sleep(0.1)
+    assert not pending.done()
+
+    cache_dir.mkdir(parents=True)
+    (cache_dir / "source.html").write_text("<html>from other worker</html>", encoding="utf-8")
+    (cache_dir / "source_url.txt").write_text(AR5IV_URL, encoding="utf-8")
+    other_worker.release()
+
+    assert await pending == ("<html>from other worker</html>", AR5IV_URL)
+    assert requests == []
+
+
+def _seed_result(cache_dir: Path) -> Path:
+    rendered = cache_dir / RESULTS_DIRNAME / "result.json"
+    rendered.parent.mkdir()
+    rendered.write_text("{}", encoding="utf-8")
+    return rendered
+
+
+def _seed_cache(cache_path: Path, *, age_seconds: float = 0.0, validators: dict[str, str] | None = None) -> Path:
+    cache_dir = cache_path / "2501.11120__v1"
+    cache_dir.mkdir(parents=True)
+    html_path = cache_dir / "source.html"
+    html_path.write_text("<html>cached</html>", encoding="utf-8")
+    (cache_dir / "source_url.txt").write_text(HTML_URL, encoding="utf-8")
+    if validators is not None:
+        (cache_dir / "validators.json").write_text(json.dumps(validators), encoding="utf-8")
+    if age_seconds:
+        stale = time.time() - age_seconds
+        os.utime(html_path, (stale, stale))
+    return cache_dir
+
+
+async def test_forced_refresh_skips_revalidation(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    requests = _install_transport(monkeypatch, lambda request: _html_response("<html>fresh</html>"))
+    cache_dir = _seed_cache(cache_path, validators={"etag": '"abc"'})
+    (cache_dir / "no_html.json").write_text(json.dumps({"missing": [HTML_URL]}), encoding="utf-8")
+
+    result = await fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1", use_cache=False)
+
+    assert result == ("<html>fresh</html>", HTML_URL)
+    assert [request.url for request in requests] == [HTML_URL]
+    assert "if-none-match" not in requests[0].headers
+
+
+async def test_stale_entry_revalidated_with_304(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    monkeypatch.setattr(fetch, "ARXIV2MD_CACHE_STALE_WHILE_REVALIDATE_S", 0)
+    requests = _install_transport(monkeypatch, lambda request: httpx.Response(304))
+    cache_dir = _seed_cache(
+        cache_path,
+        age_seconds=fetch.ARXIV2MD_CACHE_TTL_SECONDS + 60,
+        validators={"etag": '"abc"', "last_modified": "Wed, 01 Jan 2025 00:00:00 GMT"},
+    )
+    rendered = _seed_result(cache_dir)
+
+    result = await fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1")
+
+    assert result == ("<html>cached</html>", HTML_URL)
+    assert len(requests) == 1
+    assert requests[0].headers["if-none-match"] == '"abc"'
+    assert requests[0].headers["if-modified-since"] == "Wed, 01 Jan 2025 00:00:00 GMT"
+    assert fetch._is_cache_fresh(cache_dir.name)
+    # Unchanged HTML keeps results rendered from it.
+    assert rendered.exists()
+
+
+async def test_download_stores_validators(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers={"content-type": "text/html", "etag": '"v2"'}, text="<html>new</html>")
+
+    monkeypatch.setattr(fetch, "ARXIV2MD_CACHE_STALE_WHILE_REVALIDATE_S", 0)
+    _install_transport(monkeypatch, handler)
+    cache_dir = _seed_cache(cache_path, age_seconds=fetch.ARXIV2MD_CACHE_TTL_SECONDS + 60, validators={"etag": '"v1"'})
+    rendered = _seed_result(cache_dir)
+
+    result = await fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1")
+
+    assert result == ("<html>new</html>", HTML_URL)
+    assert json.loads((cache_dir / "validators.json").read_text(encoding="utf-8"))["etag"] == '"v2"'
+    assert not rendered.exists()
+
+
+async def test_stale_entry_served_while_revalidating(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    monkeypatch.setattr(fetch, "ARXIV2MD_CACHE_STALE_WHILE_REVALIDATE_S", 3600)
+    requests = _install_transport(monkeypatch, lambda request: _html_response("<html>new</html>"), delay=0.05)
+    cache_dir = _seed_cache(cache_path, age_seconds=fetch.ARXIV2MD_CACHE_TTL_SECONDS + 60)
+
+    result = await fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1")
+
+    assert result == ("<html>cached</html>", HTML_URL)
+    await asyncio.gather(*fetch._background_refreshes)
+    assert len(requests) == 1
+    assert _cached_html(cache_dir.name) == "<html>new</html>"
+
+
+async def test_stale_entry_served_on_upstream_error(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    monkeypatch.setattr(fetch, "ARXIV2MD_CACHE_STALE_WHILE_REVALIDATE_S", 0)
+    monkeypatch.setattr(fetch, "ARXIV2MD_CACHE_STALE_IF_ERROR_S", 3600)
+    monkeypatch.setattr(fetch, "ARXIV2MD_FETCH_BACKOFF_S", 0)
+    _install_transport(monkeypatch, lambda request: httpx.Response(503))
+    _seed_cache(cache_path, age_seconds=fetch.ARXIV2MD_CACHE_TTL_SECONDS + 60)
+
+    result = await fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1")
+
+    assert result == ("<html>cached</html>", HTML_URL)
+
+
+async def test_missing_html_is_negatively_cached(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    requests = _install_transport(monkeypatch, lambda request: httpx.Response(404))
+
+    for _ in range(3):
+        with pytest.raises(fetch.HtmlNotAvailableError):
+            await fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1", ar5iv_url=AR5IV_URL)
+
+    # One request per host on the first call: no retries on 404, nothing afterwards.
+    assert [str(request.url) for request in requests] == [HTML_URL, AR5IV_URL]
+
+
+async def test_negative_record_skips_only_missing_host(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    cache_dir = cache_path / "2501.11120__v1"
+    cache_dir.mkdir(parents=True)
+    (cache_dir / "no_html.json").write_text(json.dumps({"missing": [HTML_URL]}), encoding="utf-8")
+    requests = _install_transport(monkeypatch, lambda request: _html_response("<html>ar5iv</html>"))
+
+    result = await fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1", ar5iv_url=AR5IV_URL)
+
+    assert result == ("<html>ar5iv</html>", AR5IV_URL)
+    assert [str(request.url) for request in requests] == [AR5IV_URL]
+    assert not (cache_dir / "no_html.json").exists()
+
+
+async def test_hedged_fetch_prefers_faster_ar5iv(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    monkeypatch.setattr(fetch, "ARXIV2MD_FETCH_HEDGE", True)
+    monkeypatch.setattr(fetch, "ARXIV2MD_FETCH_HEDGE_DELAY_S", 0.05)
+    requests = _install_transport(
+        monkeypatch,
+        lambda request: _html_response(f"<html>{request.url.host}</html>"),
+        host_delays={"arxiv.org": 5.0},
+    )
+
+    result = await asyncio.wait_for(
+        fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1", ar5iv_url=AR5IV_URL),
+        timeout=2.0,
+    )
+
+    assert result == ("<html>ar5iv.labs.arxiv.org</html>", AR5IV_URL)
+    assert [str(request.url) for request in requests] == [HTML_URL, AR5IV_URL]
+
+
+async def test_hedged_fetch_starts_ar5iv_on_404(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    monkeypatch.setattr(fetch, "ARXIV2MD_FETCH_HEDGE", True)
+    monkeypatch.setattr(fetch, "ARXIV2MD_FETCH_HEDGE_DELAY_S", 5.0)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "arxiv.org":
+            return httpx.Response(404)
+        return _html_response("<html>ar5iv</html>")
+
+    _install_transport(monkeypatch, handler)
+
+    result = await asyncio.wait_for(
+        fetch.fetch_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1", ar5iv_url=AR5IV_URL),
+        timeout=2.0,
+    )
+
+    assert result == ("<html>ar5iv</html>", AR5IV_URL)
+
+
+async def test_body_streamed_to_cache_file(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    _install_transport(monkeypatch, lambda request: _html_response("<html>streamed</html>"))
+
+    monkeypatch.setattr(compression, "ARXIV2MD_CACHE_COMPRESSION", "gzip")
+    _seed_cache(cache_path, age_seconds=fetch.ARXIV2MD_CACHE_TTL_SECONDS * 10)
+
+    page, source_url = await fetch.fetch_arxiv_html_entry(HTML_URL, arxiv_id="2501.11120v1", version="v1")
+
+    # Written gzip-compressed, replacing the legacy uncompressed copy.
+    html_path = cache_path / page.key / page.name
+    assert html_path == cache_path / "2501.11120__v1" / "source.html.gz"
+    assert gzip.decompress(html_path.read_bytes()) == b"<html>streamed</html>"
+    assert source_url == HTML_URL
+    assert not (html_path.parent / "source.html").exists()
+    assert not list(html_path.parent.glob("*.part"))
+
+
+async def test_page_evicted_by_another_worker_is_fetched_again(
+    cache_path: Path, mock_transport: list[httpx.Request], http_client: None
+) -> None:
+    def read(page: fetch.CachedHtml, source_url: str) -> bytes:
+        return page.read()
+
+    first = await fetch.with_arxiv_html_entry(HTML_URL, read, arxiv_id="2501.11120v1", version="v1")
+    # Another worker evicts the entry; this worker's memory still vouches for it.
+    cache.get_backend().delete_entry("2501.11120__v1")
+
+    second = await fetch.with_arxiv_html_entry(HTML_URL, read, arxiv_id="2501.11120v1", version="v1")
+
+    assert first == second == b"<html>ok</html>"
+    assert len(mock_transport) == 2
+    assert _cached_html("2501.11120__v1") == "<html>ok</html>"
+
+
+async def test_streamed_chunks_arrive_before_the_download_ends(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    rest_sent = asyncio.Event()
+
+    async def body() -> AsyncIterator[bytes]:
+        yield b"<html>first"
+        await rest_sent.wait()
+        yield b" second</html>"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "arxiv.org":
+            return httpx.Response(404)
+        return httpx.Response(200, headers={"content-type": "text/html"}, content=body())
+
+    _install_transport(monkeypatch, handler)
+    stream = fetch.stream_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1", ar5iv_url=AR5IV_URL)
+
+    assert await anext(stream) == (AR5IV_URL, b"<html>first")
+    rest_sent.set()
+    assert [chunk async for chunk in stream] == [(AR5IV_URL, b" second</html>")]
+    assert _cached_html("2501.11120__v1") == "<html>first second</html>"
+
+    # Once cached, the page is read back from the cache.
+    monkeypatch.setattr(fetch, "_STREAM_CHUNK_BYTES", 10)
+    cached = [chunk async for chunk in fetch.stream_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1")]
+    assert cached == [(AR5IV_URL, b"<html>firs"), (AR5IV_URL, b"t second</"), (AR5IV_URL, b"html>")]
+
+
+async def test_slow_stream_consumer_does_not_hold_the_download(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    monkeypatch.setattr(fetch, "_STREAM_QUEUE_CHUNKS", 2)
+    monkeypatch.setattr(fetch, "_STREAM_CHUNK_BYTES", 4)
+    pieces = [b"<html>", b"one ", b"two ", b"three ", b"four</html>"]
+
+    async def body() -> AsyncIterator[bytes]:
+        for piece in pieces:
+            yield piece
+
+    _install_transport(
+        monkeypatch, lambda request: httpx.Response(200, headers={"content-type": "text/html"}, content=body())
+    )
+    stream = fetch.stream_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1")
+
+    assert await anext(stream) == (HTML_URL, b"<html>")
+    # The download finished and released its lock while the consumer was away.
+    for _ in range(100):
+        if "2501.11120__v1" not in fetch._inflight:
+            break
+        await asyncio.sleep(0.01)
+    assert "2501.11120__v1" not in fetch._inflight
+    lock = cache.fetch_lock("2501.11120__v1")
+    assert lock.acquire(blocking=False)
+    lock.release()
+
+    rest = [chunk async for _, chunk in stream]
+    assert b"<html>" + b"".join(rest) == b"".join(pieces)
+    # Queued chunks come first, then the rest of the page from the cache.
+    assert rest[:2] == [b"one ", b"two "]
+    assert rest[2:] == [b"thre", b"e fo", b"ur</", b"html", b">"]
+
+
+async def test_stream_closed_early_leaves_no_unretrieved_failure(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    failed = asyncio.Event()
+
+    async def body() -> AsyncIterator[bytes]:
+        yield b"<html>first"
+        failed.set()
+        raise httpx.ReadError("connection reset")
+
+    _install_transport(
+        monkeypatch, lambda request: httpx.Response(200, headers={"content-type": "text/html"}, content=body())
+    )
+    unhandled: list[dict] = []
+    asyncio.get_running_loop().set_exception_handler(lambda loop, context: unhandled.append(context))
+    stream = fetch.stream_arxiv_html(HTML_URL, arxiv_id="2501.11120v1", version="v1")
+
+    assert await anext(stream) == (HTML_URL, b"<html>first")
+    await failed.wait()
+    await asyncio.sleep(0.05)
+    await stream.aclose()
+    del stream
+    gc.collect()
+
+    assert unhandled == []
+    assert fetch._find_html("2501.11120__v1") is None
+
+
+@pytest.mark.parametrize("declared_length", [True, False])
+async def test_oversized_response_rejected(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None, declared_length: bool
+) -> None:
+    monkeypatch.setattr(fetch, "ARXIV2MD_FETCH_MAX_BYTES", 10)
+
+    body = b"<html>" + b"x" * 100 + b"</html>"
+
+    async def chunks() -> AsyncIterator[bytes]:
+        yield body
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        content = body if declared_length else chunks()
+        return httpx.Response(200, headers={"content-type": "text/html"}, content=content)
+
+    _install_transport(monkeypatch, handler)
+
+    with pytest.raises(ValueError, match="too large"):
+        await fetch.fetch_arxiv_html_entry(HTML_URL, arxiv_id="2501.11120v1", version="v1")
+
+    assert fetch._find_html("2501.11120__v1") is None
+    assert not list((cache_path / ".spool").glob("*.part"))
+
+
+async def test_non_html_rejected_before_body_read(
+    cache_path: Path, monkeypatch: pytest.MonkeyPatch, http_client: None
+) -> None:
+    _install_transport(monkeypatch, lambda request: httpx.Response(200, headers={"content-type": "application/pdf"}))
+
+    with pytest.raises(ValueError, match="content-type"):
+        await fetch.fetch_arxiv_html_entry(HTML_URL, arxiv_id="2501.11120v1", version="v1")
+
+
+def test_file_lock_is_exclusive(tmp_path: Path) -> None:
+    first = FileLock(tmp_path / "entry.lock")
+    second = FileLock(tmp_path / "entry.lock")
+
+    assert first.acquire(blocking=False)
+    assert not second.acquire(blocking=False)
+    first.release()
+    assert second.acquire(blocking=False)
+    second.release()
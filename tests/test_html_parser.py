@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from arxiv2md.html_parser import parse_arxiv_html
+from arxiv2md.ir import lower_nodes, render_markdown
 
 
 def test_extracts_metadata_and_sections() -> None:
@@ -34,4 +35,58 @@ def test_extracts_metadata_and_sections() -> None:
     assert parsed.abstract == "Abstract text."
     assert parsed.sections
     assert parsed.sections[0].title == "1 Intro"
-    assert parsed.sections[0].html and "Intro text." in parsed.sections[0].html
+    assert parsed.sections[0].nodes
+    assert render_markdown(lower_nodes(parsed.sections[0].nodes)) == "Intro text."
+
+
+def test_parses_utf8_bytes() -> None:
+    html = """
+    <html><body><article class="ltx_document">
+      <h1 class="ltx_title ltx_title_document">Über Zoë</h1>
+    </article></body></html>
+    """
+
+    parsed = parse_arxiv_html(html.encode("utf-8"))
+
+    assert parsed.title == "Über Zoë"
+
+
+def _bodies(sections: list) -> list[tuple[str, str, list]]:
+    return [
+        (section.title, render_markdown(lower_nodes(section.nodes or [])), _bodies(section.children))
+        for section in sections
+    ]
+
+
+def test_section_tree_skips_navigation_and_splits_bodies() -> None:
+    html = """
+    <html><body><article class="ltx_document">
+      <nav class="ltx_TOC"><h2>Contents</h2></nav>
+      <div class="ltx_abstract"><h6 class="ltx_title">Abstract</h6><p>Abstract text.</p></div>
+      <section class="ltx_section" id="S1">
+        <h2 class="ltx_title">1 Intro</h2>
+        <p>Intro text.</p>
+        <section class="ltx_subsection" id="S1.SS1">
+          <h3 class="ltx_title">1.1 Setup</h3>
+          <p>Setup text.</p>
+        </section>
+        <p>More intro.</p>
+        <h3 class="ltx_title">Aside</h3>
+        <p>Aside text.</p>
+      </section>
+      <section class="ltx_section" id="S2"><h2 class="ltx_title">2 End</h2></section>
+    </article></body></html>
+    """
+
+    sections = parse_arxiv_html(html).sections
+
+    # A second heading in the same <section> ends the first one's body.
+    assert _bodies(sections) == [
+        (
+            "1 Intro",
+            "Intro text.\n\nMore intro.",
+            [("1.1 Setup", "Setup text.", []), ("Aside", "Aside text.", [])],
+        ),
+        ("2 End", "", []),
+    ]
+    assert [section.anchor for section in sections] == ["S1", "S2"]
@@ -0,0 +1,126 @@
+"""Tests for the ingestion pipeline and its result cache."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from arxiv2md import fetch, ingestion, result_cache
+from arxiv2md.html_parser import parse_arxiv_html
+
+HTML_URL = "https://arxiv.org/html/2501.11120v1"
+
+PAPER = """
+<html><body><article class="ltx_document">
+  <h1 class="ltx_title ltx_title_document">Sample Title</h1>
+  <div class="ltx_abstract"><p>Abstract text.</p></div>
+  <section class="ltx_section" id="S1">
+    <h2 class="ltx_title ltx_title_section">1 Intro</h2>
+    <div class="ltx_para"><p>Intro text <a class="ltx_ref" href="#bib.bib1">[1]</a>.</p></div>
+  </section>
+  <section class="ltx_bibliography" id="bib">
+    <h2 class="ltx_title ltx_title_bibliography">References</h2>
+    <ul><li id="bib.bib1">A reference.</li></ul>
+  </section>
+</article></body></html>
+"""
+
+
+@pytest.fixture
+def paper_dir(cache_path: Path) -> Path:
+    entry = cache_path / "2501.11120__v1"
+    entry.mkdir(parents=True)
+    (entry / "source.html").write_text(PAPER, encoding="utf-8")
+    (entry / "source_url.txt").write_text(HTML_URL, encoding="utf-8")
+    return entry
+
+
+@pytest.fixture
+def parse_calls(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    calls: list[int] = []
+
+    def counting_parse(html: str | bytes):
+        calls.append(1)
+        return parse_arxiv_html(html)
+
+    monkeypatch.setattr(ingestion, "parse_arxiv_html", counting_parse)
+    return calls
+
+
+async def _ingest(**options):
+    defaults = {
+        "remove_refs": False,
+        "remove_toc": False,
+        "remove_inline_citations": False,
+        "section_filter_mode": "exclude",
+        "sections": [],
+    }
+    return await ingestion.ingest_paper(
+        arxiv_id="2501.11120", version="v1", html_url=HTML_URL, **{**defaults, **options}
+    )
+
+
+async def test_result_cache_skips_conversion_on_repeat(paper_dir: Path, parse_calls: list[int]) -> None:
+    first, metadata = await _ingest()
+    second, cached_metadata = await _ingest()
+
+    assert len(parse_calls) == 1
+    assert second == first
+    assert cached_metadata == metadata == {"title": "Sample Title", "authors": [], "abstract": "Abstract text."}
+
+    # A different option set is a separate result, rendered from the stored parse.
+    without_refs, _ = await _ingest(remove_refs=True, sections=["Intro"], section_filter_mode="include")
+    assert len(parse_calls) == 1
+    assert without_refs.content != first.content
+    assert len(list((paper_dir / result_cache.RESULTS_DIRNAME).glob("*.json"))) == 2
+
+
+def test_parsed_document_round_trips(paper_dir: Path) -> None:
+    parsed = parse_arxiv_html(PAPER)
+    # Stored as ingestion stores it: lowered, without the parsed page's nodes.
+    ingestion._lower_sections(parsed.sections)
+    assert parsed.sections[0].ir and parsed.sections[0].nodes is None
+    result_cache.store_parsed(paper_dir.name, parsed)
+
+    assert result_cache.load_parsed(paper_dir.name) == parsed
+
+    result_cache.clear_derived(paper_dir.name)
+    assert result_cache.load_parsed(paper_dir.name) is None
+
+
+async def test_converter_upgrade_invalidates_results(
+    paper_dir: Path, parse_calls: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    await _ingest()
+    monkeypatch.setattr(result_cache, "CONVERTER_VERSION", "next")
+    await _ingest()
+
+    assert len(parse_calls) == 2
+
+
+async def test_repeat_ingest_is_served_from_memory(
+    paper_dir: Path, parse_calls: list[int], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    first, _ = await _ingest()
+    # With the on-disk tiers gone, only the memory cache can avoid a reparse.
+    result_cache.clear_derived(paper_dir.name)
+    second, _ = await _ingest()
+    other, _ = await _ingest(remove_refs=True)
+
+    assert len(parse_calls) == 1
+    assert second == first
+    assert other.content != first.content
+
+    # Rewriting the HTML changes its mtime, so stale copies are never served
+    # once the backend is checked again.
+    monkeypatch.setattr(fetch, "ARXIV2MD_MEMORY_CACHE_REVALIDATE_S", 0)
+    html = paper_dir / "source.html"
+    mtime_ns = html.stat().st_mtime_ns
+    html.write_text(PAPER.replace("Sample Title", "New Title"), encoding="utf-8")
+    os.utime(html, ns=(mtime_ns, mtime_ns + 1_000_000))
+    _, metadata = await _ingest()
+
+    assert metadata["title"] == "New Title"
+    assert len(parse_calls) == 2
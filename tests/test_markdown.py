@@ -2,6 +2,11 @@
 
 from __future__ import annotations
 
+import json
+
+import pytest
+
+from arxiv2md.ir import lower_fragment, render_markdown
 from arxiv2md.markdown import convert_fragment_to_markdown
 
 
@@ -206,3 +211,48 @@ def test_no_base_url_preserves_relative_paths() -> None:
 
     result = convert_fragment_to_markdown(html)
     assert "extracted/fig1.png" in result
+
+
+_IR_FRAGMENT = """
+<div class="ltx_para"><p>See <a href="https://arxiv.org/html/2501.11120v1#S2">Section 2</a>
+and <cite class="ltx_cite">[<a href="#bib.bib3">3</a>]</cite>.</p></div>
+<figure class="ltx_figure"><img src="x1.png" alt="Plot"/><figcaption>Figure 1: Results.</figcaption></figure>
+"""
+
+
+@pytest.mark.parametrize(
+    ("remove_inline_citations", "base_url", "expected"),
+    [
+        (
+            False,
+            None,
+            "See [Section 2](https://arxiv.org/html/2501.11120v1#S2)\nand [3].\n\n"
+            "Figure: Figure 1: Results.\nPlot: x1.png",
+        ),
+        (
+            False,
+            "https://arxiv.org/html/2501.11120v1",
+            "See [Section 2](https://arxiv.org/html/2501.11120v1#S2)\nand [3].\n\n"
+            "Figure: Figure 1: Results.\nPlot: https://arxiv.org/html/2501.11120v1/x1.png",
+        ),
+        (True, None, "See Section 2\nand .\n\nFigure: Figure 1: Results.\nPlot: x1.png"),
+        (
+            True,
+            "https://arxiv.org/html/2501.11120v1",
+            "See Section 2\nand .\n\nFigure: Figure 1: Results.\nPlot: https://arxiv.org/html/2501.11120v1/x1.png",
+        ),
+    ],
+)
+def test_lowered_fragment_renders_any_option_set(
+    remove_inline_citations: bool, base_url: str | None, expected: str
+) -> None:
+    # The IR is plain JSON, so it survives the parsed-document cache.
+    blocks = json.loads(json.dumps(lower_fragment(_IR_FRAGMENT)))
+
+    rendered = render_markdown(blocks, remove_inline_citations=remove_inline_citations, base_url=base_url)
+
+    assert rendered == expected
+    assert (
+        convert_fragment_to_markdown(_IR_FRAGMENT, remove_inline_citations=remove_inline_citations, base_url=base_url)
+        == expected
+    )
@@ -0,0 +1,30 @@
+"""Tests for the in-process memory cache."""
+
+from __future__ import annotations
+
+from arxiv2md.memory_cache import ByteLRU
+
+
+def test_byte_lru_evicts_least_recently_used_past_budget() -> None:
+    lru = ByteLRU(max_bytes=10)
+    lru.put("a", "A", 4)
+    lru.put("b", "B", 4)
+    assert lru.get("a") == "A"  # "b" is now the oldest.
+    lru.put("c", "C", 4)
+
+    assert lru.get("b") is None
+    assert lru.get("a") == "A" and lru.get("c") == "C"
+    lru.put("huge", "X", 11)
+    assert lru.get("huge") is None
+    assert lru.metrics() == {"entries": 2, "bytes": 8, "max_bytes": 10, "hits": 3, "misses": 2, "evictions": 1}
+
+
+def test_byte_lru_replacing_a_key_recharges_its_size() -> None:
+    lru = ByteLRU(max_bytes=10)
+    lru.put("a", "old", 8)
+    lru.put("a", "new", 3)
+    lru.put("b", "B", 7)
+
+    assert lru.get("a") == "new"
+    assert lru.metrics()["bytes"] == 10
+
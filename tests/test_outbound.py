@@ -0,0 +1,79 @@
+"""Tests for outbound request scheduling."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from arxiv2md.outbound import OutboundScheduler, TokenBucket, _parse_retry_after
+
+URL = "https://arxiv.org/html/2501.11120v1"
+
+
+def test_token_bucket_reserves_future_slots() -> None:
+    bucket = TokenBucket(rate=2.0, capacity=2)
+    now = time.monotonic()
+
+    assert bucket.reserve(now=now) == 0.0
+    assert bucket.reserve(now=now) == 0.0
+    assert bucket.reserve(now=now) == 0.5
+    assert bucket.reserve(now=now) == 1.0
+    # Tokens refill with time but never beyond capacity.
+    assert bucket.reserve(now=now + 10) == 0.0
+    assert bucket.reserve(now=now + 10) == 0.0
+    assert bucket.reserve(now=now + 10) == 0.5
+
+
+def test_parse_retry_after() -> None:
+    assert _parse_retry_after("3") == 3.0
+    assert _parse_retry_after(None) is None
+    assert _parse_retry_after("not a date") is None
+    assert _parse_retry_after("Wed, 01 Jan 2020 00:00:00 GMT") == 0.0
+
+
+async def test_retry_after_delays_other_requests() -> None:
+    scheduler = OutboundScheduler(rate_per_s=0, burst=1, max_concurrency=4, max_retry_after_s=60)
+
+    # Retry-After wins over the exponential default.
+    delay = scheduler.back_off(URL, attempt=0, base_delay=10.0, retry_after="0")
+    assert delay == 0.0
+
+    delay = scheduler.back_off(URL, attempt=0, base_delay=0.1)
+    assert 0.1 <= delay <= 0.125
+
+    started = time.monotonic()
+    async with scheduler.slot(URL):
+        pass
+    assert time.monotonic() - started >= 0.09
+    assert scheduler.metrics()["throttled"] == 2
+
+    # Other hosts are unaffected by arxiv.org's backoff.
+    scheduler.back_off(URL, attempt=0, base_delay=5.0)
+    started = time.monotonic()
+    async with scheduler.slot("https://ar5iv.labs.arxiv.org/html/2501.11120v1"):
+        pass
+    assert time.monotonic() - started < 0.5
+
+
+async def test_concurrency_cap_queues_requests() -> None:
+    scheduler = OutboundScheduler(rate_per_s=0, burst=1, max_concurrency=2, max_retry_after_s=60)
+    release = asyncio.Event()
+    peak = 0
+
+    async def request() -> None:
+        nonlocal peak
+        async with scheduler.slot(URL):
+            peak = max(peak, scheduler.metrics()["in_flight"])
+            await release.wait()
+
+    tasks = [asyncio.ensure_future(request()) for _ in range(5)]
+    await asyncio.sleep(0.05)
+    assert scheduler.metrics()["queue_depth"] == 3
+    release.set()
+    await asyncio.gather(*tasks)
+
+    metrics = scheduler.metrics()
+    assert peak == 2
+    assert metrics["queue_depth"] == 0
+    assert metrics["requests"] == 5
+    assert metrics["max_wait_s"] > 0
@@ -0,0 +1,59 @@
+"""Tests for the raw HTML pre-filter."""
+
+from __future__ import annotations
+
+from arxiv2md.html_parser import parse_arxiv_html
+from arxiv2md.prefilter import prefilter_html
+
+MATH = (
+    '<math alttext="x^{2}" display="inline"><semantics><msup><mi>x</mi><mn>2</mn></msup>'
+    '<annotation encoding="application/x-tex">x^{2}&lt;y</annotation></semantics></math>'
+)
+
+
+def test_math_is_reduced_to_its_tex_annotation() -> None:
+    html = f"<p>Let {MATH} and <math><mi>y</mi></math>.</p>"
+
+    assert prefilter_html(html) == (
+        b'<p>Let <math><annotation encoding="application/x-tex">x^{2}&lt;y</annotation></math>'
+        b" and <math><mi>y</mi></math>.</p>"
+    )
+
+
+def test_junk_elements_are_dropped_whole() -> None:
+    html = """<html><head><title>T</title><script>var s = "</div><div>";</script>
+    <style>p { color: red }</style><link rel="stylesheet" href="a.css"><meta charset="utf-8"></head>
+    <body><nav class="ltx_page_navbar"><div><div>Home</div></div></nav>
+    <div class="ltx_page_main"><div class="package-alerts ltx_document"><div>Alert</div></div>
+    <!-- <div class="package-alerts"> is kept in comments --><svg><g><svg/><text>label</text></g></svg>
+    <nav class="ltx_TOC">Contents</nav><p>Body</p><div class="ltx_pagination"/></div>
+    <footer><div>Footer</div></footer><button class="sr-only">Skip</button></body></html>"""
+
+    filtered = prefilter_html(html).decode()
+
+    for junk in ("var s", "color: red", "a.css", "charset", "Home", "Alert", "label", "Contents", "Footer", "Skip"):
+        assert junk not in filtered
+    assert '<div class="ltx_page_main">' in filtered and "<p>Body</p></div>" in filtered
+    assert "<!-- <div class=\"package-alerts\"> is kept in comments -->" in filtered
+    assert "Contents" in prefilter_html(html, keep_toc=True).decode()
+
+
+def test_markup_around_comments_is_kept() -> None:
+    html = f"<p>Let {MATH} be <!-- <math> --> given</p><!--a--><!--b-->"
+
+    assert prefilter_html(html) == (
+        b'<p>Let <math><annotation encoding="application/x-tex">x^{2}&lt;y</annotation></math>'
+        b" be <!-- <math> --> given</p><!--a--><!--b-->"
+    )
+
+
+def test_parse_output_keeps_tex_but_not_presentation_mathml() -> None:
+    html = f"""<html><body><article class="ltx_document">
+      <h1 class="ltx_title ltx_title_document">On {MATH}</h1>
+      <section class="ltx_section" id="S1"><h2 class="ltx_title">1 Intro</h2><p>Text {MATH}.</p></section>
+    </article></body></html>"""
+
+    parsed = parse_arxiv_html(html)
+
+    assert parsed.title == "On x^{2}<y"
+    assert "msup" not in str(parsed.sections[0].nodes)
@@ -0,0 +1,67 @@
+"""Tests for the server's query processing and digest storage."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from arxiv2md import cache
+from arxiv2md.schemas import IngestionResult
+from server import query_processor
+from server.digest_store import load_digest, store_digest
+from server.models import IngestSuccessResponse
+
+
+@pytest.fixture
+def fake_ingest(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    calls: list[str] = []
+
+    async def ingest_paper(*, arxiv_id: str, **_: object) -> tuple[IngestionResult, dict[str, str]]:
+        calls.append(arxiv_id)
+        result = IngestionResult(summary="Estimated tokens: 3", sections_tree="1 Intro", content="# Intro")
+        return result, {"title": "A Paper"}
+
+    monkeypatch.setattr(query_processor, "ingest_paper", ingest_paper)
+    return calls
+
+
+async def test_repeat_requests_share_one_digest(cache_path: Path, fake_ingest: list[str]) -> None:
+    first = await query_processor.process_query("2501.11120v1")
+    second = await query_processor.process_query("2501.11120v1")
+
+    assert isinstance(first, IngestSuccessResponse) and isinstance(second, IngestSuccessResponse)
+    assert first.digest_url != second.digest_url
+    keys = cache.get_backend().keys()
+    digests = [key for key in keys if cache.get_backend().read(key, "digest.txt") is not None]
+    assert len(digests) == 1 and len(keys) == 3
+    for response in (first, second):
+        assert load_digest(response.digest_url.rsplit("/", 1)[1]) == b"1 Intro\n# Intro"
+
+
+async def test_routes_without_digest_url_store_nothing(cache_path: Path, fake_ingest: list[str]) -> None:
+    response = await query_processor.process_query("2501.11120v1", store_digest_content=False)
+
+    assert isinstance(response, IngestSuccessResponse)
+    assert response.digest_url is None
+    assert fake_ingest == ["2501.11120v1"]
+    assert cache.get_backend().keys() == []
+
+
+def test_new_alias_refreshes_the_shared_digest(cache_path: Path) -> None:
+    store_digest("0b6c0e3e-8a43-4c5e-9a55-0d5d2c1f6d3e", "digest")
+    backend = cache.get_backend()
+    (key,) = [key for key in backend.keys() if key.startswith("digest-")]
+    backend.write(key, "digest.txt", b"digest", mtime=1_700_000_000)
+
+    store_digest("5a1f5a57-3a46-4e0c-8c3e-2f4d6ed0c2a1", "digest")
+
+    # The digest's age restarts with its newest alias, so it cannot expire first.
+    assert backend.info(key, "digest.txt").mtime > 1_700_000_000
+
+
+def test_legacy_digest_is_still_downloadable(cache_path: Path) -> None:
+    cache.get_backend().write("0b6c0e3e-8a43-4c5e-9a55-0d5d2c1f6d3e", "digest.txt", b"old digest")
+
+    assert load_digest("0b6c0e3e-8a43-4c5e-9a55-0d5d2c1f6d3e") == b"old digest"
+    assert load_digest("5a1f5a57-3a46-4e0c-8c3e-2f4d6ed0c2a1") is None
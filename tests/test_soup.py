@@ -0,0 +1,150 @@
+"""Tests for parser engine selection and parity between engines."""
+
+from __future__ import annotations
+
+import pytest
+
+from arxiv2md import result_cache, soup
+from arxiv2md.html_parser import parse_arxiv_html
+from arxiv2md.ir import lower_nodes, render_markdown
+from arxiv2md.markdown import convert_fragment_to_markdown, convert_html_to_markdown
+
+PAPER = """<!DOCTYPE html>
+<html lang="en">
+<head><title>Fallback Title</title><meta charset="utf-8"><link rel="stylesheet" href="x.css"></head>
+<body>
+<nav class="ltx_page_navbar"><a href="#S1">1 Intro</a></nav>
+<article class="ltx_document">
+  <h1 class="ltx_title ltx_title_document">Sparse Attention &amp; You</h1>
+  <div class="ltx_authors">
+    <span class="ltx_creator ltx_role_author"><span class="ltx_personname">
+      <span class="ltx_text ltx_font_bold">Alice Smith<sup>1</sup></span>
+      <span class="ltx_text ltx_font_bold">&amp;Bob Jones<span class="ltx_note ltx_role_footnote">Equal contribution</span></span>
+      <span class="ltx_text ltx_font_bold">bob@example.com</span>
+    </span></span>
+  </div>
+  <div class="ltx_abstract"><h6 class="ltx_title ltx_title_abstract">Abstract</h6>
+    <p class="ltx_p">We study <math><semantics><mi>x</mi>
+      <annotation encoding="application/x-tex">x^2</annotation></semantics></math> at scale.</p>
+  </div>
+  <section class="ltx_section" id="S1">
+    <h2 class="ltx_title ltx_title_section">1 Introduction</h2>
+    <div class="ltx_para"><p class="ltx_p">Prior work <cite class="ltx_cite">[<a href="#bib.bib1" class="ltx_ref">1</a>]</cite>
+      uses <em>dense</em> and <b>sparse</b> layers; see <a href="#S2" class="ltx_ref">Section 2</a>
+      and <a href="https://example.com/code">our code</a>.</p></div>
+    <ul class="ltx_itemize"><li class="ltx_item"><p>first point</p></li><li class="ltx_item"><p>second point</p></li></ul>
+    <section class="ltx_subsection" id="S1.SS1">
+      <h3 class="ltx_title ltx_title_subsection">1.1 Setup</h3>
+      <table class="ltx_equationgroup"><tr><td><math><annotation encoding="application/x-tex">E = mc^2</annotation></math></td><td>(1)</td></tr></table>
+      <figure class="ltx_figure" id="S1.F1"><img src="x1.png" alt="A plot"><figcaption>Figure 1: Loss curves.</figcaption></figure>
+    </section>
+  </section>
+  <section class="ltx_section" id="S2">
+    <h2 class="ltx_title ltx_title_section">2 Results</h2>
+    <figure class="ltx_table" id="S2.T1"><figcaption>Table 1: Accuracy.</figcaption>
+      <table class="ltx_tabular"><thead><tr><th>Model</th><th>Acc</th></tr></thead>
+        <tbody><tr><td>Small</td><td>70.1</td></tr><tr><td>Large</td><td>72.4</td></tr></tbody></table>
+    </figure>
+    <blockquote><p>Quoted text.</p></blockquote>
+    <p>Closing paragraph <span class="ltx_note ltx_role_footnote">A footnote.</span></p>
+  </section>
+  <section class="ltx_bibliography" id="bib">
+    <h2 class="ltx_title ltx_title_bibliography">References</h2>
+    <ul class="ltx_biblist"><li class="ltx_bibitem" id="bib.bib1">A. Author. A paper. 2020.</li></ul>
+  </section>
+</article>
+</body>
+</html>
+"""
+
+FRAGMENTS = [
+    "Leading text <b>bold</b> trailing text",
+    '<table class="ltx_tabular"><tr><th>A</th><th>B</th></tr><tr><td>1</td><td>2</td></tr></table>',
+    '<div class="ltx_para"><p>Text with <math><annotation encoding="application/x-tex">a&lt;b</annotation></math>.</p></div>',
+    "<ol><li>one</li><li>two<ul><li>nested</li></ul></li></ol>",
+]
+
+_OTHER_ENGINES = [engine for engine in soup.PARSER_ENGINES if engine != "html.parser"]
+
+
+def _render(engine: str) -> list[object]:
+    parsed = parse_arxiv_html(PAPER.encode("utf-8"), engine=engine)
+    rendered: list[object] = [parsed.title, parsed.authors, parsed.abstract]
+    pending = list(parsed.sections)
+    while pending:
+        section = pending.pop(0)
+        rendered.append((section.title, section.level, section.anchor))
+        rendered.append(render_markdown(lower_nodes(section.nodes or []), base_url="https://arxiv.org/html/x"))
+        pending.extend(section.children)
+    rendered.extend(convert_fragment_to_markdown(fragment, engine=engine) for fragment in FRAGMENTS)
+    return rendered
+
+
+@pytest.mark.parametrize("engine", _OTHER_ENGINES)
+def test_engines_produce_identical_markdown(engine: str) -> None:
+    if engine not in soup.available_engines():
+        pytest.skip(f"{engine} not installed")
+
+    assert _render(engine) == _render("html.parser")
+
+
+def test_corpus_exercises_the_converter() -> None:
+    rendered = _render("html.parser")
+
+    assert rendered[:2] == ["Sparse Attention & You", ["Alice Smith", "Bob Jones"]]
+    assert "| Small | 70.1 |" in "\n".join(str(item) for item in rendered)
+    assert convert_html_to_markdown(PAPER).startswith("# Sparse Attention & You")
+
+
+# Markup the engines repair differently: the html.parser output, and the
+# engines known to lose part of the text on it (why they are opt-in).
+MALFORMED = [
+    ("<p>Outer <div>inner</div> rest</p>", "Outer inner rest", {"lxml", "html5lib"}),
+    (
+        '<p class="ltx_p">Text <span class="ltx_inline-block"><table class="ltx_tabular">'
+        "<tr><td>a</td><td>b</td></tr></table></span> more text.</p>",
+        "Text ab more text.",
+        {"html5lib"},
+    ),
+]
+
+
+@pytest.mark.parametrize("engine", list(soup.PARSER_ENGINES))
+@pytest.mark.parametrize(("fragment", "expected", "divergent"), MALFORMED)
+def test_engines_on_malformed_nesting(engine: str, fragment: str, expected: str, divergent: set[str]) -> None:
+    if engine not in soup.available_engines():
+        pytest.skip(f"{engine} not installed")
+
+    markdown = convert_fragment_to_markdown(fragment, engine=engine)
+    if engine in divergent:
+        assert markdown.strip() != expected
+    else:
+        assert markdown.strip() == expected
+
+
+def test_auto_uses_html_parser(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(soup, "ARXIV2MD_HTML_PARSER", "auto")
+    assert soup.active_engine() == "html.parser"
+
+    # A missing or unknown engine falls back to the default.
+    monkeypatch.setattr(soup, "ARXIV2MD_HTML_PARSER", "nonexistent")
+    assert soup.active_engine() == "html.parser"
+
+
+def test_result_key_includes_engine(monkeypatch: pytest.MonkeyPatch) -> None:
+    options = dict(
+        arxiv_id="2501.00001",
+        version=None,
+        source_url="https://arxiv.org/html/2501.00001",
+        remove_refs=False,
+        remove_toc=False,
+        remove_inline_citations=False,
+        section_filter_mode="exclude",
+        sections=[],
+        include_frontmatter=True,
+    )
+    monkeypatch.setattr(result_cache, "active_engine", lambda: "html.parser")
+    default_key = result_cache.result_key(**options)
+    monkeypatch.setattr(result_cache, "active_engine", lambda: "lxml")
+
+    assert result_cache.result_key(**options) != default_key
@@ -0,0 +1,100 @@
+"""Tests for converting pages to Markdown while they stream in."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from arxiv2md import ingestion, streaming
+from arxiv2md.streaming import StreamingConverter
+
+HTML_URL = "https://arxiv.org/html/2501.11120v1"
+
+PAPER = """<!DOCTYPE html>
+<html><head><title>T</title><script>var s = "<section>";</script></head>
+<body><nav class="ltx_page_navbar"><section><h2>Not a section</h2></section></nav>
+<article class="ltx_document">
+  <h1 class="ltx_title ltx_title_document">Sample Title</h1>
+  <div class="ltx_abstract"><h6 class="ltx_title ltx_title_abstract">Abstract</h6>
+    <p>We study <math><semantics><mi>x</mi><annotation encoding="application/x-tex">x^2</annotation></semantics></math>.</p>
+  </div>
+  <section class="ltx_section" id="S1"><h2 class="ltx_title">1 Intro</h2>
+    <div class="ltx_para"><p>Intro &amp; text <a class="ltx_ref" href="#bib.bib1">[1]</a> &#955;.</p></div>
+    <section class="ltx_subsection" id="S1.SS1"><h3 class="ltx_title">1.1 Setup</h3>
+      <p>Setup <!-- a comment --> text.</p>
+    </section>
+  </section>
+  <section class="ltx_section" id="S2"><h2 class="ltx_title">2 Related Work</h2><p>Related.</p></section>
+  <section class="ltx_bibliography" id="bib"><h2 class="ltx_title">References</h2>
+    <ul><li id="bib.bib1">A reference.</li></ul>
+  </section>
+  <section class="ltx_section" id="S3"><h3 class="ltx_title">Errata</h3><p>Nested under References.</p></section>
+  <h2 class="ltx_title">Loose heading</h2>
+  <section class="ltx_appendix" id="A1"><h2 class="ltx_title">Appendix A</h2><p>Appendix text.</p></section>
+</article>
+<footer><section><h2>Not a section either</h2></section></footer>
+</body></html>
+"""
+
+
+@pytest.fixture
+def paper_dir(cache_path: Path) -> Path:
+    entry = cache_path / "2501.11120__v1"
+    entry.mkdir(parents=True)
+    (entry / "source.html").write_text(PAPER, encoding="utf-8")
+    (entry / "source_url.txt").write_text(HTML_URL, encoding="utf-8")
+    return entry
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"remove_refs": False, "sections": []},
+        {"remove_refs": True, "sections": ["Related Work"], "remove_inline_citations": True},
+        {"remove_refs": False, "sections": ["Abstract", "Intro"]},
+    ],
+)
+async def test_streamed_blocks_join_to_the_batch_content(
+    paper_dir: Path, monkeypatch: pytest.MonkeyPatch, options: dict
+) -> None:
+    monkeypatch.setattr("arxiv2md.fetch._STREAM_CHUNK_BYTES", 7)
+    batch, _ = await ingestion.ingest_paper(
+        arxiv_id="2501.11120",
+        version="v1",
+        html_url=HTML_URL,
+        remove_toc=True,
+        section_filter_mode="exclude",
+        **options,
+    )
+
+    blocks = [
+        block
+        async for block in streaming.stream_paper(
+            arxiv_id="2501.11120", version="v1", html_url=HTML_URL, **options
+        )
+    ]
+
+    assert "\n\n".join(blocks) == batch.content
+    assert "Not a section" not in batch.content
+
+
+def test_sections_are_emitted_as_soon_as_they_close() -> None:
+    converter = StreamingConverter(base_url=HTML_URL)
+    data = PAPER.encode("utf-8")
+    intro_end = data.index(b'<section class="ltx_section" id="S2"')
+
+    # The abstract is out while the first section is still open.
+    assert converter.feed(data[: intro_end - 20]) == ["## Abstract", "Abstract We study x^2 ."]
+    assert converter.feed(data[intro_end - 20 : intro_end]) == [
+        "## 1 Intro",
+        "Intro & text [1] λ.",
+        "### 1.1 Setup",
+        "Setup a comment text.",
+    ]
+    # Nothing is held between pieces.
+    assert converter._splitter._parts == []
+
+    rest = converter.feed(data[intro_end:]) + converter.close()
+    assert rest[:2] == ["## 2 Related Work", "Related."]
+    assert "## Loose heading" in rest and "Not a section" not in "".join(rest)